@@ -1,235 +1,211 @@
 # ml-service/app.py
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from pydantic import BaseModel
 import joblib
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+import threading
+import time
+import os
+import secrets
 
 # Import data loading and processing functions
-from clean_balls_data import summarize_match_data, pivot_match_data, normalize_team as normalize_team_balls
-from clean_match_data import normalize_team as normalize_team_match, normalize_match_type  
-from features_engineering_encoding import (
-    calculate_rolling_stats,
-    compute_rolling_features_balls,  
-    calculate_toss_stats, 
-    add_head_to_head_toss_advantage, 
-    add_chasing_defending_strength,
-    add_diff_features,
-    add_venue_features,
-    selected_features
-)
-from historical_stats import stats_calculator
+from normalization import normalize_match_type, PLAYOFF_MATCH_TYPES, TEAM_IDS, VENUE_IDS, unique_names
+from dataset import get_dataset
+from features_engineering_encoding import selected_features
+from historical_stats import HistoricalStatsCalculator
+from feature_store import load_or_build_feature_store, source_fingerprint
+from match_state import MatchState
+from live_model import LiveWinModel, INNINGS_BALLS, WICKETS, blend_with_prior
+from simulator import pair_probability_matrix, simulate_tournament, simulation_pool
+from prediction_cache import PredictionCache
+from executor import BoundedExecutor, ExecutorOverloaded, ExecutorTimeout
+from startup import StartupStatus
+from model_runtime import load_model
+from model_registry import ModelRegistry, RegistryWatcher, LoadedModel, MODEL_FILE, REFERENCE_FILE, ENCODERS_FILE
+from metrics import registry as metrics, stage
 
 
 
 # Load and prepare data once at startup
 def load_and_process_data():
-    """Load and process historical data for feature engineering"""
+    """Historical match data merged with the ball-by-ball summaries, from the shared dataset"""
     try:
-        # Load raw data
-        match_data = pd.read_csv("data/match_data.csv")
-        ball_data = pd.read_csv("data/ball_by_ball_data.csv")
-        
-        # Clean match data
-        match_data = match_data.drop(columns=["Unnamed: 0", "city", "method"], errors='ignore')
-        match_data = match_data.dropna()
-
-        match_data = match_data[match_data['source'] == 'train']
-        
-        # Normalize match types
-        match_data.loc[:, "match_type"] = match_data["match_type"].apply(normalize_match_type)
-        
-        # Normalize team names for match data
-        for col in ["team1", "team2", "toss_winner", "winner"]:
-            match_data.loc[:, col] = match_data[col].apply(normalize_team_match)
-        
-        # Remove rows with None values (defunct teams)
-        match_data = match_data.dropna()
-        
-        # Clean string columns
-        match_data = match_data.copy()
-        match_data["toss_decision"] = match_data["toss_decision"].str.lower()
-        match_data["result"] = match_data["result"].str.lower()
-        
-        # Drop date column and rename id to match_id
-        match_data = match_data.drop(columns=["date"], errors='ignore')
-        match_data = match_data.rename(columns={'id': 'match_id'})
-        
-        # Clean ball data
-        ball_data = ball_data.drop(columns=["non_striker", "fielders_involved", "wicket_kind", "player_out"], errors='ignore')
-        bool_cols = ["is_wide_ball", "is_no_ball", "is_leg_bye", "is_bye", "is_penalty", "is_super_over", "is_wicket"]
-        for col in bool_cols:
-            if col in ball_data.columns:
-                ball_data[col] = ball_data[col].astype(int)
-        
-        # Normalize team names for ball data
-        for col in ["team_batting", "team_bowling"]:
-            if col in ball_data.columns:
-                ball_data[col] = ball_data[col].apply(normalize_team_balls)
-        
-        # Remove rows with None values
-        ball_data = ball_data.dropna()
-        
-        # Sort ball data
-        ball_data = ball_data.sort_values(["season_id", "match_id", "innings", "over_number", "ball_number"])
-        
-        # Summarize match data from ball-by-ball
-        summary_df = summarize_match_data(ball_data)
-        final_balls_df = pivot_match_data(summary_df)
-
-        final_balls_df = final_balls_df[final_balls_df['season_id'] != 2025 or final_balls_df['season_id'] != "2025"]
-        
-        # Merge match and ball data - we need to implement this properly without encoders
-        # Drop team columns from ball data that conflict with match data
-        final_balls_clean = final_balls_df.drop(columns=['team1','team2'], errors='ignore')
-        
-        # Merge on match_id
-        merged_df = match_data.merge(final_balls_clean, on='match_id', how='left', sort=False)
-        
+        merged_df = get_dataset().historical_data
+        if merged_df is None:
+            raise FileNotFoundError("data/ball_by_ball_data.csv")
         return merged_df
         
     except Exception as e:
         print(f"Error loading data: {e}")
         return None
 
-# Load historical data
-historical_data = load_and_process_data()
+# Populated by load_service(), which runs in the background at startup
+historical_data = None
+match_state = None      # rolling feature state after the full history; POST /matches keeps it current
+feature_store = None
+live_model = None       # in-play win-probability tables for /predict/live
+stats_calculator = None
+active_model: Optional[LoadedModel] = None   # swapped whole on reload; requests read it once
+
+startup_status = StartupStatus()
+
+# /predict responses keyed by (team1, team2, venue, toss_winner, toss_decision, model_version, data_version)
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "4096"))
+# seconds; unset keeps entries until evicted or invalidated
+PREDICTION_CACHE_TTL = float(os.environ["PREDICTION_CACHE_TTL"]) if os.environ.get("PREDICTION_CACHE_TTL") else None
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL)
+data_version = None     # source fingerprint, plus the state generation once POST /matches has run
+
+# Versioned model artifacts; each worker polls models/ACTIVE and hot-swaps when it changes
+MODEL_REGISTRY_DIR = "models"
+MODEL_WATCH_INTERVAL = float(os.environ.get("MODEL_WATCH_INTERVAL", "5"))   # seconds; 0 disables the watcher
+ADMIN_TOKEN = os.environ.get("ML_ADMIN_TOKEN")     # required in X-Admin-Token for /models/*; unset disables them
+model_registry = ModelRegistry(MODEL_REGISTRY_DIR)
+model_watcher = None
+model_swap_lock = threading.Lock()
+state_update_lock = threading.Lock()    # POST /matches state updates vs. feature store writes
+
+# Feature and model work runs on a bounded pool; requests beyond the queue are shed
+EXECUTOR_WORKERS = int(os.environ.get("EXECUTOR_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXECUTOR_MAX_QUEUE = int(os.environ.get("EXECUTOR_MAX_QUEUE", "64"))
+EXECUTOR_QUEUE_TIMEOUT = float(os.environ.get("EXECUTOR_QUEUE_TIMEOUT", "2.0"))   # seconds a request may wait for a worker before a 503
+executor = BoundedExecutor(EXECUTOR_WORKERS, EXECUTOR_MAX_QUEUE, EXECUTOR_QUEUE_TIMEOUT)
+
+# /simulate chunks run on one process pool, started with the service and shared by every request
+SIMULATION_WORKERS = int(os.environ.get("SIMULATION_WORKERS", str(min(4, os.cpu_count() or 1))))
+simulation_executor = None
 
 def create_team_venue_mappings():
     """Create mappings for teams and venues from UI IDs to model format"""
-    # Team mappings (UI ID to normalized name)
-    team_mapping = {
-        "csk": "Chennai Super Kings",
-        "mi": "Mumbai Indians", 
-        "rcb": "Royal Challengers Bengaluru",
-        "kkr": "Kolkata Knight Riders",
-        "dc": "Delhi Capitals",
-        "rr": "Rajasthan Royals",
-        "pbks": "Punjab Kings",
-        "srh": "Sunrisers Hyderabad",
-        "gt": "Gujarat Titans",
-        "lsg": "Lucknow Super Giants"
-    }
-    
-    # Venue mappings (simplified - you may need to expand this)
-    venue_mapping = {
-        "wankhede": "Wankhede Stadium",
-        "eden": "Eden Gardens",
-        "chinnaswamy": "M Chinnaswamy Stadium",
-        "chepauk": "MA Chidambaram Stadium, Chepauk",
-        "kotla": "Feroz Shah Kotla",
-        "sawai": "Sawai Mansingh Stadium",
-        "mohali": "Punjab Cricket Association Stadium, Mohali",
-        "uppal": "Rajiv Gandhi International Stadium, Uppal",
-        "narendra": "Narendra Modi Stadium",
-        "ekana": "Bharat Ratna Shri Atal Bihari Vajpayee Ekana Cricket Stadium"
-    }
+    # Team and venue mappings (UI ID to normalized name) from the shared normalization tables
+    team_mapping = dict(TEAM_IDS)
+    venue_mapping = dict(VENUE_IDS)
     
     return team_mapping, venue_mapping
 
 team_mapping, venue_mapping = create_team_venue_mappings()
 
-def compute_matchup_features(team1_name, team2_name, venue_name, toss_winner_name, toss_decision, historical_data):
+def compute_matchup_features(team1_name, team2_name, venue_name, toss_winner_name, toss_decision, match_state):
     """
     Compute all matchup features for a given pair of teams/venue/toss setup.
-    Uses rolling + aggregated stats functions instead of dummy values.
+    The fixture is treated as the next match after the full history, so the
+    features are the rolling state's pre-match snapshot, exactly as every
+    training row was built.
     """
     try:
-        # Step 1: Filter historical data for these two teams
-        matchup_data = historical_data[
-            ((historical_data['team1'] == team1_name) & (historical_data['team2'] == team2_name)) |
-            ((historical_data['team1'] == team2_name) & (historical_data['team2'] == team1_name))
-        ].copy()
-
-        if matchup_data.empty:
-            print("⚠️ No historical matches found for this matchup. Returning defaults.")
+        if match_state is None or match_state.match_count == 0:
+            print("⚠️ No historical matches loaded. Returning defaults.")
             return {f: 0.5 for f in selected_features}
 
-        # Step 2: Run the feature engineering pipeline
-        matchup_data = calculate_rolling_stats(matchup_data)
-        summary = summarize_match_data(matchup_data)
-        pivoted = pivot_match_data(summary)
-        matchup_data = compute_rolling_features_balls(pivoted)
-
-        data_team_toss = calculate_toss_stats(matchup_data)
-        matchup_data = pd.concat([matchup_data, data_team_toss], axis=1)
-        matchup_data = add_head_to_head_toss_advantage(matchup_data)
-        matchup_data = add_chasing_defending_strength(matchup_data)
-        matchup_data = add_diff_features(matchup_data)
-        matchup_data = add_venue_features(matchup_data)
+        with stage("compute_matchup_features"):
+            return match_state.features(team1_name, team2_name, venue_name, toss_winner_name, toss_decision)
 
-        # Step 3: Take the last row (latest match-based stats)
-        latest_features = matchup_data.iloc[-1].to_dict()
+    except Exception as e:
+        print(f"❌ Error in compute_matchup_features: {e}")
+        return {f: 0.5 for f in selected_features}
 
-        # Step 4: Add toss_decision one-hot encoding
-        latest_features['toss_decision_bat'] = 1 if toss_decision == "bat" else 0
-        latest_features['toss_decision_field'] = 1 if toss_decision == "field" else 0
 
-        # Step 5: Extract only selected_features
-        feature_vector = {f: latest_features.get(f, 0) for f in selected_features}
+def build_feature_store():
+    """Load (or build and persist) the precomputed matchup feature store"""
+    if match_state is None:
+        return None
 
-        return feature_vector
+    def matchup_vector(team1, team2, venue, toss_winner, toss_decision):
+        return compute_matchup_features(team1, team2, venue, toss_winner, toss_decision, match_state)
 
+    try:
+        return load_or_build_feature_store(matchup_vector, team_mapping.values(), unique_names(venue_mapping.values()),
+                                           compute_many=match_state.features_many)
     except Exception as e:
-        print(f"❌ Error in compute_matchup_features: {e}")
-        return {f: 0.5 for f in selected_features}
+        print(f"⚠️ Feature store unavailable, falling back to per-request features: {e}")
+        return None
+
+
+
+def normalize_fixture(raw_input: dict):
+    """(team1, team2, venue, toss_winner, toss_decision) in model format, or None for unknown IDs"""
+    # Map UI IDs to model format
+    team1_name = team_mapping.get(raw_input.get('team1Id', '').lower())
+    team2_name = team_mapping.get(raw_input.get('team2Id', '').lower())
+    venue_name = venue_mapping.get(raw_input.get('venueId', '').lower())
+    toss_winner_name = team_mapping.get(raw_input.get('tossWinner', '').lower())
+    toss_decision = raw_input.get('tossDecision', 'bat').lower()
+
+    if not all([team1_name, team2_name, venue_name, toss_winner_name]):
+        return None
+    return team1_name, team2_name, venue_name, toss_winner_name, toss_decision
+
+def storable_matchup(key) -> bool:
+    """Whether a normalized fixture may be written to the feature store (keeps junk input from growing it)"""
+    team1_name, team2_name, _, toss_winner_name, toss_decision = key
+    return (team1_name != team2_name and toss_winner_name in (team1_name, team2_name)
+            and toss_decision in ("bat", "field"))
+
+def resolve_matchup(raw_input: dict):
+    """
+    Map one UI request to its feature vector (selected_features order) and display factors.
+    Raises ValueError for unknown team or venue IDs.
+    """
+    with stage("normalize_fixture"):
+        key = normalize_fixture(raw_input)
+    if key is None:
+        raise ValueError("Invalid team or venue IDs provided")
+
+    # Precomputed matchups are a dictionary lookup; misses (e.g. after POST /matches
+    # invalidated them) are computed from the rolling state and stored again
+    with stage("feature_store_lookup"):
+        vector = feature_store.get(*key) if feature_store is not None else None
+    if feature_store is not None:
+        metrics.inc("ml_feature_store_lookups_total", result="miss" if vector is None else "hit")
+    if vector is None:
+        generation = match_state.generation if match_state is not None else None
+        matchup_features = compute_matchup_features(*key, match_state)
+        if matchup_features is None:
+            raise ValueError("Failed to compute matchup features")
+        if feature_store is not None and storable_matchup(key):
+            # A match folded in while computing may already have invalidated this key: don't store a stale vector
+            with state_update_lock:
+                if match_state is None or match_state.generation == generation:
+                    feature_store.put(key, matchup_features)
+        vector = np.array([float(matchup_features.get(f, 0.0)) for f in selected_features])
+
+    features = dict(zip(selected_features, vector))
+
+    # Extract factors from the computed features
+    factors = {
+        "venueAdvantage": float(features.get('venue_winrate_diff', 0)),
+        "tossDecision": float(features.get('toss_match_winrate_diff', 0)),
+        "recentForm": float(features.get('recent_form_diff', 0)),
+        "headToHead": float(features.get('head_to_head_winrate', 0.5))
+    }
+
+    # Convert to percentages and cap values
+    factors = {
+        "venueAdvantage": max(-50, min(50, factors["venueAdvantage"] * 100)),
+        "tossDecision": max(-30, min(30, factors["tossDecision"] * 100)),
+        "recentForm": max(-40, min(40, factors["recentForm"] * 100)),
+        "headToHead": max(-60, min(60, (factors["headToHead"] - 0.5) * 200))  # Center around 0.5 and scale to percentage
+    }
 
+    return vector, factors
 
 def transform_input(raw_input: dict):
     """Transform user input from UI into features for ML model"""
     try:
-        # Map UI IDs to model format
-        team1_name = team_mapping.get(raw_input.get('team1Id', '').lower())
-        team2_name = team_mapping.get(raw_input.get('team2Id', '').lower())
-        venue_name = venue_mapping.get(raw_input.get('venueId', '').lower())
-        toss_winner_name = team_mapping.get(raw_input.get('tossWinner', '').lower())
-        toss_decision = raw_input.get('tossDecision', 'bat').lower()
-        
-        if not all([team1_name, team2_name, venue_name, toss_winner_name]):
-            raise ValueError("Invalid team or venue IDs provided")
-        
         # Use targeted feature computation instead of full pipeline
         if historical_data is not None:
-            # Compute features specific to this matchup
-            matchup_features = compute_matchup_features(
-                team1_name, team2_name, venue_name, toss_winner_name, toss_decision, historical_data
-            )
-            
-            if matchup_features is None:
-                raise ValueError("Failed to compute matchup features")
-                
-            # Create DataFrame with features in correct order
-            feature_data = pd.DataFrame([matchup_features])
-            
-            # Extract factors from the computed features
-            factors = {
-                "venueAdvantage": float(matchup_features.get('venue_winrate_diff', 0)),
-                "tossDecision": float(matchup_features.get('toss_match_winrate_diff', 0)),
-                "recentForm": float(matchup_features.get('recent_form_diff', 0)),
-                "headToHead": float(matchup_features.get('head_to_head_winrate', 0.5))
-            }
-            
-            # Convert to percentages and cap values
-            factors = {
-                "venueAdvantage": max(-50, min(50, factors["venueAdvantage"] * 100)),
-                "tossDecision": max(-30, min(30, factors["tossDecision"] * 100)),
-                "recentForm": max(-40, min(40, factors["recentForm"] * 100)),
-                "headToHead": max(-60, min(60, (factors["headToHead"] - 0.5) * 200))  # Center around 0.5 and scale to percentage
-            }
-            
-            # Ensure we have all required features
-            missing_features = [f for f in selected_features if f not in feature_data.columns]
-            if missing_features:
-                print(f"⚠️ Warning: {len(missing_features)} features missing from targeted computation: {missing_features[:3]}...")
-                for feature in missing_features:
-                    feature_data[feature] = 0.0
-            
-            # Select features in the correct order
-            feature_data = feature_data[selected_features]
-            
+            with stage("transform_input"):
+                vector, factors = resolve_matchup(raw_input)
+
+                # Create DataFrame with features in correct order
+                feature_data = pd.DataFrame([vector], columns=selected_features)
+
             print(f"✅ Targeted computation: {len(selected_features)}/{len(selected_features)} features")
             print(f"🎯 Factors: Venue:{factors['venueAdvantage']:.1f}%, H2H:{factors['headToHead']:.1f}%, Form:{factors['recentForm']:.1f}%, Toss:{factors['tossDecision']:.1f}%")
             
@@ -247,7 +223,153 @@ def transform_input(raw_input: dict):
         factors = {"venueAdvantage": 0, "tossDecision": 0, "recentForm": 0, "headToHead": 0}
         return dummy_features, factors
 
-app = FastAPI(title="Cricket ML Service (FastAPI)")
+def fixture_win_probabilities(fixtures: List[tuple]) -> np.ndarray:
+    """
+    P(team1 wins) for (team1Id, team2Id, venueId) fixtures with the toss still to come:
+    the mean over both toss winners and decisions, scored in one predict_proba call.
+    """
+    rows = []
+    for team1_id, team2_id, venue_id in fixtures:
+        for toss_winner in (team1_id, team2_id):
+            for decision in ("bat", "field"):
+                vector, _ = resolve_matchup({"team1Id": team1_id, "team2Id": team2_id, "venueId": venue_id,
+                                             "tossWinner": toss_winner, "tossDecision": decision})
+                rows.append(vector)
+    with stage("model_predict_proba"):
+        probas = active_model.model.predict_proba(pd.DataFrame(np.vstack(rows), columns=selected_features))[:, 1]
+    metrics.inc("ml_model_rows_total", len(rows))
+    return probas.reshape(len(fixtures), 4).mean(axis=1)
+
+def format_prediction(team1_id: str, team2_id: str, proba, factors: Dict[str, float],
+                      model_version: Optional[str] = None) -> Dict[str, Any]:
+    """PredictionResponse body from a [prob_class0, prob_class1] row"""
+    # NOTE: assume positive class (class 1) corresponds to TEAM1 winning.
+    # If your training label was different, adjust these indices accordingly.
+    team1_prob = round(float(proba[1] * 100), 1)
+    team2_prob = round(float(proba[0] * 100), 1)
+
+    predicted_winner = team1_id if team1_prob > team2_prob else team2_id
+    top_prob = max(team1_prob, team2_prob)
+    if top_prob > 65:
+        margin = "15-25 runs"
+    elif top_prob > 57:
+        margin = "5-15 runs"
+    else:
+        margin = "Close match"
+
+    return {
+        "team1WinProbability": team1_prob,
+        "team2WinProbability": team2_prob,
+        "predictedWinner": predicted_winner,
+        "expectedMargin": f"{'Team 1' if predicted_winner == team1_id else 'Team 2'} expected to win by {margin}",
+        "factors": factors,
+        "modelVersion": model_version,
+    }
+
+# Bundled model/encoders, published as the first registry version when the registry is empty
+MODEL_PATH = "catboost_model.cbm"            # CatBoost native format, exported from the pickle if missing
+MODEL_PICKLE_PATH = "catboost_model.pkl"     # reference for the load self-check
+MODEL_CHECK_SAMPLES = 256                    # feature-store vectors scored by the self-check
+ENCODERS_PATH = "label_encoders.pkl"         # optional
+MAX_BATCH_SIZE = 1000
+MAX_SIMULATIONS = 1_000_000
+
+def load_registry_model(version: str) -> LoadedModel:
+    """Load one registry version, self-checked against its pickle (or its native model) on feature-store rows"""
+    samples = None
+    if feature_store is not None and len(feature_store):
+        samples = np.vstack(list(feature_store.vectors.values())[:MODEL_CHECK_SAMPLES])
+    model_path = model_registry.artifact(version, MODEL_FILE)
+    if model_path is None:
+        raise FileNotFoundError(f"{version}/{MODEL_FILE}")
+    model = load_model(model_path, model_registry.artifact(version, REFERENCE_FILE), selected_features, samples)
+
+    encoders_path = model_registry.artifact(version, ENCODERS_FILE)
+    try:
+        label_encoders = joblib.load(encoders_path) if encoders_path else None
+    except Exception:
+        label_encoders = None
+    return LoadedModel(version, model, label_encoders)
+
+def activate_model(version: str) -> LoadedModel:
+    """
+    Load `version` and make it the active model. The current model keeps serving
+    until the new one has loaded and passed its self-check; a failed load leaves it in place.
+    """
+    global active_model
+    with model_swap_lock:
+        if active_model is not None and active_model.version == version:
+            return active_model
+        loaded = load_registry_model(version)
+        previous = active_model.version if active_model is not None else None
+        active_model = loaded
+        # Cached responses belong to the previous model
+        dropped = prediction_cache.clear()
+    if previous is not None:
+        print(f"🔁 Active model {previous} -> {version} ({dropped} cached predictions dropped)")
+    return loaded
+
+def load_service():
+    """Load data, rolling state, feature store and model, recording how long each phase takes"""
+    global historical_data, match_state, feature_store, live_model, stats_calculator, model_watcher
+    global data_version
+    try:
+        with startup_status.phase("data"):
+            historical_data = load_and_process_data()
+        with startup_status.phase("stats"):
+            stats_calculator = HistoricalStatsCalculator()
+        with startup_status.phase("match_state"):
+            match_state = MatchState.from_history(historical_data) if historical_data is not None else None
+        with startup_status.phase("feature_store"):
+            feature_store = build_feature_store()
+        with startup_status.phase("live_model"):
+            ball_data = get_dataset().ball_data
+            live_model = LiveWinModel.from_balls(ball_data) if ball_data is not None else None
+        with startup_status.phase("model"):
+            try:
+                if not os.path.exists(MODEL_PATH) and os.path.exists(MODEL_PICKLE_PATH):
+                    load_model(MODEL_PATH, MODEL_PICKLE_PATH, selected_features)   # exports the .cbm
+                version = model_registry.ensure_active(MODEL_PATH, ENCODERS_PATH, MODEL_PICKLE_PATH)
+                activate_model(version)
+            except Exception as e:
+                raise RuntimeError(f"Failed to load model from '{MODEL_REGISTRY_DIR}': {e}")
+        data_version = feature_store.fingerprint[:12] if feature_store is not None else source_fingerprint()[:12]
+        # Cached responses belong to the previous model/data
+        prediction_cache.clear()
+        model_watcher = RegistryWatcher(model_registry, activate_model, MODEL_WATCH_INTERVAL)
+        model_watcher.start()
+        startup_status.mark_ready()
+    except Exception as e:
+        startup_status.mark_failed(e)
+
+def require_ready():
+    if not startup_status.ready.is_set():
+        raise HTTPException(status_code=503, detail="Service is still loading" if startup_status.error is None
+                            else f"Service failed to load: {startup_status.error}")
+
+async def offload(fn, *args):
+    """Run blocking work on the bounded executor, mapping overload to 429 and queue timeouts to 503"""
+    try:
+        return await executor.run(fn, *args)
+    except ExecutorOverloaded as e:
+        raise HTTPException(status_code=429, detail=f"Too many requests: {e}", headers={"Retry-After": "1"})
+    except ExecutorTimeout as e:
+        raise HTTPException(status_code=503, detail=f"Service busy: {e}", headers={"Retry-After": "1"})
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global simulation_executor
+    simulation_executor = simulation_pool(SIMULATION_WORKERS)
+    # Load in the background so /health answers while the data and model load
+    threading.Thread(target=load_service, name="ml-service-loader", daemon=True).start()
+    yield
+    if model_watcher is not None:
+        model_watcher.stop()
+    executor.shutdown()
+    if simulation_executor is not None:
+        simulation_executor.shutdown(cancel_futures=True)
+
+app = FastAPI(title="Cricket ML Service (FastAPI)", lifespan=lifespan)
 
 # allow Node server (and later other deploys) to call this
 app.add_middleware(
@@ -258,20 +380,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Paths to model/encoders
-MODEL_PATH = "catboost_model.pkl"            # change if different filename
-ENCODERS_PATH = "label_encoders.pkl"         # optional
-
-# Load model at startup
-try:
-    model = joblib.load(MODEL_PATH)
-except Exception as e:
-    raise RuntimeError(f"Failed to load model at '{MODEL_PATH}': {e}")
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Request latency per route template (not raw path, so IDs don't explode the label set)"""
+    if not metrics.enabled:
+        return await call_next(request)
+    start = time.perf_counter()
+    response = await call_next(request)
+    route = request.scope.get("route")
+    metrics.observe("ml_request_duration_seconds", time.perf_counter() - start,
+                    route=getattr(route, "path", "unmatched"), method=request.method,
+                    status=f"{response.status_code // 100}xx")
+    return response
 
-try:
-    label_encoders = joblib.load(ENCODERS_PATH)
-except Exception:
-    label_encoders = None
+def collect_service_metrics():
+    """Gauges and counters kept by the cache, executor and loader, read at scrape time"""
+    cache = prediction_cache.stats()
+    pool = executor.stats()
+    status = startup_status.snapshot()
+    return [
+        ("ml_prediction_cache_requests_total", "counter", "Prediction cache lookups by result",
+         [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])]),
+        ("ml_prediction_cache_hit_ratio", "gauge", "Prediction cache hits / lookups", [({}, cache["hitRate"])]),
+        ("ml_prediction_cache_entries", "gauge", "Prediction cache size", [({}, cache["size"])]),
+        ("ml_prediction_cache_evictions_total", "counter", "LRU evictions", [({}, cache["evictions"])]),
+        ("ml_executor_running", "gauge", "Requests running on the worker pool", [({}, pool["running"])]),
+        ("ml_executor_queued", "gauge", "Requests waiting for a worker", [({}, pool["queued"])]),
+        ("ml_executor_requests_total", "counter", "Executor requests by outcome",
+         [({"outcome": k}, pool[k]) for k in ("completed", "failed", "rejected", "timedOut")]),
+        ("ml_feature_store_entries", "gauge", "Precomputed matchup vectors",
+         [({}, len(feature_store) if feature_store is not None else 0)]),
+        ("ml_service_ready", "gauge", "1 once data and model are loaded", [({}, status["ready"])]),
+        ("ml_startup_phase_seconds", "gauge", "Duration of each startup phase",
+         [({"phase": name}, seconds) for name, seconds in status["phaseSeconds"].items()]),
+    ]
+
+metrics.register_collector(collect_service_metrics)
 
 # ---- Request/Response schemas ----
 class PredictionRequest(BaseModel):
@@ -287,6 +431,55 @@ class PredictionResponse(BaseModel):
     predictedWinner: str
     expectedMargin: str
     factors: Dict[str, float]
+    modelVersion: Optional[str] = None
+
+class BatchPredictionRequest(BaseModel):
+    predictions: List[PredictionRequest]
+
+class BatchPredictionResult(BaseModel):
+    index: int
+    prediction: Optional[PredictionResponse] = None
+    error: Optional[str] = None
+
+class BatchPredictionResponse(BaseModel):
+    results: List[BatchPredictionResult]
+
+class InningsState(BaseModel):
+    runs: int
+    wickets: int
+    ballsBowled: int  # legal deliveries bowled in the innings
+
+class LivePredictionRequest(BaseModel):
+    team1Id: str
+    team2Id: str
+    battingTeamId: str
+    innings: int = 1
+    target: Optional[int] = None  # second innings: first-innings total + 1
+    states: List[InningsState]
+    # Pre-match prior: selected_features values, or the fixture below to look them up
+    features: Optional[Dict[str, float]] = None
+    venueId: Optional[str] = None
+    tossWinner: Optional[str] = None
+    tossDecision: Optional[str] = None
+
+class Fixture(BaseModel):
+    team1Id: str
+    team2Id: str
+    venueId: str
+
+class SimulationRequest(BaseModel):
+    fixtures: List[Fixture]
+    simulations: int = 100_000
+    seed: Optional[int] = None
+    playoffVenueId: str = "narendra"
+
+class TeamSimulationResult(BaseModel):
+    teamId: str
+    expectedWins: float
+    playoffProbability: float
+    topTwoProbability: float
+    finalProbability: float
+    titleProbability: float
 
 class HeadToHeadResponse(BaseModel):
     team1Id: str
@@ -320,66 +513,345 @@ class VenueDetailsResponse(BaseModel):
     boundaryPercentage: float
     sixRate: float
 
-# Health endpoint
+class MatchResultRequest(BaseModel):
+    team1Id: str
+    team2Id: str
+    venueId: str
+    tossWinner: str
+    tossDecision: str
+    winner: str
+    matchType: str = "League"
+    targetRuns: Optional[float] = None
+    # Optional innings summaries keyed like summarize_match_data columns (total_runs, pp_runs, ...)
+    innings1: Optional[Dict[str, float]] = None
+    innings2: Optional[Dict[str, float]] = None
+
+class MatchResultResponse(BaseModel):
+    matchesInState: int
+    invalidatedPredictions: int
+
+# Health endpoint (liveness: answers as soon as the process is up)
 @app.get("/health")
-def health():
+async def health():
     return {"status": "ok"}
 
+# Prediction cache counters
+@app.get("/cache/stats")
+async def cache_stats():
+    return prediction_cache.stats()
+
+# Executor queue depth and shedding counters
+@app.get("/executor/stats")
+async def executor_stats():
+    return executor.stats()
+
+# Prometheus scrape endpoint: stage/request histograms, cache and executor counters
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ---- Model registry admin ----
+def require_admin(token: Optional[str]):
+    # Fail closed: without a configured token nobody may swap models
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ML_ADMIN_TOKEN is not set)")
+    if token is None or not secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+def model_registry_status() -> Dict[str, Any]:
+    active = active_model
+    return {
+        "active": active.version if active is not None else None,
+        "loadedAt": active.loaded_at if active is not None else None,
+        "fastPath": bool(active is not None and active.model.fast_path),
+        "versions": [dict(model_registry.metadata(v), version=v) for v in model_registry.versions()],
+    }
+
+def swap_model_sync(version: Optional[str]):
+    """Activate `version` (or re-read models/ACTIVE) in this worker; other workers follow via their watcher"""
+    publish = version is not None
+    if version is None:
+        version = model_registry.active_version()
+    if version is None or version not in model_registry.versions():
+        raise HTTPException(status_code=404, detail=f"Unknown model version {version}")
+    try:
+        activate_model(version)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model {version} failed to load, keeping the current model: {e}")
+    if publish:
+        # Only point the other workers at a version that loaded here
+        model_registry.activate(version)
+    return model_registry_status()
+
+@app.get("/models")
+async def list_models(x_admin_token: Optional[str] = Header(default=None)):
+    require_admin(x_admin_token)
+    return model_registry_status()
+
+@app.post("/models/reload")
+async def reload_model(x_admin_token: Optional[str] = Header(default=None)):
+    """Load whatever models/ACTIVE names now (e.g. after a deploy script activated a version)"""
+    require_admin(x_admin_token)
+    require_ready()
+    return await offload(swap_model_sync, None)
+
+@app.post("/models/{version}/activate")
+async def activate_model_version(version: str, x_admin_token: Optional[str] = Header(default=None)):
+    require_admin(x_admin_token)
+    require_ready()
+    return await offload(swap_model_sync, version)
+
+# Readiness endpoint: 200 once data and model are loaded, 503 until then; includes load timings
+@app.get("/ready")
+async def ready():
+    status = startup_status.snapshot()
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
 @app.post("/predict", response_model=PredictionResponse)
-def predict(req: PredictionRequest):
-    # 1) Feature engineering
+async def predict(req: PredictionRequest):
+    require_ready()
+    return await offload(predict_sync, req)
+
+def predict_sync(req: PredictionRequest):
+    active = active_model
     raw = req.dict()
+    fixture = normalize_fixture(raw)
+    cacheable = fixture is not None and fixture[0] != fixture[1] and historical_data is not None
+    cache_key = (*fixture, active.version, data_version) if cacheable else None
+    if cache_key is not None:
+        with stage("prediction_cache_lookup"):
+            cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            return dict(cached, predictedWinner=req.team1Id if cached["predictedWinner"] == fixture[0] else req.team2Id)
+
+    # 1) Feature engineering: the matchup vector straight from the store/state (no DataFrame)
     try:
-        out = transform_input(raw)
-        # transform_input can return either DataFrame or (DataFrame, factors_dict)
-        if isinstance(out, tuple) and len(out) == 2:
-            X_df, factors = out
-        else:
-            X_df = out
-            factors = {
-                "venueAdvantage": 0,
-                "tossDecision": 0,
-                "recentForm": 0,
-                "headToHead": 0
-            }
-        if not isinstance(X_df, pd.DataFrame):
-            raise ValueError("transform_input must return a pandas.DataFrame (or (DataFrame, dict))")
+        if historical_data is None:
+            raise ValueError("Historical data not loaded")
+        vector, factors = resolve_matchup(raw)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Feature engineering failed: {e}")
+        # Same fallback as transform_input: neutral features and factors
+        print(f"Error in predict feature engineering: {e}")
+        vector = np.zeros(len(selected_features))
+        factors = {"venueAdvantage": 0, "tossDecision": 0, "recentForm": 0, "headToHead": 0}
 
-    # 2) Prediction: ensure X_df has expected columns and shape
+    # 2) Prediction: one row through the model's preallocated single-row path
     try:
-        proba = model.predict_proba(X_df)[0]  # [prob_class0, prob_class1]
+        with stage("model_predict_proba"):
+            team1_prob = active.model.predict_row(vector)
+        metrics.inc("ml_model_rows_total", 1)
+        proba = (1.0 - team1_prob, team1_prob)  # [prob_class0, prob_class1]
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Model prediction failed: {e}")
 
-    # NOTE: assume positive class (class 1) corresponds to TEAM1 winning.
-    # If your training label was different, adjust these indices accordingly.
-    team1_prob = round(float(proba[1] * 100), 1)
-    team2_prob = round(float(proba[0] * 100), 1)
+    response = format_prediction(req.team1Id, req.team2Id, proba, factors, active.version)
+    if cache_key is not None:
+        # Stored with the winner as a team name: differently cased IDs share the entry
+        prediction_cache.put(cache_key, dict(response, predictedWinner=fixture[0] if response["predictedWinner"] == req.team1Id else fixture[1]))
+    return response
 
-    predicted_winner = req.team1Id if team1_prob > team2_prob else req.team2Id
-    top_prob = max(team1_prob, team2_prob)
-    if top_prob > 65:
-        margin = "15-25 runs"
-    elif top_prob > 57:
-        margin = "5-15 runs"
-    else:
-        margin = "Close match"
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+async def predict_batch(req: BatchPredictionRequest):
+    """Score many fixtures with one predict_proba call; invalid items get an error instead of failing the batch"""
+    require_ready()
+    return await offload(predict_batch_sync, req)
+
+def predict_batch_sync(req: BatchPredictionRequest):
+    if len(req.predictions) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_SIZE} predictions per batch")
+
+    active = active_model
+    results = [{"index": i} for i in range(len(req.predictions))]
+    rows, factors, scored = [], [], []
+    for i, item in enumerate(req.predictions):
+        try:
+            if historical_data is None:
+                raise ValueError("Historical data not loaded")
+            vector, item_factors = resolve_matchup(item.dict())
+        except Exception as e:
+            results[i]["error"] = f"Feature engineering failed: {e}"
+            continue
+        rows.append(vector)
+        factors.append(item_factors)
+        scored.append(i)
+
+    if rows:
+        # One matrix in selected_features order, one model call for the whole batch
+        X = pd.DataFrame(np.vstack(rows), columns=selected_features)
+        try:
+            with stage("model_predict_proba"):
+                probas = active.model.predict_proba(X)
+            metrics.inc("ml_model_rows_total", len(X))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Model prediction failed: {e}")
+        for i, proba, item_factors in zip(scored, probas, factors):
+            item = req.predictions[i]
+            results[i]["prediction"] = format_prediction(item.team1Id, item.team2Id, proba, item_factors, active.version)
+
+    return {"results": results}
+
+@app.post("/predict/live", response_model=List[float])
+async def predict_live(req: LivePredictionRequest):
+    """Team 1 win probability (%) after each innings state, blending the pre-match prediction with the live tables"""
+    require_ready()
+    return await offload(predict_live_sync, req)
+
+def predict_live_sync(req: LivePredictionRequest):
+    if live_model is None:
+        raise HTTPException(status_code=503, detail="Ball-by-ball data not loaded")
+
+    team1_id, team2_id, batting_id = req.team1Id.lower(), req.team2Id.lower(), req.battingTeamId.lower()
+    if batting_id not in (team1_id, team2_id):
+        raise HTTPException(status_code=400, detail="battingTeamId must be team1Id or team2Id")
+    if req.innings not in (1, 2):
+        raise HTTPException(status_code=400, detail="innings must be 1 or 2")
+    if req.innings == 2 and req.target is None:
+        raise HTTPException(status_code=400, detail="target is required in the second innings")
+    if not req.states:
+        return []
+
+    runs = np.array([st.runs for st in req.states])
+    wickets = np.array([st.wickets for st in req.states])
+    balls = np.array([st.ballsBowled for st in req.states])
+    if (runs < 0).any() or ((wickets < 0) | (wickets > WICKETS)).any() or ((balls < 0) | (balls > INNINGS_BALLS)).any():
+        raise HTTPException(status_code=400, detail=f"states need runs >= 0, 0-{WICKETS} wickets and 0-{INNINGS_BALLS} balls")
+
+    # Pre-match probability of team 1 winning
+    try:
+        if req.features is not None:
+            vector = np.array([float(req.features.get(f, 0.0)) for f in selected_features])
+        else:
+            vector, _ = resolve_matchup({"team1Id": req.team1Id, "team2Id": req.team2Id, "venueId": req.venueId or "",
+                                         "tossWinner": req.tossWinner or "", "tossDecision": req.tossDecision or "bat"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        with stage("model_predict_proba"):
+            prior = active_model.model.predict_row(vector)
+        metrics.inc("ml_model_rows_total", 1)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model prediction failed: {e}")
 
-    response = {
-        "team1WinProbability": team1_prob,
-        "team2WinProbability": team2_prob,
-        "predictedWinner": predicted_winner,
-        "expectedMargin": f"{'Team 1' if predicted_winner == req.team1Id else 'Team 2'} expected to win by {margin}",
-        "factors": factors
+    with stage("live_win_probability"):
+        batting = live_model.batting_win_probability(req.innings, runs, wickets, balls, target=req.target)
+    team1_batting = batting_id == team1_id
+    team1_state = batting if team1_batting else 1.0 - batting
+
+    # Team 1's state-model probability before the first ball depends on whether it bats first
+    start = live_model.start_probability()
+    team1_bats_first = team1_batting == (req.innings == 1)
+    team1_start = start if team1_bats_first else 1.0 - start
+
+    match_balls_left = INNINGS_BALLS - balls + (INNINGS_BALLS if req.innings == 1 else 0)
+    team1_prob = blend_with_prior(team1_state, prior, team1_start, match_balls_left)
+    return [round(float(p) * 100, 1) for p in team1_prob]
+
+@app.post("/simulate", response_model=List[TeamSimulationResult])
+async def simulate_season(req: SimulationRequest):
+    """Monte Carlo league + playoff simulation over a fixture list; qualification and title odds per team"""
+    require_ready()
+    return await offload(simulate_season_sync, req)
+
+def simulate_season_sync(req: SimulationRequest):
+    if historical_data is None:
+        raise HTTPException(status_code=503, detail="Historical data not loaded")
+    if not 0 < req.simulations <= MAX_SIMULATIONS:
+        raise HTTPException(status_code=400, detail=f"simulations must be between 1 and {MAX_SIMULATIONS}")
+
+    fixtures = [(f.team1Id.lower(), f.team2Id.lower(), f.venueId.lower()) for f in req.fixtures]
+    if any(a == b for a, b, _ in fixtures):
+        raise HTTPException(status_code=400, detail="team1Id and team2Id must differ")
+    teams = sorted({t for a, b, _ in fixtures for t in (a, b)})
+    playoff_venue = req.playoffVenueId.lower()
+
+    # Every league fixture and every ordered playoff pairing, scored together
+    pairings = [(a, b, playoff_venue) for a in teams for b in teams if a != b]
+    try:
+        probs = fixture_win_probabilities(fixtures + pairings)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Model prediction failed: {e}")
+
+    fixture_probs = probs[:len(fixtures)]
+    # Playoff odds don't depend on which side is listed first: average both orientations
+    as_team1 = pair_probability_matrix(teams, {(a, b): p for (a, b, _), p in zip(pairings, probs[len(fixtures):])})
+    pair_probs = (as_team1 + (1.0 - as_team1.T)) / 2
+
+    try:
+        summary = simulate_tournament(teams, [(a, b) for a, b, _ in fixtures], fixture_probs, pair_probs,
+                                      simulations=req.simulations, seed=req.seed, workers=1,
+                                      pool=simulation_executor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return [dict(row, teamId=row.pop("team")) for row in summary]
+
+@app.post("/matches", response_model=MatchResultResponse)
+async def add_match_result(req: MatchResultRequest):
+    """Fold one completed match into the rolling state and drop the predictions it affects"""
+    require_ready()
+    return await offload(add_match_result_sync, req)
+
+def add_match_result_sync(req: MatchResultRequest):
+    global data_version
+    if match_state is None:
+        raise HTTPException(status_code=503, detail="Historical data not loaded")
+
+    team1_name = team_mapping.get(req.team1Id.lower())
+    team2_name = team_mapping.get(req.team2Id.lower())
+    venue_name = venue_mapping.get(req.venueId.lower())
+    toss_winner_name = team_mapping.get(req.tossWinner.lower())
+    winner_name = team_mapping.get(req.winner.lower())
+    toss_decision = req.tossDecision.lower()
+
+    if not all([team1_name, team2_name, venue_name, toss_winner_name, winner_name]):
+        raise HTTPException(status_code=400, detail="Invalid team or venue IDs provided")
+    if team1_name == team2_name:
+        raise HTTPException(status_code=400, detail="team1Id and team2Id must differ")
+    if toss_winner_name not in (team1_name, team2_name) or winner_name not in (team1_name, team2_name):
+        raise HTTPException(status_code=400, detail="tossWinner and winner must be one of the two teams")
+    if toss_decision not in ("bat", "field"):
+        raise HTTPException(status_code=400, detail="tossDecision must be 'bat' or 'field'")
+
+    match_type = req.matchType if req.matchType in PLAYOFF_MATCH_TYPES \
+        else normalize_match_type(req.matchType)
+    match = {
+        "team1": team1_name,
+        "team2": team2_name,
+        "venue": venue_name,
+        "toss_winner": toss_winner_name,
+        "toss_decision": toss_decision,
+        "winner": winner_name,
+        "match_type": match_type,
+        "target_runs": req.targetRuns if req.targetRuns is not None else np.nan,
     }
-    return response
+    for innings, summary in (("innings1", req.innings1), ("innings2", req.innings2)):
+        for key, value in (summary or {}).items():
+            match[f"{innings}_{key}"] = value
+
+    with state_update_lock:
+        match_state.append_match(match)
+        invalidated = 0
+        if feature_store is not None:
+            invalidated = feature_store.invalidate(teams=(team1_name, team2_name), venues=(venue_name,))
+        # New cache keys from here on: a prediction computed from the old state and stored
+        # after the invalidation below lands under a key that is never looked up again
+        data_version = f"{data_version.split('+')[0]}+{match_state.generation}"
+    stats_calculator.add_match(match)
+
+    prediction_cache.invalidate(lambda key: key[0] in (team1_name, team2_name) or key[1] in (team1_name, team2_name)
+                                or key[2] == venue_name)
+
+    return {"matchesInState": match_state.match_count, "invalidatedPredictions": invalidated}
 
 # Historical Stats Endpoints
 @app.get("/head-to-head/{team1_id}/{team2_id}", response_model=HeadToHeadResponse)
-def get_head_to_head_stats(team1_id: str, team2_id: str):
+async def get_head_to_head_stats(team1_id: str, team2_id: str):
     """Get historical head-to-head statistics between two teams"""
+    require_ready()
+    return await offload(get_head_to_head_stats_sync, team1_id, team2_id)
+
+def get_head_to_head_stats_sync(team1_id: str, team2_id: str):
     try:
         stats = stats_calculator.get_head_to_head_stats(team1_id, team2_id)
         if stats is None:
@@ -389,8 +861,12 @@ def get_head_to_head_stats(team1_id: str, team2_id: str):
         raise HTTPException(status_code=500, detail=f"Error fetching head-to-head stats: {e}")
 
 @app.get("/team-stats/{team_id}", response_model=TeamStatsResponse)
-def get_team_stats(team_id: str):
+async def get_team_stats(team_id: str):
     """Get comprehensive team statistics"""
+    require_ready()
+    return await offload(get_team_stats_sync, team_id)
+
+def get_team_stats_sync(team_id: str):
     try:
         stats = stats_calculator.get_team_stats(team_id)
         if stats is None:
@@ -400,8 +876,12 @@ def get_team_stats(team_id: str):
         raise HTTPException(status_code=500, detail=f"Error fetching team stats: {e}")
 
 @app.get("/venue-stats/{venue_id}", response_model=List[VenueStatResponse])
-def get_venue_stats(venue_id: str):
+async def get_venue_stats(venue_id: str):
     """Get venue statistics for all teams"""
+    require_ready()
+    return await offload(get_venue_stats_sync, venue_id)
+
+def get_venue_stats_sync(venue_id: str):
     try:
         stats = stats_calculator.get_venue_stats(venue_id)
         return [VenueStatResponse(**stat) for stat in stats]
@@ -409,8 +889,12 @@ def get_venue_stats(venue_id: str):
         raise HTTPException(status_code=500, detail=f"Error fetching venue stats: {e}")
 
 @app.get("/venue-details/{venue_id}", response_model=VenueDetailsResponse)
-def get_venue_details(venue_id: str):
+async def get_venue_details(venue_id: str):
     """Get venue details including batting conditions"""
+    require_ready()
+    return await offload(get_venue_details_sync, venue_id)
+
+def get_venue_details_sync(venue_id: str):
     try:
         details = stats_calculator.get_venue_details(venue_id)
         if details is None:
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Walk-forward backtest of the match-winner model, one fold per season.
+
+    python backtest.py                         # score the shipped model season by season
+    python backtest.py --mode retrain          # retrain on earlier seasons for every fold
+    python backtest.py --workers 4 --output backtest.json
+
+Every match's selected_features come from the memory-mapped feature matrix
+(built from the feature timeline in date order), so they use only the matches
+played before it. In `score` mode each season is scored with the
+given model; the shipped model was trained on the full history, so those
+numbers are in-sample. In `retrain` mode each fold trains a fresh CatBoost
+model on the seasons before it (train.CATBOOST_PARAMS, as for catboost_model.pkl)
+and scores the season out of sample.
+
+Folds run in a process pool. Each worker maps the feature matrix file
+read-only, so they all share its pages instead of each receiving a copy.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostClassifier
+from sklearn.metrics import accuracy_score, brier_score_loss, log_loss
+
+from dataset import get_dataset
+from feature_matrix import FeatureMatrix, load_or_build_feature_matrix
+from features_engineering_encoding import selected_features
+from train import CATBOOST_PARAMS
+
+MODEL_PATH = "catboost_model.cbm"
+CALIBRATION_BINS = 10
+MIN_TRAIN_MATCHES = 50      # retrain folds with less history than this are skipped
+
+# Worker-side view of the feature matrix, set by _attach()
+_shared = {}
+
+
+def _attach(source):
+    """Pool initializer: map the feature matrix file (or take the in-memory one if it couldn't be written)"""
+    matrix = FeatureMatrix.open(source) if isinstance(source, str) else source
+    if matrix is None:
+        raise RuntimeError(f"could not open feature matrix {source}")
+    decided = ~np.isnan(matrix.labels)
+    _shared.update(matrix=matrix, decided=decided, fold=matrix.column("season").astype(int))
+
+
+def run_fold(fold, mode, model_path):
+    """Score one season; returns its labels and predicted P(team1 wins), or None if skipped"""
+    matrix, decided, folds = _shared["matrix"], _shared["decided"], _shared["fold"]
+    X, y = matrix.features, np.nan_to_num(matrix.labels).astype(int)
+    test = decided & (folds == fold)
+    if not test.any():
+        return None
+    if mode == "retrain":
+        train = decided & (folds < fold)
+        if train.sum() < MIN_TRAIN_MATCHES or len(np.unique(y[train])) < 2:
+            return None
+        model = CatBoostClassifier(**CATBOOST_PARAMS, thread_count=1, verbose=0, allow_writing_files=False)
+        model.fit(pd.DataFrame(X[train], columns=selected_features), y[train])
+    else:
+        model = CatBoostClassifier()
+        model.load_model(model_path)
+    probas = model.predict_proba(pd.DataFrame(X[test], columns=selected_features))[:, 1]
+    return {"fold": fold, "y": y[test].tolist(), "p": probas.tolist()}
+
+
+def calibration(y, p, bins=CALIBRATION_BINS):
+    """Reliability table over equal-width probability bins, and the expected calibration error"""
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    index = np.clip(np.digitize(p, edges[1:-1]), 0, bins - 1)
+    table, ece = [], 0.0
+    for b in range(bins):
+        mask = index == b
+        if not mask.any():
+            continue
+        predicted, observed = float(p[mask].mean()), float(y[mask].mean())
+        ece += mask.mean() * abs(predicted - observed)
+        table.append({"bin": f"{edges[b]:.1f}-{edges[b + 1]:.1f}", "count": int(mask.sum()),
+                      "predicted": round(predicted, 4), "observed": round(observed, 4)})
+    return table, float(ece)
+
+
+def score(y, p):
+    y, p = np.asarray(y), np.asarray(p)
+    table, ece = calibration(y, p)
+    return {
+        "matches": int(len(y)),
+        "log_loss": float(log_loss(y, p, labels=[0, 1])),
+        "brier": float(brier_score_loss(y, p)),
+        "accuracy": float(accuracy_score(y, p >= 0.5)),
+        "ece": ece,
+        "calibration": table,
+    }
+
+
+def run_backtest(historical_data, mode="score", model_path=MODEL_PATH, workers=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        matrix = load_or_build_feature_matrix(historical_data)
+    seasons = matrix.categories("season")
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(workers, len(seasons)), initializer=_attach,
+                             initargs=(matrix.path or matrix,)) as pool:
+        folds = list(pool.map(run_fold, range(len(seasons)), [mode] * len(seasons), [model_path] * len(seasons)))
+
+    folds = [f for f in folds if f is not None]
+    report = {"mode": mode, "seasons": {}, "overall": None}
+    for f in folds:
+        report["seasons"][seasons[f["fold"]]] = score(f["y"], f["p"])
+    if folds:
+        report["overall"] = score([v for f in folds for v in f["y"]], [v for f in folds for v in f["p"]])
+    return report
+
+
+def print_report(report):
+    print(f"\n📊 Walk-forward backtest ({report['mode']})")
+    print(f"  {'season':<10} {'matches':>8} {'log_loss':>9} {'brier':>7} {'accuracy':>9} {'ece':>7}")
+    rows = list(report["seasons"].items()) + ([("overall", report["overall"])] if report["overall"] else [])
+    for season, m in rows:
+        print(f"  {season:<10} {m['matches']:>8} {m['log_loss']:>9.4f} {m['brier']:>7.4f} "
+              f"{m['accuracy']:>9.1%} {m['ece']:>7.4f}")
+    if report["overall"]:
+        print("\n  Calibration (all folds)")
+        for row in report["overall"]["calibration"]:
+            print(f"  {row['bin']:<10} {row['count']:>8} predicted {row['predicted']:.3f} observed {row['observed']:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the IPL prediction model")
+    parser.add_argument("--mode", choices=["score", "retrain"], default="score",
+                        help="Score the given model (in-sample for the shipped one) or retrain per fold")
+    parser.add_argument("--model", default=MODEL_PATH, help="CatBoost model scored in score mode")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--output", help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    with contextlib.redirect_stdout(io.StringIO()):
+        dataset = get_dataset()
+    if dataset.historical_data is None or dataset.historical_data.empty:
+        print("❌ No historical data to backtest")
+        return 1
+
+    start = time.perf_counter()
+    report = run_backtest(dataset.historical_data, args.mode, args.model, args.workers)
+    print_report(report)
+    print(f"\n⏱️ {len(report['seasons'])} folds in {time.perf_counter() - start:.1f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Saved report to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the data pipeline, feature builders and prediction endpoints.
+
+    python benchmark.py                        # run, compare against benchmark_baseline.json
+    python benchmark.py --save-baseline        # run and store the results as the new baseline
+    python benchmark.py --scales 1 10          # history sizes, as multiples of the real data
+
+Scaled runs replicate the cleaned match and ball tables with shifted match
+ids, so a 10x history is ten back-to-back copies of the real one. Above 10x
+only the per-match summaries are replicated and the ball-level benchmarks
+(summarize_match_data, load_and_process_data) are skipped. The service
+benchmarks (transform_input, /predict and the stats endpoints) run against the
+real data only; their per-request cost doesn't depend on the history length.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import time
+import tracemalloc
+import warnings
+
+import pandas as pd
+
+from clean_balls_data import summarize_match_data
+from data_cache import load_clean_tables
+from dataset import HistoricalDataset
+from historical_stats import StatsIndex
+from normalization import CURRENT_TEAMS
+import features_engineering_encoding as fe
+
+BASELINE_PATH = "benchmark_baseline.json"
+DEFAULT_SCALES = [1, 10, 100]
+REGRESSION_TOLERANCE = 0.25     # slower than baseline by more than this fraction -> flagged
+NOISE_FLOOR_SECONDS = 0.02      # ...and by more than this, so jitter on millisecond runs isn't flagged
+MAX_BALL_SCALE = 10             # above this the ball table (25M+ rows) no longer fits in memory on small hosts
+
+FEATURE_BUILDERS = [
+    "calculate_rolling_stats",
+    "compute_rolling_features_balls",
+    "calculate_toss_stats",
+    "add_head_to_head_toss_advantage",
+    "add_chasing_defending_strength",
+    "add_venue_features",
+    "build_match_features",
+]
+
+FIXTURE = {"team1Id": "mi", "team2Id": "csk", "venueId": "wankhede", "tossWinner": "mi", "tossDecision": "bat"}
+STATS_ENDPOINTS = ["/head-to-head/mi/csk", "/team-stats/rcb", "/venue-stats/wankhede", "/venue-details/eden"]
+
+
+def scale_frame(df, id_column, factor, offset):
+    """`factor` back-to-back copies of df, with the match ids of copy k shifted by k * offset"""
+    if df is None or factor == 1:
+        return df
+    return pd.concat([df.assign(**{id_column: df[id_column] + k * offset}) for k in range(factor)],
+                     ignore_index=True)
+
+
+def measure(fn, rows, repeat):
+    """
+    One traced run for peak memory, then `repeat` timed runs.
+
+    Returns:
+        dict: best wall time (seconds), rows, rows per second and peak traced memory (MB).
+    """
+    # The pipeline and service log per call; keep that out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+    best = min(times)
+    return {
+        "seconds": round(best, 6),
+        "rows": rows,
+        "rows_per_second": round(rows / best, 1) if best > 0 else None,
+        "peak_mb": round(peak / 1e6, 2),
+    }
+
+
+def run_pipeline_benchmarks(scale, match_data, ball_data, repeat):
+    results = {}
+
+    def record(name, fn, rows):
+        results[f"{scale}x/{name}"] = result = measure(fn, rows, repeat)
+        print(f"  {name:<36} {result['seconds']:>10.4f}s {result['rows_per_second'] or 0:>14,.0f} rows/s "
+              f"{result['peak_mb']:>10.1f} MB")
+
+    if ball_data is None:
+        print("⚠️ No ball-by-ball data, skipping pipeline benchmarks")
+        return results
+
+    offset = int(match_data["id"].max()) + 1
+    matches = scale_frame(match_data, "id", scale, offset)
+    if scale <= MAX_BALL_SCALE:
+        balls = scale_frame(ball_data, "match_id", scale, offset)
+        print(f"📊 Scale {scale}x: {len(matches)} matches, {len(balls)} balls")
+        record("summarize_match_data", lambda: summarize_match_data(balls), len(balls))
+        record("load_and_process_data", lambda: HistoricalDataset(matches, balls), len(balls))
+        dataset = HistoricalDataset(matches, balls)
+        history, detailed = dataset.historical_data, dataset.detailed_match_data
+        del balls, dataset
+    else:
+        # Replicate the per-match summaries instead of the ball table
+        dataset = HistoricalDataset(match_data, ball_data)
+        history = scale_frame(dataset.historical_data, "match_id", scale, offset)
+        detailed = scale_frame(dataset.detailed_match_data, "match_id", scale, offset)
+        print(f"📊 Scale {scale}x: {len(matches)} matches (ball-level benchmarks skipped above {MAX_BALL_SCALE}x)")
+
+    for name in FEATURE_BUILDERS:
+        builder = getattr(fe, name)
+        record(name, lambda: builder(history), len(history))
+
+    record("stats_index_build", lambda: StatsIndex.build(CURRENT_TEAMS, matches, detailed), len(matches))
+    return results
+
+
+def run_service_benchmarks(repeat):
+    """transform_input and single requests through FastAPI's TestClient, on the real data"""
+    from fastapi.testclient import TestClient
+    import app as service
+
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        service.load_service()
+    client = TestClient(service.app)
+
+    def record(name, fn):
+        results[f"service/{name}"] = result = measure(fn, 1, repeat)
+        print(f"  {name:<36} {result['seconds'] * 1000:>10.3f}ms {result['peak_mb']:>25.2f} MB")
+
+    def predict_uncached():
+        service.prediction_cache.clear()
+        response = client.post("/predict", json=FIXTURE)
+        response.raise_for_status()
+
+    def predict_cached():
+        client.post("/predict", json=FIXTURE).raise_for_status()
+
+    print("📊 Service (real data)")
+    record("transform_input", lambda: service.transform_input(FIXTURE))
+    record("predict", predict_uncached)
+    record("predict_cached", predict_cached)
+    for path in STATS_ENDPOINTS:
+        record(path.split("/")[1], lambda path=path: client.get(path).raise_for_status())
+
+    service.executor.shutdown()
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print the change against the baseline; returns the names that got slower than the tolerance"""
+    regressions = []
+    print(f"\n📈 Compared with baseline ({baseline.get('created', 'unknown date')}):")
+    for name, result in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base or not base.get("seconds"):
+            continue
+        ratio = result["seconds"] / base["seconds"]
+        flag = ""
+        if ratio > 1 + tolerance and result["seconds"] - base["seconds"] > NOISE_FLOOR_SECONDS:
+            flag = "  ❌ REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<44} {base['seconds']:>10.4f}s -> {result['seconds']:>10.4f}s  ({ratio:5.2f}x){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the IPL prediction pipeline")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES,
+                        help="History sizes as multiples of the real data")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark at 1x (1 at larger scales)")
+    parser.add_argument("--skip-service", action="store_true", help="Skip the transform_input/endpoint benchmarks")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    match_data, ball_data = load_clean_tables()
+
+    results = {}
+    for scale in args.scales:
+        results.update(run_pipeline_benchmarks(scale, match_data, ball_data, args.repeat if scale == 1 else 1))
+    if not args.skip_service:
+        results.update(run_service_benchmarks(max(args.repeat, 50)))
+
+    if args.save_baseline:
+        payload = {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "results": results,
+        }
+        with open(args.baseline, "w") as f:
+            json.dump(payload, f, indent=2, sort_keys=True)
+        print(f"\n✅ Saved baseline to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\n⚠️ No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
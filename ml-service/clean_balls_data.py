@@ -1,15 +1,7 @@
 import pandas as pd
+import numpy as np
 
-ball_data = pd.read_csv("data/ball_by_ball_data.csv")
-
-# Drop unused cols
-ball_data.drop(columns=["non_striker", "fielders_involved", "wicket_kind", "player_out"], inplace=True)
-
-bool_cols = ["is_wide_ball", "is_no_ball", "is_leg_bye", "is_bye", "is_penalty", "is_super_over", "is_wicket"]
-ball_data[bool_cols] = ball_data[bool_cols].astype(int)
-
-# Sort for rolling calculations
-balls = ball_data.sort_values(["season_id", "match_id", "innings", "over_number", "ball_number"])
+from normalization import normalize_team  # noqa: F401  (importable from here as before)
 
 def summarize_match_data(df_balls):
     """
@@ -23,29 +15,30 @@ def summarize_match_data(df_balls):
                       summarizing key performance indicators.
     """
 
-    # Calculate key aggregates for each innings of each match
-    summary_df = df_balls.groupby(['match_id', 'innings', 'team_batting', 'team_bowling']).apply(lambda x: pd.Series({
-        'total_runs': x['total_runs'].sum(),
-        'total_wickets': x['is_wicket'].sum(),
-        'balls_bowled': len(x),
+    keys = ['match_id', 'innings', 'team_batting', 'team_bowling']
+    over = df_balls['over_number']
+    runs = df_balls['total_runs']
+    wickets = df_balls['is_wicket']
 
-        # Powerplay stats (Overs 1-6)
-        'pp_runs': x[x['over_number'] <= 6]['total_runs'].sum(),
-        'pp_wickets': x[x['over_number'] <= 6]['is_wicket'].sum(),
+    # Label each ball's phase once: Powerplay (overs 1-6), Middle (7-15), Death (16-20)
+    phase = np.select([over <= 6, (over > 6) & (over <= 15), over > 15], ['pp', 'mo', 'do'], default='')
 
-        # Middle overs stats (Overs 7-15)
-        'mo_runs': x[(x['over_number'] > 6) & (x['over_number'] <= 15)]['total_runs'].sum(),
-        'mo_wickets': x[(x['over_number'] > 6) & (x['over_number'] <= 15)]['is_wicket'].sum(),
+    per_ball = df_balls[keys].copy()
+    per_ball['total_runs'] = runs
+    per_ball['total_wickets'] = wickets
+    per_ball['balls_bowled'] = 1
+    for label in ['pp', 'mo', 'do']:
+        in_phase = phase == label
+        per_ball[f'{label}_runs'] = np.where(in_phase, runs, 0)
+        per_ball[f'{label}_wickets'] = np.where(in_phase, wickets, 0)
 
-        # Death overs stats (Overs 16-20)
-        'do_runs': x[x['over_number'] > 15]['total_runs'].sum(),
-        'do_wickets': x[x['over_number'] > 15]['is_wicket'].sum(),
+    # Other important stats
+    per_ball['extras_runs'] = df_balls['extras']
+    per_ball['dot_balls'] = (runs == 0).astype(int)
+    per_ball['boundaries'] = df_balls['batter_runs'].isin([4, 6]).astype(int)
 
-        # Other important stats
-        'extras_runs': x['extras'].sum(),
-        'dot_balls': (x['total_runs'] == 0).sum(),
-        'boundaries': (x['batter_runs'].isin([4, 6])).sum(),
-    })).reset_index()
+    # Calculate key aggregates for each innings of each match in one pass
+    summary_df = per_ball.groupby(keys, observed=True).sum().reset_index()
 
     # Calculate rates and percentages
     summary_df['run_rate'] = (summary_df['total_runs'] / summary_df['balls_bowled']) * 6
@@ -90,58 +83,26 @@ def pivot_match_data(summary_df):
     final_df = final_df.reindex(columns=['match_id', 'team1', 'team2'] + [col for col in final_df.columns if col not in ['match_id', 'team1', 'team2']])
 
     # Handle cases where an innings might not have been completed
-    final_df = final_df.fillna(0)
+    # (numeric columns only: team columns may be categorical)
+    numeric_cols = final_df.select_dtypes(include='number').columns
+    final_df[numeric_cols] = final_df[numeric_cols].fillna(0)
 
     return final_df
 
-########## Cleaning team names values
-
-def normalize_team(team):
-    mapping = {
-        # RCB
-        "Royal Challengers Bangalore": "Royal Challengers Bengaluru",
-        "Royal Challengers Bengaluru": "Royal Challengers Bengaluru",
-
-        # Punjab
-        "Kings XI Punjab": "Punjab Kings",
-        "Punjab Kings": "Punjab Kings",
-
-        # Delhi
-        "Delhi Daredevils": "Delhi Capitals",
-        "Delhi Capitals": "Delhi Capitals",
-        "�Delhi Capitals": "Delhi Capitals",   # fix encoding issue
-
-        # Mumbai
-        "Mumbai Indians": "Mumbai Indians",
-
-        # KKR
-        "Kolkata Knight Riders": "Kolkata Knight Riders",
-
-        # Rajasthan
-        "Rajasthan Royals": "Rajasthan Royals",
-
-        # Deccan Chargers → now defunct, map to Sunrisers
-        "Deccan Chargers": "Sunrisers Hyderabad",
-        "Sunrisers Hyderabad": "Sunrisers Hyderabad",
-
-        # Kochi Tuskers (defunct, ignore or map nowhere, safest is NaN)
-        "Kochi Tuskers Kerala": None,
+def main():
+    """Load the raw ball-by-ball CSV and sort it for rolling calculations"""
+    ball_data = pd.read_csv("data/ball_by_ball_data.csv")
 
-        # Pune Warriors (defunct, ignore)
-        "Pune Warriors": None,
+    # Drop unused cols
+    ball_data.drop(columns=["non_striker", "fielders_involved", "wicket_kind", "player_out"], inplace=True)
 
-        # Rising Pune → defunct, ignore
-        "Rising Pune Supergiants": None,
-        "Rising Pune Supergiant": None,
+    bool_cols = ["is_wide_ball", "is_no_ball", "is_leg_bye", "is_bye", "is_penalty", "is_super_over", "is_wicket"]
+    ball_data[bool_cols] = ball_data[bool_cols].astype(int)
 
-        # Gujarat
-        "Gujarat Lions": "Gujarat Titans",
-        "Gujarat Titans": "Gujarat Titans",
+    # Sort for rolling calculations
+    balls = ball_data.sort_values(["season_id", "match_id", "innings", "over_number", "ball_number"])
+    return balls
 
-        # Lucknow
-        "Lucknow Super Giants": "Lucknow Super Giants",
 
-        # Chennai
-        "Chennai Super Kings": "Chennai Super Kings"
-    }
-    return mapping.get(team, None)   # None if not in current 10 teams
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# ml-service/data_cache.py
+import glob
+import hashlib
+import os
+from typing import Iterable, Optional, Tuple
+
+import pandas as pd
+import pyarrow.feather as feather
+
+from normalization import normalize_teams, normalize_match_types
+
+MATCH_CSV = "data/match_data.csv"
+BALL_CSV = "data/ball_by_ball_data.csv"
+CACHE_DIR = "cache"
+
+# Bump when the cleaning below changes so existing caches get rebuilt
+CLEAN_TABLES_VERSION = 1
+
+TEAM_COLUMNS = ["team1", "team2", "toss_winner", "winner"]
+BALL_TEAM_COLUMNS = ["team_batting", "team_bowling"]
+BOOL_COLUMNS = ["is_wide_ball", "is_no_ball", "is_leg_bye", "is_bye", "is_penalty", "is_super_over", "is_wicket"]
+BALL_INT_COLUMNS = {
+    "season_id": "int16", "innings": "int8", "over_number": "int8", "ball_number": "int8",
+    "batter_runs": "int8", "extras": "int8", "total_runs": "int8",
+}
+
+
+def hash_files(paths: Iterable[str], salt: str = "") -> str:
+    """sha256 over the contents of the given files (missing files hash as a marker)"""
+    digest = hashlib.sha256(salt.encode())
+    for path in paths:
+        digest.update(path.encode())
+        if not os.path.exists(path):
+            digest.update(b"<missing>")
+            continue
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def clean_match_table(match_data: pd.DataFrame) -> pd.DataFrame:
+    """Cleaning shared by every consumer of match_data.csv (train rows, current teams only)"""
+    match_data = match_data.drop(columns=["Unnamed: 0", "city", "method"], errors='ignore')
+    match_data = match_data.dropna()
+    match_data = match_data[match_data['source'] == 'train'].copy()
+
+    match_data["match_type"] = normalize_match_types(match_data["match_type"])
+    for col in TEAM_COLUMNS:
+        match_data[col] = normalize_teams(match_data[col])
+
+    # Remove rows with None values (defunct teams)
+    match_data = match_data.dropna()
+
+    match_data["toss_decision"] = match_data["toss_decision"].str.lower()
+    match_data["result"] = match_data["result"].str.lower()
+
+    # Typed columns: categoricals for repeated labels, small ints where the range allows
+    teams = sorted(set().union(*(match_data[col].unique() for col in TEAM_COLUMNS)))
+    for col in TEAM_COLUMNS:
+        match_data[col] = pd.Categorical(match_data[col], categories=teams)
+    for col in ["venue", "match_type", "toss_decision", "result", "super_over", "source"]:
+        match_data[col] = match_data[col].astype("category")
+    match_data["target_runs"] = match_data["target_runs"].astype("int16")
+
+    return match_data.reset_index(drop=True)
+
+
+def clean_ball_table(ball_data: pd.DataFrame) -> pd.DataFrame:
+    """Cleaning shared by every consumer of ball_by_ball_data.csv, sorted for rolling calculations"""
+    ball_data = ball_data.drop(columns=["non_striker", "fielders_involved", "wicket_kind", "player_out"], errors='ignore')
+    for col in BOOL_COLUMNS:
+        if col in ball_data.columns:
+            ball_data[col] = ball_data[col].astype("int8")
+
+    for col in BALL_TEAM_COLUMNS:
+        if col in ball_data.columns:
+            ball_data[col] = normalize_teams(ball_data[col])
+
+    ball_data = ball_data.dropna()
+    ball_data = ball_data.sort_values(["season_id", "match_id", "innings", "over_number", "ball_number"])
+
+    for col, dtype in BALL_INT_COLUMNS.items():
+        if col in ball_data.columns:
+            ball_data[col] = ball_data[col].astype(dtype)
+    for col in ball_data.columns:
+        if ball_data[col].dtype == object:
+            ball_data[col] = ball_data[col].astype("category")
+
+    return ball_data.reset_index(drop=True)
+
+
+def _cache_paths(key: str) -> Tuple[str, str]:
+    return (os.path.join(CACHE_DIR, f"clean_{key[:16]}_matches.feather"),
+            os.path.join(CACHE_DIR, f"clean_{key[:16]}_balls.feather"))
+
+
+def _read(path: str) -> pd.DataFrame:
+    # Uncompressed Feather (Arrow IPC) so the columns are read straight out of the mapped file
+    return feather.read_table(path, memory_map=True).to_pandas()
+
+
+def build_clean_tables(key: str) -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """Parse the CSVs, clean them and write the typed Feather cache for `key`"""
+    match_data = clean_match_table(pd.read_csv(MATCH_CSV))
+    ball_data = clean_ball_table(pd.read_csv(BALL_CSV)) if os.path.exists(BALL_CSV) else None
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for stale in glob.glob(os.path.join(CACHE_DIR, "clean_*.feather")):
+        os.remove(stale)
+
+    match_path, ball_path = _cache_paths(key)
+    # Match table last: its file marks a complete cache
+    for df, path in ((ball_data, ball_path), (match_data, match_path)):
+        if df is None:
+            continue
+        tmp_path = f"{path}.tmp"
+        feather.write_feather(df, tmp_path, compression="uncompressed")
+        os.replace(tmp_path, path)
+
+    return match_data, ball_data
+
+
+def clean_tables_key() -> str:
+    """Cache key of the cleaned tables: the CSV contents plus CLEAN_TABLES_VERSION"""
+    return hash_files([MATCH_CSV, BALL_CSV], salt=f"clean-v{CLEAN_TABLES_VERSION}")
+
+
+def _cache_complete(match_path: str, ball_path: str) -> bool:
+    """Both tables are on disk (the ball table only needs to be when its CSV exists)"""
+    return os.path.exists(match_path) and (os.path.exists(ball_path) or not os.path.exists(BALL_CSV))
+
+
+def clean_tables_cached() -> bool:
+    return _cache_complete(*_cache_paths(clean_tables_key()))
+
+
+def load_clean_tables() -> Tuple[pd.DataFrame, Optional[pd.DataFrame]]:
+    """
+    Cleaned, normalized and sorted match and ball tables.
+
+    Served from the memory-mapped Feather cache when it was built from the
+    current CSVs; otherwise the CSVs are parsed once and the cache rewritten.
+
+    Returns:
+        (match_data, ball_data): ball_data is None if the ball-by-ball CSV is missing.
+    """
+    key = clean_tables_key()
+    match_path, ball_path = _cache_paths(key)
+
+    if _cache_complete(match_path, ball_path):
+        try:
+            ball_data = _read(ball_path) if os.path.exists(ball_path) else None
+            return _read(match_path), ball_data
+        except Exception as e:
+            print(f"⚠️ Could not read cleaned-table cache, rebuilding: {e}")
+
+    print("🔄 Building cleaned-table cache from CSV...")
+    try:
+        return build_clean_tables(key)
+    except OSError as e:
+        print(f"⚠️ Could not write cleaned-table cache: {e}")
+        match_data = clean_match_table(pd.read_csv(MATCH_CSV))
+        ball_data = clean_ball_table(pd.read_csv(BALL_CSV)) if os.path.exists(BALL_CSV) else None
+        return match_data, ball_data
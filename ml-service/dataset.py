@@ -0,0 +1,72 @@
+# ml-service/dataset.py
+import threading
+from typing import Optional
+
+import pandas as pd
+
+from clean_balls_data import summarize_match_data, pivot_match_data
+from data_cache import load_clean_tables
+
+HOLDOUT_SEASON = "2025"
+
+
+class HistoricalDataset:
+    """
+    Cleaned historical tables and the per-match ball summaries derived from
+    them, built once per process and shared by the prediction path and the
+    stats endpoints. Treat every frame as read-only: callers that need to
+    modify one should work on a copy.
+
+    Attributes:
+        match_data: Cleaned match table (train rows, current teams, `id` column).
+        ball_data: Cleaned ball-by-ball table, or None if the CSV is missing.
+        detailed_match_data: One row per match with innings1_/innings2_ summaries.
+        historical_data: match_data (`match_id`, parsed `date`) merged with the summaries,
+                         excluding the hold-out season; None without ball data.
+    """
+
+    def __init__(self, match_data: pd.DataFrame, ball_data: Optional[pd.DataFrame],
+                 detailed_match_data: Optional[pd.DataFrame] = None):
+        self.match_data = match_data
+        self.ball_data = ball_data
+        self.detailed_match_data = None
+        self.historical_data = None
+
+        if ball_data is None:
+            print("Warning: Could not load ball data: data/ball_by_ball_data.csv not found")
+            return
+
+        # Summarize match data from ball-by-ball (one summary for every consumer),
+        # unless the caller already has the summaries (the training pipeline caches them)
+        if detailed_match_data is None:
+            detailed_match_data = pivot_match_data(summarize_match_data(ball_data))
+        self.detailed_match_data = detailed_match_data
+
+        # Hold out the 2025 season (summaries don't carry season_id, so drop its match ids)
+        holdout_ids = ball_data.loc[ball_data['season_id'].astype(str) == HOLDOUT_SEASON, 'match_id'].unique()
+        final_balls_df = self.detailed_match_data[~self.detailed_match_data['match_id'].isin(holdout_ids)]
+
+        # Drop team columns from ball data that conflict with match data
+        final_balls_clean = final_balls_df.drop(columns=['team1', 'team2'], errors='ignore')
+
+        # Rename id to match_id and keep the date: match_id is not chronological, so every
+        # rolling feature orders matches by (date, match_id)
+        matches = match_data.rename(columns={'id': 'match_id'})
+        if "date" in matches.columns:
+            matches["date"] = pd.to_datetime(matches["date"], format="mixed")
+        self.historical_data = matches.merge(final_balls_clean, on='match_id', how='left', sort=False)
+
+
+_dataset = None
+_dataset_lock = threading.Lock()
+
+
+def get_dataset() -> HistoricalDataset:
+    """The process-wide dataset, loaded on first use"""
+    global _dataset
+    if _dataset is None:
+        with _dataset_lock:
+            if _dataset is None:
+                match_data, ball_data = load_clean_tables()
+                _dataset = HistoricalDataset(match_data, ball_data)
+    return _dataset
@@ -1,11 +1,12 @@
 #!/usr/bin/env python3
 """Debug why factors are identical across team combinations"""
 
-from app import transform_input
+from app import load_service, transform_input
 import pandas as pd
 
 def debug_identical_factors():
     print('=== Debugging Identical Factors Issue ===')
+    load_service()
     
     # Test two very different teams
     team_combos = [
@@ -0,0 +1,103 @@
+# ml-service/executor.py
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ExecutorOverloaded(Exception):
+    """The wait queue is full; the caller should back off (HTTP 429)"""
+
+
+class ExecutorTimeout(Exception):
+    """No worker became free within the queue timeout (HTTP 503)"""
+
+
+class BoundedExecutor:
+    """
+    Runs blocking feature/model work off the event loop with a hard concurrency limit.
+
+    At most `max_workers` calls run at once; up to `max_queue` more wait for a
+    slot, for at most `queue_timeout` seconds. Anything beyond that is shed
+    straight away instead of piling up behind the pool. Counters are only
+    touched from the event loop thread, so they need no lock.
+    """
+
+    def __init__(self, max_workers: int = 4, max_queue: int = 64, queue_timeout: float = 2.0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._pool = None
+        self._slots = None
+        self._loop = None
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_queued = 0
+        self.queue_wait_seconds = 0.0
+
+    def _bind(self, loop):
+        # Pool and semaphore are created on first use (and again after shutdown or on a new loop)
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ml-worker")
+        if self._loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_workers)
+            self._loop = loop
+
+    async def run(self, fn: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        self._bind(loop)
+        if not self._slots.locked():
+            # A worker is free: take it without queueing
+            await self._slots.acquire()
+        elif self.queued >= self.max_queue:
+            self.rejected += 1
+            raise ExecutorOverloaded(f"{self.queued} requests already waiting")
+        else:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                raise ExecutorTimeout(f"no worker free within {self.queue_timeout}s")
+            finally:
+                self.queued -= 1
+                self.queue_wait_seconds += time.perf_counter() - start
+
+        self.running += 1
+        try:
+            result = await loop.run_in_executor(self._pool, fn, *args)
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.running -= 1
+            self._slots.release()
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        waited = self.completed + self.failed + self.running + self.timed_out
+        return {
+            "maxWorkers": self.max_workers,
+            "maxQueue": self.max_queue,
+            "queueTimeoutSeconds": self.queue_timeout,
+            "running": self.running,
+            "queued": self.queued,
+            "maxQueued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timedOut": self.timed_out,
+            "avgQueueWaitSeconds": round(self.queue_wait_seconds / waited, 6) if waited else 0.0,
+        }
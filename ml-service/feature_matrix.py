@@ -0,0 +1,163 @@
+# ml-service/feature_matrix.py
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from feature_store import source_fingerprint
+from feature_timeline import FeatureTimeline
+from features_engineering_encoding import selected_features, sort_chronologically
+
+FEATURE_MATRIX_PATH = "cache/feature_matrix.f32"
+FEATURE_MATRIX_FORMAT_VERSION = 2
+LABEL_COLUMN = "label"
+METADATA_COLUMNS = ["match_id", "season", "team1", "team2", "venue", "toss_winner", "toss_decision"]
+CATEGORICAL_COLUMNS = ["season", "team1", "team2", "venue", "toss_winner", "toss_decision"]
+
+
+def schema_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".json"
+
+
+class FeatureMatrix:
+    """
+    Pre-match selected_features of every historical match, the label (team1 won,
+    NaN for no result) and match metadata as one float32 array on disk, with a
+    JSON schema sidecar:
+
+        cache/feature_matrix.f32    raw C-order float32, rows = matches in date order
+        cache/feature_matrix.json   shape, column names, category labels, source fingerprint
+
+    Categorical metadata is stored as codes into the sidecar's category lists
+    (seasons are listed in the order they start, so a season code is also its
+    walk-forward fold). Opening maps the file read-only, so every process
+    reading it shares the same pages through the OS page cache. Features are
+    float32, the precision CatBoost compares them in.
+    """
+
+    def __init__(self, data: np.ndarray, schema: Dict[str, Any], path: Optional[str] = None):
+        self.data = data
+        self.schema = schema
+        self.path = path
+        self.columns: List[str] = schema["columns"]
+        self.index = {c: i for i, c in enumerate(self.columns)}
+        self.fingerprint: str = schema["fingerprint"]
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    @property
+    def features(self) -> np.ndarray:
+        """(rows, selected_features) view"""
+        return self.data[:, :len(self.schema["features"])]
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self.data[:, self.index[LABEL_COLUMN]]
+
+    def column(self, name: str) -> np.ndarray:
+        return self.data[:, self.index[name]]
+
+    def categories(self, name: str) -> List[str]:
+        return self.schema["categories"][name]
+
+    def decode(self, name: str) -> pd.Series:
+        """Labels of a categorical metadata column"""
+        return pd.Series(pd.Categorical.from_codes(self.column(name).astype(np.int64), self.categories(name)), name=name)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Copy as a DataFrame: match_id, decoded metadata, label and the features"""
+        frame = pd.DataFrame(self.features, columns=self.schema["features"])
+        frame.insert(0, LABEL_COLUMN, self.labels)
+        for name in reversed(METADATA_COLUMNS):
+            values = self.decode(name) if name in CATEGORICAL_COLUMNS else self.column(name).astype(np.int64)
+            frame.insert(0, name, np.asarray(values))
+        return frame
+
+    @classmethod
+    def open(cls, path: str = FEATURE_MATRIX_PATH) -> Optional["FeatureMatrix"]:
+        """Map an existing matrix read-only; None if it is missing, incomplete or for other features"""
+        try:
+            with open(schema_path(path)) as f:
+                schema = json.load(f)
+            if (schema.get("version") != FEATURE_MATRIX_FORMAT_VERSION
+                    or schema.get("features") != list(selected_features)):
+                return None
+            shape = tuple(schema["shape"])
+            if os.path.getsize(path) != shape[0] * shape[1] * np.dtype(np.float32).itemsize:
+                return None
+            data = np.memmap(path, dtype=np.float32, mode="r", shape=shape) if shape[0] else np.empty(shape, np.float32)
+        except (OSError, ValueError, KeyError):
+            return None
+        return cls(data, schema, path)
+
+    @classmethod
+    def write(cls, path: str, features: np.ndarray, labels: np.ndarray, metadata: pd.DataFrame,
+              fingerprint: str) -> "FeatureMatrix":
+        """
+        Persist the matrix and its sidecar (data first, sidecar last, both by atomic rename)
+        and return it opened read-only (or in memory if the write fails).
+        """
+        columns = list(selected_features) + [LABEL_COLUMN] + METADATA_COLUMNS
+        blocks = [np.asarray(features, dtype=np.float32), np.asarray(labels, dtype=np.float32)[:, None]]
+        categories = {}
+        for name in METADATA_COLUMNS:
+            values = metadata[name]
+            if name in CATEGORICAL_COLUMNS:
+                # Labels in first-seen order (rows are in match order)
+                categories[name] = [str(v) for v in pd.unique(values.astype(str))]
+                values = pd.Categorical(values.astype(str), categories=categories[name]).codes
+            blocks.append(np.asarray(values, dtype=np.float32)[:, None])
+        data = np.ascontiguousarray(np.hstack(blocks))
+
+        schema = {
+            "version": FEATURE_MATRIX_FORMAT_VERSION,
+            "fingerprint": fingerprint,
+            "dtype": "float32",
+            "order": "C",
+            "shape": list(data.shape),
+            "columns": columns,
+            "features": list(selected_features),
+            "label": LABEL_COLUMN,
+            "metadata": METADATA_COLUMNS,
+            "categories": categories,
+        }
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            data.tofile(tmp_path)
+            os.replace(tmp_path, path)
+            tmp_schema = f"{schema_path(path)}.tmp"
+            with open(tmp_schema, "w") as f:
+                json.dump(schema, f, indent=2)
+            os.replace(tmp_schema, schema_path(path))
+        except OSError as e:
+            print(f"⚠️ Could not persist feature matrix, keeping it in memory: {e}")
+            return cls(data, schema)
+        return cls.open(path)
+
+
+def build_feature_matrix(historical_data: pd.DataFrame, path: str = FEATURE_MATRIX_PATH,
+                         fingerprint: Optional[str] = None) -> FeatureMatrix:
+    """Leak-free features of every historical match (one timeline pass, in date order), written to `path`"""
+    history = sort_chronologically(historical_data)
+    features = FeatureTimeline(history).features_for_matches(history["match_id"])
+    labels = np.where(history["winner"].isna(), np.nan, (history["winner"] == history["team1"]).astype(float))
+    return FeatureMatrix.write(path, features.to_numpy(), labels, history[METADATA_COLUMNS],
+                               fingerprint or source_fingerprint())
+
+
+def load_or_build_feature_matrix(historical_data: pd.DataFrame, path: str = FEATURE_MATRIX_PATH) -> FeatureMatrix:
+    """Map the matrix from disk if it was built from the current source CSVs, otherwise rebuild it"""
+    fingerprint = source_fingerprint()
+    matrix = FeatureMatrix.open(path)
+    if matrix is not None and matrix.fingerprint == fingerprint:
+        print(f"✅ Mapped feature matrix ({len(matrix)} matches) from {path}")
+        return matrix
+
+    print("🔄 Source data changed or no feature matrix on disk, rebuilding...")
+    matrix = build_feature_matrix(historical_data, path, fingerprint)
+    print(f"✅ Built feature matrix ({len(matrix)} matches) at {path}")
+    return matrix
@@ -0,0 +1,123 @@
+# ml-service/feature_store.py
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import joblib
+import numpy as np
+
+from data_cache import hash_files
+from features_engineering_encoding import FEATURE_PIPELINE_VERSION, selected_features
+
+SOURCE_FILES = ["data/match_data.csv", "data/ball_by_ball_data.csv"]
+FEATURE_STORE_PATH = "cache/feature_store.pkl"
+TOSS_DECISIONS = ("bat", "field")
+
+MatchupKey = Tuple[str, str, str, str, str]
+
+
+def source_fingerprint(paths: Iterable[str] = SOURCE_FILES) -> str:
+    """Hash the source CSVs (and the feature pipeline version) so a stale store can be detected"""
+    return hash_files(paths, salt=f"v{FEATURE_PIPELINE_VERSION}|" + "|".join(selected_features))
+
+
+class FeatureStore:
+    """
+    Precomputed selected_features vectors for every
+    (team1, team2, venue, toss_winner, toss_decision) matchup.
+    """
+
+    def __init__(self, vectors: Dict[MatchupKey, np.ndarray], fingerprint: str):
+        self.vectors = vectors
+        self.fingerprint = fingerprint
+        self.feature_names = list(selected_features)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def get(self, team1: str, team2: str, venue: str, toss_winner: str, toss_decision: str) -> Optional[np.ndarray]:
+        """Return the feature vector (in selected_features order) or None if the matchup isn't stored"""
+        return self.vectors.get((team1, team2, venue, toss_winner, toss_decision))
+
+    def put(self, key: MatchupKey, features: Dict[str, float]):
+        self.vectors[key] = np.array([float(features.get(f, 0)) for f in selected_features], dtype=np.float64)
+
+    def invalidate(self, teams: Iterable[str] = (), venues: Iterable[str] = ()) -> int:
+        """Drop every matchup that involves one of the teams or venues; returns how many were dropped"""
+        teams, venues = set(teams), set(venues)
+        stale = [key for key in list(self.vectors)
+                 if key[0] in teams or key[1] in teams or key[2] in venues]
+        for key in stale:
+            self.vectors.pop(key, None)
+        return len(stale)
+
+    @classmethod
+    def build(cls, compute_fn: Callable[..., Dict[str, float]], team_names: Iterable[str],
+              venue_names: Iterable[str], fingerprint: str,
+              compute_many: Optional[Callable[[List[Tuple]], np.ndarray]] = None) -> "FeatureStore":
+        """
+        Build the store by evaluating compute_fn for every matchup tuple.
+
+        Args:
+            compute_fn: Called as compute_fn(team1, team2, venue, toss_winner, toss_decision),
+                        returns a {feature: value} dict.
+            team_names: Normalized team names.
+            venue_names: Venue names as used in the match data.
+            fingerprint: source_fingerprint() of the data the features came from.
+            compute_many: Optional batch version of compute_fn: takes the list of matchup
+                          tuples, returns a (n, len(selected_features)) matrix in one call.
+        """
+        team_names, venue_names = list(team_names), list(venue_names)
+        keys = [
+            (team1, team2, venue, toss_winner, toss_decision)
+            for team1 in team_names
+            for team2 in team_names
+            if team1 != team2
+            for venue in venue_names
+            for toss_winner in (team1, team2)
+            for toss_decision in TOSS_DECISIONS
+        ]
+        if compute_many is not None and keys:
+            matrix = np.asarray(compute_many(keys), dtype=np.float64)
+            return cls({key: row for key, row in zip(keys, matrix)}, fingerprint)
+
+        vectors = {}
+        for key in keys:
+            features = compute_fn(*key)
+            vectors[key] = np.array([float(features.get(f, 0)) for f in selected_features], dtype=np.float64)
+        return cls(vectors, fingerprint)
+
+    def save(self, path: str = FEATURE_STORE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        joblib.dump({"fingerprint": self.fingerprint, "feature_names": self.feature_names, "vectors": self.vectors}, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = FEATURE_STORE_PATH) -> Optional["FeatureStore"]:
+        try:
+            payload = joblib.load(path)
+        except Exception:
+            return None
+        if payload.get("feature_names") != list(selected_features):
+            return None
+        return cls(payload["vectors"], payload["fingerprint"])
+
+
+def load_or_build_feature_store(compute_fn: Callable[..., Dict[str, float]], team_names: Iterable[str],
+                                venue_names: Iterable[str], path: str = FEATURE_STORE_PATH,
+                                compute_many: Optional[Callable[[List[Tuple]], np.ndarray]] = None) -> FeatureStore:
+    """Load the store from disk if it matches the current source CSVs, otherwise rebuild and persist it"""
+    fingerprint = source_fingerprint()
+    store = FeatureStore.load(path)
+    if store is not None and store.fingerprint == fingerprint:
+        print(f"✅ Loaded feature store ({len(store)} matchups) from {path}")
+        return store
+
+    print("🔄 Source data changed or no feature store on disk, rebuilding...")
+    store = FeatureStore.build(compute_fn, team_names, venue_names, fingerprint, compute_many)
+    try:
+        store.save(path)
+    except Exception as e:
+        print(f"⚠️ Could not persist feature store: {e}")
+    print(f"✅ Built feature store ({len(store)} matchups)")
+    return store
@@ -0,0 +1,125 @@
+# ml-service/feature_timeline.py
+import math
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from features_engineering_encoding import selected_features, sort_chronologically
+from match_state import FIXTURE_FIELDS, MatchState
+
+MIN_CHECKPOINT_EVERY = 16
+
+
+class FeatureTimeline:
+    """
+    As-of queries over the rolling feature state: the features a fixture would
+    have had before a given historical match, with nothing from that match or
+    any later one leaking in.
+
+    The history is folded once in date order ((date, match_id), as in
+    build_match_features and MatchState; match_id alone is not chronological)
+    and the engine state is copied every `checkpoint_every` matches. A query
+    restores the nearest checkpoint at or before the target and replays fewer
+    than `checkpoint_every` matches. By default checkpoints are sqrt(n) matches
+    apart, so both the query cost and the checkpoint memory grow with the
+    square root of the history.
+    """
+
+    def __init__(self, historical_data: pd.DataFrame, match_dates: Optional[pd.Series] = None,
+                 checkpoint_every: Optional[int] = None, **params):
+        self.state = MatchState(**params)
+        engine = self.state.engine
+        if match_dates is not None and "date" not in historical_data.columns:
+            historical_data = historical_data.assign(date=historical_data["match_id"].map(match_dates))
+        history = sort_chronologically(historical_data)
+        self.match_ids = history["match_id"].to_numpy()
+        self.positions = {match_id: i for i, match_id in enumerate(self.match_ids.tolist())}
+        self.fixtures = list(history[list(FIXTURE_FIELDS)].itertuples(index=False, name=None))
+        self.matches = engine.encode_matches(history)
+        self.checkpoint_every = checkpoint_every or max(MIN_CHECKPOINT_EVERY, math.isqrt(len(self.matches)) + 1)
+
+        # Match dates in fold order, for as-of-date lookups
+        self.date_horizon = None
+        if "date" in history.columns:
+            dates = pd.to_datetime(history["date"], format="mixed", errors="coerce")
+            self.date_horizon = dates.ffill().cummax().to_numpy()
+            # No checkpoint or replay may fold a match dated after one still to come
+            if (dates.dropna().diff().dt.total_seconds() < 0).any():
+                raise ValueError("history is not in date order")
+
+        self.checkpoints = []
+        for start in range(0, len(self.matches) + 1, self.checkpoint_every):
+            self.checkpoints.append(engine.state_dict())
+            engine.replay(self.matches[start:start + self.checkpoint_every])
+        self._cursor = len(self.matches)   # matches currently folded into self.state
+        self._lock = threading.Lock()
+        print(f"🕰️ Feature timeline: {len(self.matches)} matches, {len(self.checkpoints)} checkpoints "
+              f"every {self.checkpoint_every}")
+
+    def __len__(self):
+        return len(self.matches)
+
+    def position(self, match_id=None, date=None) -> int:
+        """
+        Number of history matches (in date order) visible before `match_id` or `date`.
+
+        A match sees every match on an earlier date and those on its own date
+        with a smaller match_id; a date sees every match played strictly before it.
+        """
+        if match_id is not None:
+            if match_id not in self.positions:
+                raise KeyError(f"match {match_id} is not in the history; query it by date instead")
+            return self.positions[match_id]
+        if date is not None:
+            if self.date_horizon is None:
+                raise ValueError("timeline was built without match dates")
+            return int(np.searchsorted(self.date_horizon, np.datetime64(pd.Timestamp(date)), side="left"))
+        return len(self.matches)
+
+    def _seek(self, position: int):
+        """Bring the scratch state to `position` matches (caller holds self._lock)"""
+        if not 0 <= position <= len(self.matches):
+            raise IndexError(f"position {position} outside the history (0..{len(self.matches)})")
+        checkpoint = position // self.checkpoint_every
+        # Replay forward from the cursor when that's no further than from the checkpoint
+        if not checkpoint * self.checkpoint_every <= self._cursor <= position:
+            self.state.engine.load_state_dict(self.checkpoints[checkpoint])
+            self._cursor = checkpoint * self.checkpoint_every
+        self.state.engine.replay(self.matches[self._cursor:position])
+        self._cursor = position
+
+    def features_as_of(self, team1: str, team2: str, venue: str, toss_winner: str, toss_decision: str,
+                       match_id=None, date=None) -> Dict[str, float]:
+        """selected_features for a fixture as of just before `match_id` (or `date`)"""
+        with self._lock:
+            self._seek(self.position(match_id, date))
+            return self.state.features(team1, team2, venue, toss_winner, toss_decision)
+
+    def features_before(self, match_id) -> Dict[str, float]:
+        """selected_features of a historical match as the model would have seen them pre-match"""
+        position = self.positions[match_id]
+        with self._lock:
+            self._seek(position)
+            return self.state.features(*self.fixtures[position])
+
+    def features_for_matches(self, match_ids: Optional[Iterable] = None) -> pd.DataFrame:
+        """
+        Pre-match selected_features for many historical matches (default: all of them).
+
+        The requested matches are visited in history order, so the state only
+        ever moves forward: the whole history costs one pass.
+
+        Returns:
+            pd.DataFrame: One row per match, indexed by match_id.
+        """
+        ids = self.match_ids.tolist() if match_ids is None else list(match_ids)
+        order = sorted(range(len(ids)), key=lambda i: self.positions[ids[i]])
+        rows: List[Optional[Dict[str, float]]] = [None] * len(ids)
+        with self._lock:
+            for i in order:
+                position = self.positions[ids[i]]
+                self._seek(position)
+                rows[i] = self.state.features(*self.fixtures[position])
+        return pd.DataFrame(rows, columns=selected_features, index=pd.Index(ids, name="match_id"), dtype=np.float64)
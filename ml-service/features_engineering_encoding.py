@@ -1,241 +1,806 @@
 import pandas as pd
-from collections import deque
-from collections import defaultdict
+import numpy as np
+from collections import namedtuple
+from types import SimpleNamespace
+
+from normalization import Vocabulary
+
+
+# ---------------------------------------------------------------------------
+# Streaming feature engine
+#
+# Every feature family is an accumulator that walks the match history in
+# order: snapshot(match) returns the pre-match (leak-free) features as a tuple
+# aligned with `columns`, update(match) folds the match result into the state.
+# FeatureEngine drives any set of accumulators over the history in one pass.
+#
+# Teams and venues are encoded once into small integer IDs (FeatureEngine's
+# vocabularies), so accumulator state lives in NumPy arrays indexed by ID.
+# Vectorized accumulators accept arrays of IDs in snapshot(), which lets
+# snapshot_many() score thousands of fixtures with a handful of array ops.
+# A missing team/venue encodes as Vocabulary.MISSING (-1), which indexes a
+# scratch slot one past the last ID: it absorbs the update and is zeroed
+# again right after, so it always reads like a label with no history.
+# ---------------------------------------------------------------------------
+
+TEAM_FIELDS = ("team1", "team2", "toss_winner", "winner")
+VENUE_FIELDS = ("venue",)
+
+
+class FeatureAccumulator:
+    columns = ()    # feature columns produced by snapshot(), in order
+    fields = ()     # match fields read by snapshot()/update()
+    vectorized = True   # snapshot() also works on arrays of team/venue IDs
+    window_columns = ()     # columns that depend on the value set by set_window()
+
+    def __init__(self):
+        # State arrays: name -> (shape with "team"/"venue" for the ID axes, dtype)
+        self.state = {}
+
+    def resize(self, n_teams, n_venues):
+        """(Re)allocate the state arrays for the given ID capacities (+1 scratch slot), keeping existing values"""
+        sizes = {"team": n_teams + 1, "venue": n_venues + 1}
+        for name, (axes, dtype) in self.state.items():
+            shape = tuple(sizes[a] if isinstance(a, str) else a for a in axes)
+            old = getattr(self, name, None)
+            if old is not None and old.shape == shape:
+                continue
+            new = np.zeros(shape, dtype=dtype)
+            if old is not None:
+                # The old scratch slot isn't carried over: it lands on a real ID now
+                real = tuple(slice(0, n - 1) if isinstance(a, str) else slice(0, n) for a, n in zip(axes, old.shape))
+                new[real] = old[real]
+            setattr(self, name, new)
+
+    def clear_missing(self):
+        """Zero the scratch slot (ID -1) on every team/venue axis"""
+        for name, (axes, _) in self.state.items():
+            values = getattr(self, name)
+            for axis, a in enumerate(axes):
+                if isinstance(a, str):
+                    index = [slice(None)] * values.ndim
+                    index[axis] = Vocabulary.MISSING
+                    values[tuple(index)] = 0
+
+    def _ring(self, prefix, axis, window, dtype=np.int64):
+        """Declare a per-ID window (deque(maxlen=window) semantics) with a running sum"""
+        self.state.update({
+            f"{prefix}_buf": ((axis, window), dtype),
+            f"{prefix}_pos": ((axis,), np.int64),
+            f"{prefix}_len": ((axis,), np.int64),
+            f"{prefix}_sum": ((axis,), dtype),
+        })
 
+    def _push(self, prefix, i, value):
+        buf, pos, length, total = (getattr(self, f"{prefix}_{k}") for k in ("buf", "pos", "len", "sum"))
+        p = pos[i]
+        if length[i] == buf.shape[1]:
+            total[i] -= buf[i, p]
+        else:
+            length[i] += 1
+        buf[i, p] = value
+        total[i] += value
+        pos[i] = (p + 1) % buf.shape[1]
+
+    def _last(self, prefix, i, n):
+        """(sum, count) of the newest n values of a _ring window, for one ID or an array of IDs"""
+        buf, pos, length, total = (getattr(self, f"{prefix}_{k}") for k in ("buf", "pos", "len", "sum"))
+        if n >= buf.shape[1]:
+            return total[i], length[i]
+        count = np.minimum(length[i], n)
+        slots = (np.asarray(pos[i])[..., None] - 1 - np.arange(n)) % buf.shape[1]   # newest first
+        values = buf[np.asarray(i)[..., None], slots]
+        return np.where(np.arange(n) < np.asarray(count)[..., None], values, 0).sum(axis=-1), count
+
+    def set_window(self, value):
+        """Make snapshot() read the window_columns as if built with this window (see MultiWindowAccumulator)"""
+        raise NotImplementedError
+
+    def snapshot(self, match):
+        raise NotImplementedError
+
+    def update(self, match):
+        raise NotImplementedError
+
+
+class FeatureEngine:
+    def __init__(self, accumulators, teams=None, venues=None):
+        self.accumulators = list(accumulators)
+        self.columns = [c for acc in self.accumulators for c in acc.columns]
+        self.fields = sorted({f for acc in self.accumulators for f in acc.fields})
+        self._id_fields = [f for f in self.fields if f in TEAM_FIELDS + VENUE_FIELDS]
+        self.teams = teams if teams is not None else Vocabulary()
+        self.venues = venues if venues is not None else Vocabulary()
+        self._capacity = (0, 0)
+        self._reserve()
+
+    def _reserve(self):
+        """Grow every accumulator's state to cover the vocabularies (geometrically, to avoid repeated copies)"""
+        n_teams, n_venues = len(self.teams), len(self.venues)
+        cap_teams, cap_venues = self._capacity
+        if self._capacity != (0, 0) and n_teams <= cap_teams and n_venues <= cap_venues:
+            return
+        if n_teams > cap_teams or cap_teams == 0:
+            cap_teams = max(n_teams, 2 * cap_teams, 8)
+        if n_venues > cap_venues or cap_venues == 0:
+            cap_venues = max(n_venues, 2 * cap_venues, 8)
+        for acc in self.accumulators:
+            acc.resize(cap_teams, cap_venues)
+        self._capacity = (cap_teams, cap_venues)
+
+    def _encode(self, match):
+        """Match fields with teams/venue replaced by their IDs"""
+        if isinstance(match, dict):
+            values = dict(match)
+        elif hasattr(match, "_asdict"):
+            values = match._asdict()
+        else:
+            values = dict(vars(match))
+        for f in TEAM_FIELDS:
+            if f in values:
+                values[f] = self.teams.encode(values[f])
+        for f in VENUE_FIELDS:
+            if f in values:
+                values[f] = self.venues.encode(values[f])
+        self._reserve()
+        return SimpleNamespace(**values)
+
+    def _settle(self, match):
+        """Clear the scratch slot after folding a match with a missing team/venue"""
+        if any(getattr(match, f, None) == Vocabulary.MISSING for f in self._id_fields):
+            for acc in self.accumulators:
+                acc.clear_missing()
+
+    def _encoded_columns(self, df):
+        columns = []
+        for f in self.fields:
+            if f in TEAM_FIELDS:
+                columns.append(self.teams.encode_many(df[f]).tolist())
+            elif f in VENUE_FIELDS:
+                columns.append(self.venues.encode_many(df[f]).tolist())
+            else:
+                columns.append(df[f].tolist())
+        self._reserve()
+        return columns
+
+    def snapshot(self, match):
+        """Pre-match features for a single match (namedtuple, object or dict of fields)"""
+        match = self._encode(match)
+        values = []
+        for acc in self.accumulators:
+            values.extend(acc.snapshot(match))
+        return dict(zip(self.columns, values))
+
+    def snapshot_many(self, fixtures):
+        """
+        Pre-match features for many fixtures against the current state.
+
+        Args:
+            fixtures (dict): Equal-length sequences per match field (team1, team2, venue, ...).
+
+        Returns:
+            np.ndarray: (n_fixtures, len(columns)) float64 matrix.
+        """
+        values = {}
+        for f, column in fixtures.items():
+            if f in TEAM_FIELDS:
+                values[f] = self.teams.encode_many(column)
+            elif f in VENUE_FIELDS:
+                values[f] = self.venues.encode_many(column)
+            else:
+                values[f] = np.asarray(column)
+        self._reserve()
+        n = len(next(iter(values.values())))
+        batch = SimpleNamespace(**values)
+
+        blocks = []
+        for acc in self.accumulators:
+            if acc.vectorized:
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    cols = acc.snapshot(batch)
+                blocks.append(np.column_stack([np.broadcast_to(np.asarray(c, dtype=np.float64), (n,)) for c in cols]))
+            else:
+                rows = [acc.snapshot(SimpleNamespace(**{f: v[i] for f, v in values.items()})) for i in range(n)]
+                blocks.append(np.array(rows, dtype=np.float64).reshape(n, len(acc.columns)))
+        return np.hstack(blocks)
+
+    def update(self, match):
+        """Fold one completed match into every accumulator"""
+        match = self._encode(match)
+        for acc in self.accumulators:
+            acc.update(match)
+        self._settle(match)
+
+    def encode_matches(self, df):
+        """Every row of df (current order) as an encoded Match namedtuple, ready for replay()"""
+        Match = namedtuple("Match", self.fields)
+        return [Match._make(values) for values in zip(*self._encoded_columns(df))]
+
+    def replay(self, matches):
+        """Fold already-encoded matches (from encode_matches) into the state"""
+        accumulators = self.accumulators
+        for match in matches:
+            for acc in accumulators:
+                acc.update(match)
+            self._settle(match)
+
+    def fold(self, df):
+        """Fold every match in df (current row order) into the state without recording features"""
+        self.replay(self.encode_matches(df))
+
+    def state_dict(self):
+        """Copy of every accumulator's state arrays (the vocabularies are shared, not copied)"""
+        return {
+            "capacity": self._capacity,
+            "accumulators": [{name: getattr(acc, name).copy() for name in acc.state} for acc in self.accumulators],
+        }
 
-def calculate_rolling_stats(df):
-    team_stats = {}
-    venue_stats = {}        # {venue: {team: {"matches": int, "wins": int}}}
-    h2h_stats = {}          # {(team1, team2): {"matches": int, "wins": int}}
-
-    features = []
-
-    for _, row in df.iterrows():
-        t1, t2 = row["team1"], row["team2"]
-        venue = row["venue"]
-
-        # Initialize team stats
-        for team in [t1, t2]:
-            if team not in team_stats:
-                team_stats[team] = {"matches": 0, "wins": 0, "streak": 0, "recent": []}
-
-        # Initialize venue stats
-        if venue not in venue_stats:
-            venue_stats[venue] = {}
-        for team in [t1, t2]:
-            if team not in venue_stats[venue]:
-                venue_stats[venue][team] = {"matches": 0, "wins": 0}
-
-        # Initialize h2h stats
-        for a, b in [(t1, t2), (t2, t1)]:
-            if (a, b) not in h2h_stats:
-                h2h_stats[(a, b)] = {"matches": 0, "wins": 0}
-
-        # -------- GET FEATURES *BEFORE* MATCH -------- #
-        def get_team_features(team_f):
-            stats = team_stats[team_f]
-            matches, wins, streak, recent = stats["matches"], stats["wins"], stats["streak"], stats["recent"]
-            win_ratio = wins / matches if matches > 0 else 0.5
-            recent_form = sum(recent[-5:]) / min(len(recent), 5) if recent else 0.5
-            return win_ratio, recent_form, streak
-
-        def get_venue_features(team):
-            vstats = venue_stats[venue][team]
-            return vstats["wins"] / vstats["matches"] if vstats["matches"] > 0 else 0.5
-
-        def get_h2h_features(team_a, team_b):
-            hstats = h2h_stats[(team_a, team_b)]
-            return hstats["wins"] / hstats["matches"] if hstats["matches"] > 0 else 0.5
-
-        # Team stats
-        t1_wr, t1_form, t1_streak = get_team_features(t1)
-        t2_wr, t2_form, t2_streak = get_team_features(t2)
-
-        # Venue stats
-        t1_venue_wr = get_venue_features(t1)
-        t2_venue_wr = get_venue_features(t2)
-
-        # H2H stats
-        h2h_wr = get_h2h_features(t1, t2)
-
-        # Save features BEFORE current match is updated
-        features.append({
-            "team1_win_ratio": t1_wr,
-            "team2_win_ratio": t2_wr,
-            "team1_recent_form": t1_form,
-            "team2_recent_form": t2_form,
-            "team1_streak": t1_streak,
-            "team2_streak": t2_streak,
-            "venue_team1_winrate": t1_venue_wr,
-            "venue_team2_winrate": t2_venue_wr,
-            "head_to_head_winrate": h2h_wr,
-        })
+    def load_state_dict(self, state):
+        """Restore a state_dict() copy; IDs added to the vocabularies since then start from zero"""
+        for acc, arrays in zip(self.accumulators, state["accumulators"]):
+            for name, values in arrays.items():
+                setattr(acc, name, values.copy())
+        self._capacity = state["capacity"]
+        self._reserve()
+
+    def run(self, df):
+        """
+        Walks df once in its current row order.
+
+        Returns:
+            pd.DataFrame: One row of pre-match features per match (RangeIndex).
+        """
+        Match = namedtuple("Match", self.fields)
+        accumulators = self.accumulators
+        rows = []
+        for values in zip(*self._encoded_columns(df)):
+            match = Match._make(values)
+            row = []
+            for acc in accumulators:
+                row.extend(acc.snapshot(match))
+            for acc in accumulators:
+                acc.update(match)
+            self._settle(match)
+            rows.append(row)
+        return pd.DataFrame(rows, columns=self.columns)
+
+
+class MultiWindowAccumulator(FeatureAccumulator):
+    """
+    One accumulator read at several window settings in a single pass.
+
+    The wrapped accumulator is built with the widest setting, so its state
+    covers every narrower one; snapshot() emits its window_columns once per
+    setting, named "<column>@<value>", with exactly the values an accumulator
+    built with that setting would give. Other columns aren't repeated.
+    """
 
-        # -------- UPDATE AFTER MATCH (safe: only affects future matches) -------- #
-        winner = row["winner"]
+    def __init__(self, factory, values):
+        self.__dict__["base"] = factory(max(values))
+        self.values = sorted(set(values))
+        self.default = max(values)
+        self.fields = self.base.fields
+        self.vectorized = self.base.vectorized
+        self.columns = tuple(f"{c}@{v}" for v in self.values for c in self.base.window_columns)
+        self._positions = [self.base.columns.index(c) for c in self.base.window_columns]
+
+    @property
+    def state(self):
+        return self.base.state
+
+    # State arrays live on the wrapped accumulator
+    def __getattr__(self, name):
+        return getattr(self.__dict__["base"], name)
+
+    def __setattr__(self, name, value):
+        if "base" in self.__dict__ and name in self.base.state:
+            setattr(self.base, name, value)
+        else:
+            self.__dict__[name] = value
+
+    def resize(self, n_teams, n_venues):
+        self.base.resize(n_teams, n_venues)
+
+    def clear_missing(self):
+        self.base.clear_missing()
+
+    def snapshot(self, match):
+        values = []
+        try:
+            for v in self.values:
+                self.base.set_window(v)
+                row = self.base.snapshot(match)
+                values.extend(row[i] for i in self._positions)
+        finally:
+            self.base.set_window(self.default)
+        return values
+
+    def update(self, match):
+        self.base.update(match)
+
+
+def _rate(num, den, default):
+    """num / den, or default where den is 0 (scalars or arrays)"""
+    if np.ndim(den) == 0:
+        return num / den if den > 0 else default
+    return np.where(den > 0, num / np.maximum(den, 1), default)
+
+
+def _where(cond, value_fn, default):
+    """value_fn() where cond holds, else default; value_fn is only called for a true scalar cond"""
+    if np.ndim(cond) == 0:
+        return value_fn() if cond else default
+    return np.where(cond, value_fn(), default)
+
+
+class RollingStatsAccumulator(FeatureAccumulator):
+    """Team win ratio / recent form / streak, venue win rate and head-to-head win rate"""
+    columns = (
+        "team1_win_ratio", "team2_win_ratio",
+        "team1_recent_form", "team2_recent_form",
+        "team1_streak", "team2_streak",
+        "venue_team1_winrate", "venue_team2_winrate",
+        "head_to_head_winrate",
+    )
+    fields = ("team1", "team2", "venue", "winner")
+    window_columns = ("team1_recent_form", "team2_recent_form")
+
+    def __init__(self, form_window=5):
+        super().__init__()
+        self.form_window = form_window
+        self.state.update({
+            "matches": (("team",), np.int64),
+            "wins": (("team",), np.int64),
+            "streak": (("team",), np.int64),
+            "venue_matches": (("venue", "team"), np.int64),
+            "venue_wins": (("venue", "team"), np.int64),
+            "h2h_matches": (("team", "team"), np.int64),     # [team, opp]
+            "h2h_wins": (("team", "team"), np.int64),
+        })
+        self._ring("recent", "team", form_window)
+        self.view = form_window
+
+    def set_window(self, value):
+        if not 0 < value <= self.form_window:
+            raise ValueError(f"form window {value} outside 1..{self.form_window}")
+        self.view = value
+
+    def _team(self, team):
+        return (_rate(self.wins[team], self.matches[team], 0.5),
+                _rate(*self._last("recent", team, self.view), 0.5),
+                self.streak[team])
+
+    def snapshot(self, match):
+        t1, t2, venue = match.team1, match.team2, match.venue
+        t1_wr, t1_form, t1_streak = self._team(t1)
+        t2_wr, t2_form, t2_streak = self._team(t2)
+        return (
+            t1_wr, t2_wr, t1_form, t2_form, t1_streak, t2_streak,
+            _rate(self.venue_wins[venue, t1], self.venue_matches[venue, t1], 0.5),
+            _rate(self.venue_wins[venue, t2], self.venue_matches[venue, t2], 0.5),
+            _rate(self.h2h_wins[t1, t2], self.h2h_matches[t1, t2], 0.5),
+        )
 
-        for team in [t1, t2]:
-            team_stats[team]["matches"] += 1
-            if team == winner:
-                team_stats[team]["wins"] += 1
-                team_stats[team]["streak"] = max(1, team_stats[team]["streak"] + 1)
-                team_stats[team]["recent"].append(1)
+    def update(self, match):
+        t1, t2, venue, winner = match.team1, match.team2, match.venue, match.winner
+        for team in (t1, t2):
+            self.matches[team] += 1
+            won = team == winner
+            if won:
+                self.wins[team] += 1
+                self.streak[team] = max(1, self.streak[team] + 1)
             else:
-                team_stats[team]["streak"] = min(-1, team_stats[team]["streak"] - 1)
-                team_stats[team]["recent"].append(0)
+                self.streak[team] = min(-1, self.streak[team] - 1)
+            self._push("recent", team, 1 if won else 0)
 
-        for team in [t1, t2]:
-            venue_stats[venue][team]["matches"] += 1
-            if team == winner:
-                venue_stats[venue][team]["wins"] += 1
+            self.venue_matches[venue, team] += 1
+            if won:
+                self.venue_wins[venue, team] += 1
 
-        h2h_stats[(t1, t2)]["matches"] += 1
-        h2h_stats[(t2, t1)]["matches"] += 1
+        self.h2h_matches[t1, t2] += 1
+        self.h2h_matches[t2, t1] += 1
         if winner == t1:
-            h2h_stats[(t1, t2)]["wins"] += 1
+            self.h2h_wins[t1, t2] += 1
         elif winner == t2:
-            h2h_stats[(t2, t1)]["wins"] += 1
+            self.h2h_wins[t2, t1] += 1
 
-    # Merge rolling features into original dataframe
-    feats_df = pd.DataFrame(features)
-    df = df.reset_index(drop=True)
-    df = pd.concat([df, feats_df], axis=1)
+BATTING_METRICS = [
+    ("avg_pp_runs", "pp_runs"), ("avg_mo_runs", "mo_runs"), ("avg_do_runs", "do_runs"),
+    ("avg_pp_wickets", "pp_wickets"), ("avg_mo_wickets", "mo_wickets"), ("avg_do_wickets", "do_wickets"),
+    ("avg_run_rate", "run_rate"), ("avg_boundaries", "boundaries"), ("avg_dot_rate", "dot_ball_rate"),
+]
+BOWLING_METRICS = ["avg_economy_rate", "avg_wicket_rate", "avg_dot_rate"]
 
-    return df
 
-def compute_rolling_features_balls(df, prior_matches=20):
+class BallRollingAccumulator(FeatureAccumulator):
     """
-    Computes all specified rolling features for each team and match,
-    including phase-wise scores, composite indices, and player form metrics.
+    Rolling batting/bowling averages over each team's last `prior_matches` innings.
 
-    Args:
-        df (pd.DataFrame): The match-level data with innings details.
-        prior_matches (int): Number of previous matches to consider for rolling averages.
-
-    Returns:
-        pd.DataFrame: The original dataframe with added rolling features.
+    Each team's window is a fixed-size ring buffer of per-innings metric rows,
+    so a snapshot reads at most `prior_matches` rows whatever the history
+    length. Windows are re-summed (oldest first, NaN skipped like
+    DataFrame.mean()) instead of kept as add/subtract running sums, which
+    would drift from the exact means in the last bits.
     """
-    df = df.copy().sort_values("match_id").reset_index(drop=True)
-
-    # Initialize defaultdicts for historical stats
-    team_stats = defaultdict(lambda: {'batting': [], 'bowling': []})
-
-    # Storage for the new features
-    rolling_features = []
-
-    for idx, row in df.iterrows():
-        match_id = row['match_id']
-        t1, t2 = row['team1'], row['team2']
-
-        # --- 1. Compute pre-match (leak-free) rolling features ---
-        current_features = {'match_id': match_id}
-
-        def get_rolling_stats(team_name):
-            stats = {'batting': {}, 'bowling': {}}
-
-            # Batting metrics
-            batting_hist = pd.DataFrame(team_stats[team_name]['batting']).tail(prior_matches)
-            if not batting_hist.empty:
-                stats['batting']['avg_pp_runs'] = batting_hist['pp_runs'].mean()
-                stats['batting']['avg_mo_runs'] = batting_hist['mo_runs'].mean()
-                stats['batting']['avg_do_runs'] = batting_hist['do_runs'].mean()
-                stats['batting']['avg_pp_wickets'] = batting_hist['pp_wickets'].mean()
-                stats['batting']['avg_mo_wickets'] = batting_hist['mo_wickets'].mean()
-                stats['batting']['avg_do_wickets'] = batting_hist['do_wickets'].mean()
-                stats['batting']['avg_run_rate'] = batting_hist['run_rate'].mean()
-                stats['batting']['avg_boundaries'] = batting_hist['boundaries'].mean()
-                stats['batting']['avg_dot_rate'] = batting_hist['dot_ball_rate'].mean()
-            else:
-                for k in ['avg_pp_runs', 'avg_mo_runs', 'avg_do_runs', 'avg_pp_wickets', 'avg_mo_wickets', 'avg_do_wickets', 'avg_run_rate', 'avg_boundaries', 'avg_dot_rate']:
-                    stats['batting'][k] = 0.0
-
-            # Bowling metrics
-            bowling_hist = pd.DataFrame(team_stats[team_name]['bowling']).tail(prior_matches)
-            if not bowling_hist.empty:
-                stats['bowling']['avg_economy_rate'] = bowling_hist['economy_rate'].mean()
-                stats['bowling']['avg_wicket_rate'] = bowling_hist['wicket_rate'].mean()
-                stats['bowling']['avg_dot_rate'] = bowling_hist['dot_ball_rate'].mean()
-            else:
-                for k in ['avg_economy_rate', 'avg_wicket_rate', 'avg_dot_rate']:
-                    stats['bowling'][k] = 0.0
 
-            return stats
+    def __init__(self, prior_matches=20):
+        super().__init__()
+        self.prior_matches = prior_matches
+        # A team bats and bowls once per match, so one ring holds both: batting metrics then bowling
+        self.state.update({
+            "window_buf": (("team", prior_matches, len(BATTING_METRICS) + len(BOWLING_METRICS)), np.float64),
+            "window_pos": (("team",), np.int64),
+            "window_len": (("team",), np.int64),
+        })
+        self.view = prior_matches
+
+        columns = []
+        for stat_type, keys in (("batting", [k for k, _ in BATTING_METRICS]), ("bowling", BOWLING_METRICS)):
+            columns += [f"team1_{stat_type}_{k}" for k in keys]
+            for k in keys:
+                columns += [f"team2_{stat_type}_{k}", f"team_diff_{stat_type}_{k}"]
+        columns += ["team1_batting_index", "team2_batting_index", "batting_index_diff",
+                    "team1_bowling_index", "team2_bowling_index", "bowling_index_diff"]
+        self.columns = self.window_columns = tuple(columns)
+
+        self._batting_fields = {
+            innings: [f"innings{innings}_{src}" for _, src in BATTING_METRICS] for innings in (1, 2)
+        }
+        self._bowling_fields = {
+            innings: [f"innings{innings}_{src}" for src in ("balls_bowled", "total_runs", "total_wickets", "dot_balls")]
+            for innings in (1, 2)
+        }
+        self.fields = ("team1", "team2") + tuple(
+            f for innings in (1, 2) for f in self._batting_fields[innings] + self._bowling_fields[innings]
+        )
+
+    def _window_means(self, teams):
+        """(len(teams), batting + bowling width) window means; 0.0 for teams without history"""
+        buf, pos, lengths = self.window_buf, self.window_pos, np.minimum(self.window_len[teams], self.view)
+        means = np.zeros((len(teams), buf.shape[2]))
+        groups = lengths if len(teams) <= 2 else np.unique(lengths)
+        for n in set(groups[groups > 0].tolist()):
+            rows = np.flatnonzero(lengths == n)
+            # Ring slots oldest -> newest, laid out (team, metric, innings) so every
+            # window is reduced in the same order as a per-team column mean
+            slots = (pos[teams[rows]][:, None] - n + np.arange(n)) % buf.shape[1]
+            arr = np.ascontiguousarray(buf[teams[rows][:, None], slots].transpose(0, 2, 1))
+            mask = np.isnan(arr)
+            counts = (~mask).sum(axis=2)
+            sums = np.where(mask, 0.0, arr).sum(axis=2)
+            means[rows] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+        return means
+
+    def set_window(self, value):
+        if not 0 < value <= self.prior_matches:
+            raise ValueError(f"prior_matches {value} outside 1..{self.prior_matches}")
+        self.view = value
+
+    def snapshot(self, match):
+        scalar = np.ndim(match.team1) == 0
+        team1, team2 = np.atleast_1d(match.team1), np.atleast_1d(match.team2)
+        means = self._window_means(np.concatenate([team1, team2])).T
+        n_bat, n = len(BATTING_METRICS), len(team1)
+        t1_bat, t2_bat = means[:n_bat, :n], means[:n_bat, n:]
+        t1_bowl, t2_bowl = means[n_bat:, :n], means[n_bat:, n:]
+
+        values = list(t1_bat)
+        for a, b in zip(t1_bat, t2_bat):
+            values += [b, a - b]
+        values += list(t1_bowl)
+        for a, b in zip(t1_bowl, t2_bowl):
+            values += [b, a - b]
+
+        # Composite indexes (run_rate, boundaries, dot_rate) / (economy, wicket_rate, dot_rate)
+        t1_bat_idx = t1_bat[6] * 0.5 + t1_bat[7] * 0.3 - t1_bat[8] * 0.2
+        t2_bat_idx = t2_bat[6] * 0.5 + t2_bat[7] * 0.3 - t2_bat[8] * 0.2
+        t1_bowl_idx = t1_bowl[0] * -0.5 + t1_bowl[1] * 0.3 + t1_bowl[2] * 0.2
+        t2_bowl_idx = t2_bowl[0] * -0.5 + t2_bowl[1] * 0.3 + t2_bowl[2] * 0.2
+        values += [t1_bat_idx, t2_bat_idx, t1_bat_idx - t2_bat_idx,
+                   t1_bowl_idx, t2_bowl_idx, t1_bowl_idx - t2_bowl_idx]
+        return [v[0] for v in values] if scalar else values
+
+    def _bowling(self, match, innings):
+        balls, runs, wickets, dots = (getattr(match, f) for f in self._bowling_fields[innings])
+        return [
+            (runs / balls) * 6 if balls > 0 else 0,
+            wickets / balls if balls > 0 else 0,
+            dots / balls if balls > 0 else 0,
+        ]
+
+    def update(self, match):
+        # Innings 1: team1 batting, team2 bowling; innings 2: team2 batting, team1 bowling
+        for team, batting_innings, bowling_innings in ((match.team1, 1, 2), (match.team2, 2, 1)):
+            row = [getattr(match, f) for f in self._batting_fields[batting_innings]] + self._bowling(match, bowling_innings)
+            p = self.window_pos[team]
+            self.window_buf[team, p] = row
+            self.window_pos[team] = (p + 1) % self.prior_matches
+            if self.window_len[team] < self.prior_matches:
+                self.window_len[team] += 1
+
+
+class TossStatsAccumulator(FeatureAccumulator):
+    """Toss win / bat rates, toss conversion, venue toss conversion, lost-toss and form-toss boost"""
+    columns = (
+        "team1_recent_toss_winrate", "team2_recent_toss_winrate",
+        "team1_recent_toss_bat_rate", "team2_recent_toss_bat_rate",
+        "team1_toss_match_winrate", "team2_toss_match_winrate",
+        "toss_match_winrate_diff",
+        "venue_toss_winrate",
+        "team1_lost_toss_winrate", "team2_lost_toss_winrate",
+        "team1_form_toss_boost", "team2_form_toss_boost",
+        "recent_toss_winrate_diff", "lost_toss_winrate_diff", "form_toss_boost_diff", "recent_toss_bat_rate_diff",
+    )
+    fields = ("team1", "team2", "venue", "toss_winner", "toss_decision", "winner")
+    window_columns = ("team1_form_toss_boost", "team2_form_toss_boost", "form_toss_boost_diff")
+
+    def __init__(self, window=5):
+        super().__init__()
+        self.window = window
+        self.state.update({
+            "toss_wins": (("team",), np.int64), "toss_total": (("team",), np.int64),
+            "toss_bat": (("team",), np.int64), "toss_bat_total": (("team",), np.int64),
+            "toss_match_wins": (("team",), np.int64), "toss_match_total": (("team",), np.int64),   # wins after toss, toss wins
+            "venue_toss_wins": (("venue",), np.int64), "venue_toss_total": (("venue",), np.int64),
+            "lost_toss_wins": (("team",), np.int64), "lost_toss_total": (("team",), np.int64),
+            "form_toss_wins": (("team",), np.int64), "form_toss_total": (("team",), np.int64),     # wins_with_form, total_with_form
+        })
+        self._ring("form", "team", window)
+        self.view = window
+
+    def set_window(self, value):
+        if not 0 < value <= self.window:
+            raise ValueError(f"toss window {value} outside 1..{self.window}")
+        self.view = value
+
+    def _form_boost(self, team):
+        (form, length), total = self._last("form", team, self.view), self.form_toss_total[team]
+        return _where((length > 0) & (total > 0),
+                      lambda: self.form_toss_wins[team] / np.maximum(total, 1) - form / np.maximum(length, 1),
+                      0.0)
+
+    def snapshot(self, match):
+        t1, t2 = match.team1, match.team2
+        t1_toss = _rate(self.toss_wins[t1], self.toss_total[t1], 0.5)
+        t2_toss = _rate(self.toss_wins[t2], self.toss_total[t2], 0.5)
+        t1_bat = _rate(self.toss_bat[t1], self.toss_bat_total[t1], 0.5)
+        t2_bat = _rate(self.toss_bat[t2], self.toss_bat_total[t2], 0.5)
+        t1_conv = _rate(self.toss_match_wins[t1], self.toss_match_total[t1], 0.5)
+        t2_conv = _rate(self.toss_match_wins[t2], self.toss_match_total[t2], 0.5)
+        venue_conv = _rate(self.venue_toss_wins[match.venue], self.venue_toss_total[match.venue], 0.5)
+        t1_lost = _rate(self.lost_toss_wins[t1], self.lost_toss_total[t1], 0.5)
+        t2_lost = _rate(self.lost_toss_wins[t2], self.lost_toss_total[t2], 0.5)
+        t1_boost = self._form_boost(t1)
+        t2_boost = self._form_boost(t2)
+        return (
+            t1_toss, t2_toss, t1_bat, t2_bat, t1_conv, t2_conv, t1_conv - t2_conv, venue_conv,
+            t1_lost, t2_lost, t1_boost, t2_boost,
+            t1_toss - t2_toss, t1_lost - t2_lost, t1_boost - t2_boost, t1_bat - t2_bat,
+        )
 
-        t1_stats = get_rolling_stats(t1)
-        t2_stats = get_rolling_stats(t2)
+    def update(self, match):
+        t1, t2, toss_winner, winner, venue = match.team1, match.team2, match.toss_winner, match.winner, match.venue
 
-        # Populate features for team 1 and team 2
-        for stat_type in ['batting', 'bowling']:
-            for k, v in t1_stats[stat_type].items():
-                current_features[f'team1_{stat_type}_{k}'] = v
-            for k, v in t2_stats[stat_type].items():
-                current_features[f'team2_{stat_type}_{k}'] = v
-                current_features[f'team_diff_{stat_type}_{k}'] = t1_stats[stat_type].get(k, 0) - t2_stats[stat_type].get(k, 0)
+        self.toss_wins[toss_winner] += 1
+        self.toss_total[toss_winner] += 1
+        loser = t1 if toss_winner == t2 else t2
+        self.toss_total[loser] += 1
 
-        # --- 2. Calculate Composite Features ---
-        current_features['team1_batting_index'] = (current_features['team1_batting_avg_run_rate'] * 0.5) + \
-                                                (current_features['team1_batting_avg_boundaries'] * 0.3) - \
-                                                (current_features['team1_batting_avg_dot_rate'] * 0.2)
+        self.toss_bat_total[toss_winner] += 1
+        if match.toss_decision == "bat":
+            self.toss_bat[toss_winner] += 1
 
-        current_features['team2_batting_index'] = (current_features['team2_batting_avg_run_rate'] * 0.5) + \
-                                                (current_features['team2_batting_avg_boundaries'] * 0.3) - \
-                                                (current_features['team2_batting_avg_dot_rate'] * 0.2)
+        self.toss_match_total[toss_winner] += 1
+        self.venue_toss_total[venue] += 1
+        if toss_winner == winner:
+            self.toss_match_wins[toss_winner] += 1
+            self.venue_toss_wins[venue] += 1
 
-        current_features['batting_index_diff'] = current_features['team1_batting_index'] - current_features['team2_batting_index']
+        for team in (t1, t2):
+            if toss_winner != team:
+                self.lost_toss_total[team] += 1
+                if winner == team:
+                    self.lost_toss_wins[team] += 1
 
-        current_features['team1_bowling_index'] = (current_features['team1_bowling_avg_economy_rate'] * -0.5) + \
-                                                 (current_features['team1_bowling_avg_wicket_rate'] * 0.3) + \
-                                                 (current_features['team1_bowling_avg_dot_rate'] * 0.2)
+        for team in (t1, t2):
+            self._push("form", team, 1 if winner == team else 0)
+        if toss_winner == winner:
+            self.form_toss_wins[toss_winner] += 1
+        self.form_toss_total[toss_winner] += 1
 
-        current_features['team2_bowling_index'] = (current_features['team2_bowling_avg_economy_rate'] * -0.5) + \
-                                                 (current_features['team2_bowling_avg_wicket_rate'] * 0.3) + \
-                                                 (current_features['team2_bowling_avg_dot_rate'] * 0.2)
 
-        current_features['bowling_index_diff'] = current_features['team1_bowling_index'] - current_features['team2_bowling_index']
+class HeadToHeadTossAccumulator(FeatureAccumulator):
+    """Laplace-smoothed toss conversion of each team against this opponent"""
+    columns = window_columns = ("team1_h2h_toss_advantage", "team2_h2h_toss_advantage", "h2h_toss_advantage_diff")
+    fields = ("team1", "team2", "toss_winner", "winner")
 
-        rolling_features.append(current_features)
+    def __init__(self, prior_matches=4):
+        super().__init__()
+        self.set_window(prior_matches)
+        self.state.update({
+            "h2h_toss_wins": (("team", "team"), np.int64),        # [team, opp]
+            "h2h_toss_converted": (("team", "team"), np.int64),
+        })
 
-        # --- 3. Update historical stats AFTER the match ---
-        # Innings 1 data (team1 batting, team2 bowling)
-        innings1_data = row.filter(like='innings1_').to_dict()
-        innings1_data = {k.replace('innings1_', ''): v for k, v in innings1_data.items()}
+    def set_window(self, value):
+        # The prior only enters at snapshot time, so any value can be read from the same counts
+        self.prior_matches = value
+        self.prior_converted = value / 2  # prior ~50% conversion rate
+
+    def _advantage(self, team, opp):
+        toss_wins = self.h2h_toss_wins[team, opp]
+        # no history → neutral
+        return _where(toss_wins > 0,
+                      lambda: (self.h2h_toss_converted[team, opp] + self.prior_converted) / (toss_wins + self.prior_matches),
+                      0.5)
+
+    def snapshot(self, match):
+        t1_adv = self._advantage(match.team1, match.team2)
+        t2_adv = self._advantage(match.team2, match.team1)
+        return t1_adv, t2_adv, t1_adv - t2_adv
+
+    def update(self, match):
+        t1, t2, toss_winner, winner = match.team1, match.team2, match.toss_winner, match.winner
+        for team, opp in ((t1, t2), (t2, t1)):
+            if toss_winner == team:
+                self.h2h_toss_wins[team, opp] += 1
+                if winner == team:
+                    self.h2h_toss_converted[team, opp] += 1
+                break
+
+
+PRESSURE_MATCH_TYPES = ("Final", "Eliminator 1", "Eliminator 2")
+
+
+class ChasingDefendingAccumulator(FeatureAccumulator):
+    """Chasing / defending strength per team, overall and in pressure (playoff) matches"""
+    columns = (
+        "team1_chasing_strength", "team1_defending_strength",
+        "team2_chasing_strength", "team2_defending_strength",
+        "team1_pref_score", "team2_pref_score",
+        "pref_score_diff", "chasing_strength_diff", "defending_strength_diff",
+        "team1_chasing_strength_pressure", "team1_defending_strength_pressure",
+        "team2_chasing_strength_pressure", "team2_defending_strength_pressure",
+        "team1_pref_score_pressure", "team2_pref_score_pressure",
+        "pref_score_diff_pressure", "chasing_strength_pressure_diff", "defending_strength_pressure_diff",
+    )
+    fields = ("team1", "team2", "toss_winner", "toss_decision", "winner", "match_type")
+
+    def __init__(self):
+        super().__init__()
+        # team -> [chasing_wins, chasing_matches, defending_wins, defending_matches]
+        self.state.update({
+            "normal": (("team", 4), np.int64),
+            "pressure": (("team", 4), np.int64),
+        })
 
-        # Calculate bowling rates from batting data for team2
-        balls_bowled_i1 = innings1_data['balls_bowled']
-        total_runs_i1 = innings1_data['total_runs']
-        total_wickets_i1 = innings1_data['total_wickets']
-        dot_balls_i1 = innings1_data['dot_balls']
+    @staticmethod
+    def _strengths(table, team):
+        chase = _rate(table[team, 0], table[team, 1], 0.5)
+        defend = _rate(table[team, 2], table[team, 3], 0.5)
+        return chase, defend, chase - defend
+
+    def snapshot(self, match):
+        t1_chase, t1_defend, t1_pref = self._strengths(self.normal, match.team1)
+        t2_chase, t2_defend, t2_pref = self._strengths(self.normal, match.team2)
+        t1_chase_p, t1_defend_p, t1_pref_p = self._strengths(self.pressure, match.team1)
+        t2_chase_p, t2_defend_p, t2_pref_p = self._strengths(self.pressure, match.team2)
+        return (
+            t1_chase, t1_defend, t2_chase, t2_defend, t1_pref, t2_pref,
+            t1_pref - t2_pref, t1_chase - t2_chase, t1_defend - t2_defend,
+            t1_chase_p, t1_defend_p, t2_chase_p, t2_defend_p, t1_pref_p, t2_pref_p,
+            t1_pref_p - t2_pref_p, t1_chase_p - t2_chase_p, t1_defend_p - t2_defend_p,
+        )
 
-        bowling_stats_i1 = {
-            'economy_rate': (total_runs_i1 / balls_bowled_i1) * 6 if balls_bowled_i1 > 0 else 0,
-            'wicket_rate': total_wickets_i1 / balls_bowled_i1 if balls_bowled_i1 > 0 else 0,
-            'dot_ball_rate': dot_balls_i1 / balls_bowled_i1 if balls_bowled_i1 > 0 else 0
-        }
+    def update(self, match):
+        t1, t2, winner = match.team1, match.team2, match.winner
+        if match.toss_winner == t1:
+            defending_team = t1 if match.toss_decision == "bat" else t2
+        else:
+            defending_team = t2 if match.toss_decision == "bat" else t1
+        chasing_team = t1 if defending_team == t2 else t2
+
+        tables = [self.normal]
+        if match.match_type in PRESSURE_MATCH_TYPES:
+            tables.append(self.pressure)
+        for table in tables:
+            table[chasing_team, 1] += 1
+            if winner == chasing_team:
+                table[chasing_team, 0] += 1
+            table[defending_team, 3] += 1
+            if winner == defending_team:
+                table[defending_team, 2] += 1
+
+
+class VenueAccumulator(FeatureAccumulator):
+    """Venue first-innings average, chase / bat-first win rates and toss decision bias"""
+    columns = (
+        "venue_avg_target_run", "venue_chasing_win_rate", "venue_defending_win_rate",
+        "venue_bat_first_winrate", "venue_chase_winrate", "venue_winrate_diff",
+        "venue_toss_bias",
+    )
+    fields = ("team1", "team2", "venue", "toss_winner", "toss_decision", "winner", "target_runs")
+
+    def __init__(self):
+        super().__init__()
+        # has_* flags: the venue has had at least one target / chasing win / defending win recorded
+        self.state.update({
+            "venue_runs": (("venue",), np.float64), "has_runs": (("venue",), bool),
+            "venue_matches": (("venue",), np.int64),
+            "chasing_wins": (("venue",), np.int64), "has_chasing_wins": (("venue",), bool),
+            "chasing_matches": (("venue",), np.int64),
+            "defending_wins": (("venue",), np.int64), "has_defending_wins": (("venue",), bool),
+            "defending_matches": (("venue",), np.int64),
+            "toss_bat": (("venue",), np.int64), "toss_total": (("venue",), np.int64),
+        })
 
-        team_stats[t1]['batting'].append(innings1_data)
-        team_stats[t2]['bowling'].append(bowling_stats_i1)
+    def snapshot(self, match):
+        venue = match.venue
+        avg_target = _where(self.has_runs[venue],
+                            lambda: self.venue_runs[venue] / np.maximum(1, self.venue_matches[venue]), 0.0)
+        chasing = _where(self.has_chasing_wins[venue],
+                         lambda: self.chasing_wins[venue] / np.maximum(1, self.chasing_matches[venue]), 0.5)
+        defending = _where(self.has_defending_wins[venue],
+                           lambda: self.defending_wins[venue] / np.maximum(1, self.defending_matches[venue]), 0.5)
+        bias = _where(self.toss_total[venue] > 0,
+                      lambda: self.toss_bat[venue] / np.maximum(1, self.toss_total[venue]) - 0.5, 0.0)  # Centered around 0
+        return avg_target, chasing, defending, defending, chasing, defending - chasing, bias
+
+    def update(self, match):
+        venue, toss_winner = match.venue, match.toss_winner
+        if pd.notnull(match.target_runs):  # first innings runs
+            self.venue_runs[venue] += match.target_runs
+            self.has_runs[venue] = True
+        self.venue_matches[venue] += 1
+
+        other = match.team1 if toss_winner == match.team2 else match.team2
+        if match.toss_decision == "field":
+            chasing_team, defending_team = toss_winner, other
+        else:
+            # toss_decision == "bat" → toss winner bats first, so they defend
+            chasing_team, defending_team = other, toss_winner
 
-        # Innings 2 data (team2 batting, team1 bowling)
-        innings2_data = row.filter(like='innings2_').to_dict()
-        innings2_data = {k.replace('innings2_', ''): v for k, v in innings2_data.items()}
+        self.chasing_matches[venue] += 1
+        self.defending_matches[venue] += 1
+        if match.winner == chasing_team:
+            self.chasing_wins[venue] += 1
+            self.has_chasing_wins[venue] = True
+        elif match.winner == defending_team:
+            self.defending_wins[venue] += 1
+            self.has_defending_wins[venue] = True
 
-        # Calculate bowling rates from batting data for team1
-        balls_bowled_i2 = innings2_data['balls_bowled']
-        total_runs_i2 = innings2_data['total_runs']
-        total_wickets_i2 = innings2_data['total_wickets']
-        dot_balls_i2 = innings2_data['dot_balls']
+        if match.toss_decision == "bat":
+            self.toss_bat[venue] += 1
+        self.toss_total[venue] += 1
 
-        bowling_stats_i2 = {
-            'economy_rate': (total_runs_i2 / balls_bowled_i2) * 6 if balls_bowled_i2 > 0 else 0,
-            'wicket_rate': total_wickets_i2 / balls_bowled_i2 if balls_bowled_i2 > 0 else 0,
-            'dot_ball_rate': dot_balls_i2 / balls_bowled_i2 if balls_bowled_i2 > 0 else 0
-        }
 
-        team_stats[t2]['batting'].append(innings2_data)
-        team_stats[t1]['bowling'].append(bowling_stats_i2)
+# ---------------------------------------------------------------------------
+# Feature builders (one accumulator each, same outputs as the original loops)
+# ---------------------------------------------------------------------------
 
-    # Convert list of dictionaries to a DataFrame and merge with the original data
-    rolling_df = pd.DataFrame(rolling_features)
+def calculate_rolling_stats(df):
+    feats_df = FeatureEngine([RollingStatsAccumulator()]).run(df)
+    df = df.reset_index(drop=True)
+    df = pd.concat([df, feats_df], axis=1)
+
+    return df
+
+def compute_rolling_features_balls(df, prior_matches=20):
+    """
+    Computes all specified rolling features for each team and match,
+    including phase-wise scores, composite indices, and player form metrics.
+
+    Args:
+        df (pd.DataFrame): The match-level data with innings details.
+        prior_matches (int): Number of previous matches to consider for rolling averages.
+
+    Returns:
+        pd.DataFrame: The original dataframe with added rolling features.
+    """
+    df = df.copy().reset_index(drop=True)
+
+    rolling_df = FeatureEngine([BallRollingAccumulator(prior_matches)]).run(df)
+    rolling_df.insert(0, "match_id", df["match_id"].values)
     final_df = pd.merge(df, rolling_df, on='match_id', how='left')
 
     return final_df
@@ -253,132 +818,7 @@ def calculate_toss_stats(matches, window=5):
         - team1_lost_toss_winrate, team2_lost_toss_winrate
         - team1_form_toss_boost, team2_form_toss_boost
     """
-    # Rolling storage
-    toss_win_stats = {}      # team -> {"wins":, "total":}
-    toss_bat_stats = {}      # team -> {"bat":, "total":}
-    toss_match_stats = {}    # team -> {"wins_after_toss":, "toss_wins":}
-    venue_toss_stats = {}    # venue -> {"wins":, "total":}
-    lost_toss_stats = {}     # team -> {"wins":, "total":}
-    form_toss_stats = {}     # team -> {"wins_with_form":, "total_with_form":, "form_history": deque}
-
-    rows = []
-
-    for _, row in matches.iterrows():
-        team1, team2 = row["team1"], row["team2"]
-        venue = row["venue"]
-        toss_winner = row["toss_winner"]
-        toss_decision = row["toss_decision"]
-        winner = row["winner"]
-
-        # --- Initialize defaults if team/venue not seen before ---
-        for team in [team1, team2]:
-            toss_win_stats.setdefault(team, {"wins": 0, "total": 0})
-            toss_bat_stats.setdefault(team, {"bat": 0, "total": 0})
-            toss_match_stats.setdefault(team, {"wins_after_toss": 0, "toss_wins": 0})
-            lost_toss_stats.setdefault(team, {"wins": 0, "total": 0})
-            form_toss_stats.setdefault(team, {
-                "wins_with_form": 0,
-                "total_with_form": 0,
-                "form_history": deque(maxlen=window)
-            })
-
-        venue_toss_stats.setdefault(venue, {"wins": 0, "total": 0})
-
-        # -------- FEATURES BEFORE MATCH (only past data) -------- #
-        # Recent toss winrate
-        t1_recent_toss_winrate = toss_win_stats[team1]["wins"] / toss_win_stats[team1]["total"] if toss_win_stats[team1]["total"] > 0 else 0.5
-        t2_recent_toss_winrate = toss_win_stats[team2]["wins"] / toss_win_stats[team2]["total"] if toss_win_stats[team2]["total"] > 0 else 0.5
-
-        # Toss bat rate
-        t1_recent_bat_rate = toss_bat_stats[team1]["bat"] / toss_bat_stats[team1]["total"] if toss_bat_stats[team1]["total"] > 0 else 0.5
-        t2_recent_bat_rate = toss_bat_stats[team2]["bat"] / toss_bat_stats[team2]["total"] if toss_bat_stats[team2]["total"] > 0 else 0.5
-
-        # Winrate after winning toss
-        t1_toss_match_winrate = toss_match_stats[team1]["wins_after_toss"] / toss_match_stats[team1]["toss_wins"] if toss_match_stats[team1]["toss_wins"] > 0 else 0.5
-        t2_toss_match_winrate = toss_match_stats[team2]["wins_after_toss"] / toss_match_stats[team2]["toss_wins"] if toss_match_stats[team2]["toss_wins"] > 0 else 0.5
-        toss_match_winrate_diff = t1_toss_match_winrate - t2_toss_match_winrate
-
-        # Venue toss winrate
-        venue_toss_winrate = venue_toss_stats[venue]["wins"] / venue_toss_stats[venue]["total"] if venue_toss_stats[venue]["total"] > 0 else 0.5
-
-        # Lost toss winrate
-        t1_lost_toss_winrate = lost_toss_stats[team1]["wins"] / lost_toss_stats[team1]["total"] if lost_toss_stats[team1]["total"] > 0 else 0.5
-        t2_lost_toss_winrate = lost_toss_stats[team2]["wins"] / lost_toss_stats[team2]["total"] if lost_toss_stats[team2]["total"] > 0 else 0.5
-
-        # Form-toss boost
-        def calc_form_boost(team):
-            hist = form_toss_stats[team]["form_history"]
-            if not hist:
-                return 0.0
-            avg_form = sum(hist) / len(hist)
-            if form_toss_stats[team]["total_with_form"] == 0:
-                return 0.0
-            return (form_toss_stats[team]["wins_with_form"] / form_toss_stats[team]["total_with_form"]) - avg_form
-
-        t1_form_toss_boost = calc_form_boost(team1)
-        t2_form_toss_boost = calc_form_boost(team2)
-
-        # Save features for this match
-        rows.append({
-            "team1_recent_toss_winrate": t1_recent_toss_winrate,
-            "team2_recent_toss_winrate": t2_recent_toss_winrate,
-            "team1_recent_toss_bat_rate": t1_recent_bat_rate,
-            "team2_recent_toss_bat_rate": t2_recent_bat_rate,
-            "team1_toss_match_winrate": t1_toss_match_winrate,
-            "team2_toss_match_winrate": t2_toss_match_winrate,
-            "toss_match_winrate_diff": toss_match_winrate_diff,
-            "venue_toss_winrate": venue_toss_winrate,
-            "team1_lost_toss_winrate": t1_lost_toss_winrate,
-            "team2_lost_toss_winrate": t2_lost_toss_winrate,
-            "team1_form_toss_boost": t1_form_toss_boost,
-            "team2_form_toss_boost": t2_form_toss_boost,
-            # Add missing diff features
-            "recent_toss_winrate_diff": t1_recent_toss_winrate - t2_recent_toss_winrate,
-            "lost_toss_winrate_diff": t1_lost_toss_winrate - t2_lost_toss_winrate,
-            "form_toss_boost_diff": t1_form_toss_boost - t2_form_toss_boost,
-            "recent_toss_bat_rate_diff": t1_recent_bat_rate - t2_recent_bat_rate,
-        })
-
-        # -------- UPDATE AFTER MATCH (use current match result) -------- #
-        # Toss win/loss
-        toss_win_stats[toss_winner]["wins"] += 1
-        toss_win_stats[toss_winner]["total"] += 1
-        loser = team1 if toss_winner == team2 else team2
-        toss_win_stats[loser]["total"] += 1
-
-        # Toss decision
-        toss_bat_stats[toss_winner]["total"] += 1
-        if toss_decision == "bat":
-            toss_bat_stats[toss_winner]["bat"] += 1
-
-        # Toss → match winrate
-        toss_match_stats[toss_winner]["toss_wins"] += 1
-        if toss_winner == winner:
-            toss_match_stats[toss_winner]["wins_after_toss"] += 1
-
-        # Venue toss
-        venue_toss_stats[venue]["total"] += 1
-        if toss_winner == winner:
-            venue_toss_stats[venue]["wins"] += 1
-
-        # Lost toss stats
-        if toss_winner != team1:
-            lost_toss_stats[team1]["total"] += 1
-            if winner == team1:
-                lost_toss_stats[team1]["wins"] += 1
-        if toss_winner != team2:
-            lost_toss_stats[team2]["total"] += 1
-            if winner == team2:
-                lost_toss_stats[team2]["wins"] += 1
-
-        # Form-toss boost
-        for team in [team1, team2]:
-            form_toss_stats[team]["form_history"].append(1 if winner == team else 0)
-        if toss_winner == winner:
-            form_toss_stats[toss_winner]["wins_with_form"] += 1
-        form_toss_stats[toss_winner]["total_with_form"] += 1
-
-    return pd.DataFrame(rows)
+    return FeatureEngine([TossStatsAccumulator(window)]).run(matches)
 
 def add_head_to_head_toss_advantage(df, prior_matches=4):
     """
@@ -391,46 +831,9 @@ def add_head_to_head_toss_advantage(df, prior_matches=4):
     df = df.copy()
     df = df.reset_index(drop=True)
 
-    # store h2h toss stats: (teamA, teamB) -> {toss_wins, toss_wins_converted}
-    h2h_toss_stats = defaultdict(lambda: {"toss_wins": 0, "toss_win_converted": 0})
-
-    t1_adv_list, t2_adv_list = [], []
-
-    prior_converted = prior_matches / 2  # prior ~50% conversion rate
-
-    for _, row in df.iterrows():
-        t1, t2 = row["team1"], row["team2"]
-        toss_winner = row["toss_winner"]
-        winner = row["winner"]
-
-        # --- compute (before updating) ---
-        def compute_adv(team, opp):
-            stats = h2h_toss_stats[(team, opp)]
-            tw, tc = stats["toss_wins"], stats["toss_win_converted"]
-            if tw == 0:
-                return 0.5  # no history → neutral
-            return (tc + prior_converted) / (tw + prior_matches)
-
-        t1_adv = compute_adv(t1, t2)
-        t2_adv = compute_adv(t2, t1)
-        t1_adv_list.append(t1_adv)
-        t2_adv_list.append(t2_adv)
-
-        # --- update AFTER match ---
-        if toss_winner == t1:
-            h2h_toss_stats[(t1, t2)]["toss_wins"] += 1
-            if winner == t1:
-                h2h_toss_stats[(t1, t2)]["toss_win_converted"] += 1
-
-        elif toss_winner == t2:
-            h2h_toss_stats[(t2, t1)]["toss_wins"] += 1
-            if winner == t2:
-                h2h_toss_stats[(t2, t1)]["toss_win_converted"] += 1
-
-    # attach features
-    df["team1_h2h_toss_advantage"] = t1_adv_list
-    df["team2_h2h_toss_advantage"] = t2_adv_list
-    df["h2h_toss_advantage_diff"] = df["team1_h2h_toss_advantage"] - df["team2_h2h_toss_advantage"]
+    feats_df = FeatureEngine([HeadToHeadTossAccumulator(prior_matches)]).run(df)
+    for col in feats_df.columns:
+        df[col] = feats_df[col].values
 
     return df
 
@@ -443,113 +846,10 @@ def add_chasing_defending_strength(df):
     """
     df = df.copy()
 
-    # --- Normal stats ---
-    team_chasing_wins = {}
-    team_chasing_matches = {}
-    team_defending_wins = {}
-    team_defending_matches = {}
-
-    # --- Pressure stats ---
-    team_chasing_wins_pressure = {}
-    team_chasing_matches_pressure = {}
-    team_defending_wins_pressure = {}
-    team_defending_matches_pressure = {}
-
-    team1_chasing_strength, team1_defending_strength = [], []
-    team2_chasing_strength, team2_defending_strength = [], []
-    team1_pref_score, team2_pref_score = [], []
-
-    team1_chasing_strength_pressure, team1_defending_strength_pressure = [], []
-    team2_chasing_strength_pressure, team2_defending_strength_pressure = [], []
-    team1_pref_score_pressure, team2_pref_score_pressure = [], []
-
-    for _, row in df.iterrows():
-        t1, t2, toss_winner, toss_decision, winner, match_type = (
-            row["team1"], row["team2"], row["toss_winner"], row["toss_decision"], row["winner"], row["match_type"]
-        )
-
-        is_pressure = match_type in ["Final", "Eliminator 1", "Eliminator 2"]
-
-        # --- Get stats function ---
-        def get_strengths(team, chasing_wins, chasing_matches, defending_wins, defending_matches):
-            chase_strength = chasing_wins.get(team, 0) / chasing_matches.get(team, 0) if chasing_matches.get(team, 0) > 0 else 0.5
-            defend_strength = defending_wins.get(team, 0) / defending_matches.get(team, 0) if defending_matches.get(team, 0) > 0 else 0.5
-            return chase_strength, defend_strength, chase_strength - defend_strength
-
-        # --- Team1 (normal + pressure) ---
-        chase, defend, pref = get_strengths(t1, team_chasing_wins, team_chasing_matches, team_defending_wins, team_defending_matches)
-        team1_chasing_strength.append(chase)
-        team1_defending_strength.append(defend)
-        team1_pref_score.append(pref)
-
-        chase_p, defend_p, pref_p = get_strengths(t1, team_chasing_wins_pressure, team_chasing_matches_pressure, team_defending_wins_pressure, team_defending_matches_pressure)
-        team1_chasing_strength_pressure.append(chase_p)
-        team1_defending_strength_pressure.append(defend_p)
-        team1_pref_score_pressure.append(pref_p)
-
-        # --- Team2 (normal + pressure) ---
-        chase, defend, pref = get_strengths(t2, team_chasing_wins, team_chasing_matches, team_defending_wins, team_defending_matches)
-        team2_chasing_strength.append(chase)
-        team2_defending_strength.append(defend)
-        team2_pref_score.append(pref)
-
-        chase_p, defend_p, pref_p = get_strengths(t2, team_chasing_wins_pressure, team_chasing_matches_pressure, team_defending_wins_pressure, team_defending_matches_pressure)
-        team2_chasing_strength_pressure.append(chase_p)
-        team2_defending_strength_pressure.append(defend_p)
-        team2_pref_score_pressure.append(pref_p)
-
-        # --- Update stats after match ---
-        if toss_winner == t1:
-            first_batting = t1 if toss_decision == "bat" else t2
-        else:
-            first_batting = t2 if toss_decision == "bat" else t1
-
-        chasing_team = t1 if first_batting == t2 else t2
-        defending_team = first_batting
-
-        # Normal update
-        team_chasing_matches[chasing_team] = team_chasing_matches.get(chasing_team, 0) + 1
-        if winner == chasing_team:
-            team_chasing_wins[chasing_team] = team_chasing_wins.get(chasing_team, 0) + 1
-
-        team_defending_matches[defending_team] = team_defending_matches.get(defending_team, 0) + 1
-        if winner == defending_team:
-            team_defending_wins[defending_team] = team_defending_wins.get(defending_team, 0) + 1
+    feats_df = FeatureEngine([ChasingDefendingAccumulator()]).run(df)
+    for col in feats_df.columns:
+        df[col] = feats_df[col].values
 
-        # Pressure update
-        if is_pressure:
-            team_chasing_matches_pressure[chasing_team] = team_chasing_matches_pressure.get(chasing_team, 0) + 1
-            if winner == chasing_team:
-                team_chasing_wins_pressure[chasing_team] = team_chasing_wins_pressure.get(chasing_team, 0) + 1
-
-            team_defending_matches_pressure[defending_team] = team_defending_matches_pressure.get(defending_team, 0) + 1
-            if winner == defending_team:
-                team_defending_wins_pressure[defending_team] = team_defending_wins_pressure.get(defending_team, 0) + 1
-
-    # --- Assign back ---
-    df["team1_chasing_strength"] = team1_chasing_strength
-    df["team1_defending_strength"] = team1_defending_strength
-    df["team2_chasing_strength"] = team2_chasing_strength
-    df["team2_defending_strength"] = team2_defending_strength
-    df["team1_pref_score"] = team1_pref_score
-    df["team2_pref_score"] = team2_pref_score
-    df["pref_score_diff"] = df["team1_pref_score"] - df["team2_pref_score"]
-    df["chasing_strength_diff"] = df["team1_chasing_strength"] - df["team2_chasing_strength"]
-    df["defending_strength_diff"] = df["team1_defending_strength"] - df["team2_defending_strength"]
-
-    # --- Pressure stats ---
-    df["team1_chasing_strength_pressure"] = team1_chasing_strength_pressure
-    df["team1_defending_strength_pressure"] = team1_defending_strength_pressure
-    df["team2_chasing_strength_pressure"] = team2_chasing_strength_pressure
-    df["team2_defending_strength_pressure"] = team2_defending_strength_pressure
-    df["team1_pref_score_pressure"] = team1_pref_score_pressure
-    df["team2_pref_score_pressure"] = team2_pref_score_pressure
-    df["pref_score_diff_pressure"] = df["team1_pref_score_pressure"] - df["team2_pref_score_pressure"]
-    
-    # Add missing pressure diff features
-    df["chasing_strength_pressure_diff"] = df["team1_chasing_strength_pressure"] - df["team2_chasing_strength_pressure"]
-    df["defending_strength_pressure_diff"] = df["team1_defending_strength_pressure"] - df["team2_defending_strength_pressure"]
-    
     return df
 
 
@@ -587,124 +887,65 @@ def add_venue_features(df):
     """
     df = df.copy()
 
-    # Rolling dictionaries
-    venue_runs = {}
-    venue_matches = {}
-    venue_chasing_wins = {}
-    venue_chasing_matches = {}
-    venue_defending_wins = {}
-    venue_defending_matches = {}
-
-    avg_target_runs = []
-    chasing_win_rates = []
-    defending_win_rates = []
-
-    for _, row in df.iterrows():
-        venue = row["venue"]
-        winner = row["winner"]
-        toss_decision, toss_winner = row["toss_decision"], row["toss_winner"]
-        team1, team2 = row["team1"], row["team2"]
-
-        # ====== Venue average first innings score ======
-        if venue in venue_runs:
-            avg_target_runs.append(
-                venue_runs[venue] / max(1, venue_matches[venue])
-            )
-        else:
-            avg_target_runs.append(0.0)
+    feats_df = FeatureEngine([VenueAccumulator()]).run(df)
+    for col in feats_df.columns:
+        df[col] = feats_df[col].values
 
-        # ====== Venue chasing win rate ======
-        if venue in venue_chasing_wins:
-            chasing_win_rates.append(
-                venue_chasing_wins[venue] / max(1, venue_chasing_matches[venue])
-            )
-        else:
-            chasing_win_rates.append(0.5)
+    return df
 
-        # ====== Venue defending win rate ======
-        if venue in venue_defending_wins:
-            defending_win_rates.append(
-                venue_defending_wins[venue] / max(1, venue_defending_matches[venue])
-            )
-        else:
-            defending_win_rates.append(0.5)
 
-        # ====== Update after match ======
-        # Update venue scoring stats
-        if pd.notnull(row["target_runs"]):  # first innings runs
-            venue_runs[venue] = venue_runs.get(venue, 0) + row["target_runs"]
-        venue_matches[venue] = venue_matches.get(venue, 0) + 1
+def sort_chronologically(df):
+    """
+    df in the order the matches were played: by date, then match_id for matches on
+    the same day. match_id alone is not chronological: several seasons have ids out
+    of date order. Without a date column the current row order is taken as the
+    chronological one.
+    """
+    df = df.reset_index(drop=True)
+    if "date" not in df.columns:
+        return df
+    keys = pd.DataFrame({"date": pd.to_datetime(df["date"], format="mixed", errors="coerce"),
+                         "match_id": df["match_id"]})
+    return df.iloc[keys.sort_values(["date", "match_id"], kind="mergesort").index].reset_index(drop=True)
 
-        # Chasing or Defending update
-        if toss_decision == "field":
-            # chasing team is toss_winner, defending is opponent
-            chasing_team = toss_winner
-            defending_team = team1 if toss_winner == team2 else team2
 
-            venue_chasing_matches[venue] = venue_chasing_matches.get(venue, 0) + 1
-            venue_defending_matches[venue] = venue_defending_matches.get(venue, 0) + 1
+def build_match_features(df, window=5, prior_matches=20, h2h_prior_matches=4):
+    """
+    Full feature pipeline in a single pass over the match history: the same
+    columns as calculate_rolling_stats → compute_rolling_features_balls →
+    calculate_toss_stats → add_head_to_head_toss_advantage →
+    add_chasing_defending_strength → add_diff_features → add_venue_features.
 
-            if winner == chasing_team:
-                venue_chasing_wins[venue] = venue_chasing_wins.get(venue, 0) + 1
-            elif winner == defending_team:
-                venue_defending_wins[venue] = venue_defending_wins.get(venue, 0) + 1
-        else:
-            # toss_decision == "bat" → toss winner bats first, so they defend
-            defending_team = toss_winner
-            chasing_team = team1 if toss_winner == team2 else team2
+    Args:
+        df (pd.DataFrame): Match-level data merged with the pivoted innings summaries.
 
-            venue_chasing_matches[venue] = venue_chasing_matches.get(venue, 0) + 1
-            venue_defending_matches[venue] = venue_defending_matches.get(venue, 0) + 1
+    Returns:
+        pd.DataFrame: df in chronological order (sort_chronologically) with all feature columns added.
+    """
+    # The wrapper chain walks its input in row order; sorting by date here makes the
+    # result independent of how the caller ordered the rows
+    df = sort_chronologically(df.copy())
+
+    team_families = [
+        RollingStatsAccumulator(),
+        BallRollingAccumulator(prior_matches),
+        TossStatsAccumulator(window),
+        HeadToHeadTossAccumulator(h2h_prior_matches),
+        ChasingDefendingAccumulator(),
+    ]
+    venue_family = VenueAccumulator()
+    feats_df = FeatureEngine(team_families + [venue_family]).run(df)
+
+    team_cols = [c for acc in team_families for c in acc.columns]
+    df = pd.concat([df, feats_df[team_cols]], axis=1)
+    df = add_diff_features(df)
+    df = pd.concat([df, feats_df[list(venue_family.columns)]], axis=1)
 
-            if winner == chasing_team:
-                venue_chasing_wins[venue] = venue_chasing_wins.get(venue, 0) + 1
-            elif winner == defending_team:
-                venue_defending_wins[venue] = venue_defending_wins.get(venue, 0) + 1
-
-    # Add new columns
-    df["venue_avg_target_run"] = avg_target_runs
-    df["venue_chasing_win_rate"] = chasing_win_rates
-    df["venue_defending_win_rate"] = defending_win_rates
-    
-    # Create the missing features that the trained model expects
-    df["venue_bat_first_winrate"] = defending_win_rates  # Batting first = defending
-    df["venue_chase_winrate"] = chasing_win_rates       # Same as venue_chasing_win_rate
-    
-    # Calculate venue_winrate_diff (bat first advantage)
-    df["venue_winrate_diff"] = df["venue_bat_first_winrate"] - df["venue_chase_winrate"]
-    
-    # Add venue_toss_bias: track whether teams prefer to bat/bowl first at this venue
-    venue_toss_decisions = {}
-    toss_bias_values = []
-    
-    for _, row in df.iterrows():
-        venue = row["venue"]
-        toss_decision = row["toss_decision"]
-        
-        # Get current bias before updating
-        if venue in venue_toss_decisions:
-            bat_decisions = venue_toss_decisions[venue].get("bat", 0)
-            total_decisions = venue_toss_decisions[venue].get("total", 0)
-            bias = (bat_decisions / total_decisions - 0.5) if total_decisions > 0 else 0.0  # Centered around 0
-        else:
-            bias = 0.0
-            
-        toss_bias_values.append(bias)
-        
-        # Update toss decisions after recording bias
-        if venue not in venue_toss_decisions:
-            venue_toss_decisions[venue] = {"bat": 0, "field": 0, "total": 0}
-            
-        if toss_decision == "bat":
-            venue_toss_decisions[venue]["bat"] += 1
-        else:
-            venue_toss_decisions[venue]["field"] += 1
-        venue_toss_decisions[venue]["total"] += 1
-    
-    df["venue_toss_bias"] = toss_bias_values
-    
     return df
 
+# Bump when feature semantics change so persisted feature stores get rebuilt
+FEATURE_PIPELINE_VERSION = 4
+
 selected_features = [
 
 # ---------------------------
@@ -1,96 +1,138 @@
 # ml-service/historical_stats.py
 import pandas as pd
 import numpy as np
+from collections import defaultdict
 from typing import Dict, List, Any, Optional, Tuple
-from clean_match_data import normalize_team as normalize_team_match
-from clean_balls_data import normalize_team as normalize_team_balls, summarize_match_data, pivot_match_data
+from dataset import get_dataset
+from normalization import TEAM_IDS, VENUE_IDS
+
+
+class StatsIndex:
+    """
+    Aggregates behind the stats endpoints, built in one pass over match_data.
+
+    - h2h_matches[i, j] / h2h_wins[i, j]: matches between teams i and j, and i's wins in them
+    - team_results[team]: won/lost flags in match order (recent form)
+    - team_pp / team_economy[team]: [sum, count] of innings1_pp_runs / innings2_economy_rate
+      over the team's matches (the columns get_team_stats has always averaged)
+    - venue_matches / venue_wins[venue]: per-team arrays (team x venue table)
+    - venue_target[venue]: [sum, count] of target_runs; venue_balls[venue]: (balls, fours+, sixes)
+
+    add() folds in one more match, so endpoints stay O(1) lookups without a rebuild.
+    """
+
+    def __init__(self, teams: List[str], detailed_match_data: Optional[pd.DataFrame] = None,
+                 ball_data: Optional[pd.DataFrame] = None):
+        n = len(teams)
+        self.teams = list(teams)
+        self.team_index = {team: i for i, team in enumerate(teams)}
+        self.h2h_matches = np.zeros((n, n), dtype=np.int64)
+        self.h2h_wins = np.zeros((n, n), dtype=np.int64)
+        self.team_results: Dict[str, List[bool]] = defaultdict(list)
+        self.team_pp: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        self.team_economy: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+        self.venue_matches: Dict[str, np.ndarray] = defaultdict(lambda: np.zeros(n, dtype=np.int64))
+        self.venue_wins: Dict[str, np.ndarray] = defaultdict(lambda: np.zeros(n, dtype=np.int64))
+        self.venue_target: Dict[str, List[float]] = defaultdict(lambda: [0.0, 0])
+
+        # Per-match detailed columns, looked up by match id
+        self.has_detailed = detailed_match_data is not None
+        self.pp_by_match: Dict[Any, float] = {}
+        self.economy_by_match: Dict[Any, float] = {}
+        if detailed_match_data is not None:
+            pp_cols = [col for col in detailed_match_data.columns if 'pp_runs' in col and 'innings1' in col]
+            economy_cols = [col for col in detailed_match_data.columns if 'economy_rate' in col and 'innings2' in col]
+            if pp_cols:
+                self.pp_by_match = dict(zip(detailed_match_data['match_id'], detailed_match_data[pp_cols[0]]))
+            if economy_cols:
+                self.economy_by_match = dict(zip(detailed_match_data['match_id'], detailed_match_data[economy_cols[0]]))
+
+        # Ball-level venue aggregates (only when the ball table carries venue and batsman_run)
+        self.venue_balls: Dict[str, Tuple[int, int, int]] = {}
+        if ball_data is not None and {'venue', 'batsman_run'} <= set(ball_data.columns):
+            runs = ball_data['batsman_run']
+            grouped = pd.DataFrame({'venue': ball_data['venue'], 'balls': 1,
+                                    'boundaries': (runs >= 4).astype(int), 'sixes': (runs == 6).astype(int)})
+            for venue, row in grouped.groupby('venue', observed=True).sum().iterrows():
+                self.venue_balls[venue] = (int(row['balls']), int(row['boundaries']), int(row['sixes']))
+
+    @classmethod
+    def build(cls, teams: List[str], match_data: pd.DataFrame, detailed_match_data: Optional[pd.DataFrame] = None,
+              ball_data: Optional[pd.DataFrame] = None) -> "StatsIndex":
+        index = cls(teams, detailed_match_data, ball_data)
+        columns = [col for col in ("id", "team1", "team2", "venue", "winner", "target_runs") if col in match_data.columns]
+        for row in match_data[columns].itertuples(index=False):
+            index.add(row._asdict())
+        return index
+
+    @staticmethod
+    def _accumulate(total: List[float], value):
+        if value is not None and not pd.isna(value):
+            total[0] += value
+            total[1] += 1
+
+    def add(self, match: Dict[str, Any]):
+        team1, team2, venue, winner = match.get("team1"), match.get("team2"), match.get("venue"), match.get("winner")
+        match_id = match.get("id")
+
+        i, j = self.team_index.get(team1), self.team_index.get(team2)
+        if i is not None and j is not None and i != j:
+            self.h2h_matches[i, j] += 1
+            self.h2h_matches[j, i] += 1
+            if winner == team1:
+                self.h2h_wins[i, j] += 1
+            elif winner == team2:
+                self.h2h_wins[j, i] += 1
+
+        for team in {team1, team2}:
+            self.team_results[team].append(winner == team)
+            self._accumulate(self.team_pp[team], self.pp_by_match.get(match_id))
+            self._accumulate(self.team_economy[team], self.economy_by_match.get(match_id))
+            k = self.team_index.get(team)
+            if k is not None:
+                self.venue_matches[venue][k] += 1
+                self.venue_wins[venue][k] += winner == team
+
+        self._accumulate(self.venue_target[venue], match.get("target_runs"))
+
 
 class HistoricalStatsCalculator:
     def __init__(self):
         self.match_data = None
         self.ball_data = None
-        self.team_mapping = {
-            "csk": "Chennai Super Kings",
-            "mi": "Mumbai Indians", 
-            "rcb": "Royal Challengers Bengaluru",
-            "kkr": "Kolkata Knight Riders",
-            "dc": "Delhi Capitals",
-            "rr": "Rajasthan Royals",
-            "pbks": "Punjab Kings",
-            "srh": "Sunrisers Hyderabad",
-            "gt": "Gujarat Titans",
-            "lsg": "Lucknow Super Giants"
-        }
+        self.team_mapping = dict(TEAM_IDS)
         self.reverse_team_mapping = {v: k for k, v in self.team_mapping.items()}
         
-        self.venue_mapping = {
-            "wankhede": "Wankhede Stadium",
-            "eden": "Eden Gardens",
-            "chinnaswamy": "M Chinnaswamy Stadium",
-            "chepauk": "MA Chidambaram Stadium, Chepauk",
-            "arun-jaitley": "Feroz Shah Kotla",
-            "sawai": "Sawai Mansingh Stadium",
-            "mohali": "Punjab Cricket Association Stadium, Mohali",
-            "uppal": "Rajiv Gandhi International Stadium, Uppal",
-            "narendra": "Narendra Modi Stadium",
-            "ekana": "Bharat Ratna Shri Atal Bihari Vajpayee Ekana Cricket Stadium"
-        }
+        self.venue_mapping = dict(VENUE_IDS)
         self.reverse_venue_mapping = {v: k for k, v in self.venue_mapping.items()}
         
         self.load_data()
     
     def load_data(self):
-        """Load and preprocess historical data"""
+        """Load historical data from the process-wide shared dataset"""
         try:
-            # Load match data
-            self.match_data = pd.read_csv("data/match_data.csv")
-            self.match_data = self.match_data.drop(columns=["Unnamed: 0", "city", "method"], errors='ignore')
-            self.match_data = self.match_data.dropna()
-            self.match_data = self.match_data[self.match_data['source'] == 'train']
-            
-            # Normalize team names
-            for col in ["team1", "team2", "toss_winner", "winner"]:
-                self.match_data[col] = self.match_data[col].apply(normalize_team_match)
-            
-            # Remove rows with None values (defunct teams)
-            self.match_data = self.match_data.dropna()
-            
-            # Clean string columns
-            self.match_data["toss_decision"] = self.match_data["toss_decision"].str.lower()
-            self.match_data["result"] = self.match_data["result"].str.lower()
-            
-            # Load ball data for detailed stats
-            try:
-                self.ball_data = pd.read_csv("data/ball_by_ball_data.csv")
-                self.ball_data = self.ball_data.drop(columns=["non_striker", "fielders_involved", "wicket_kind", "player_out"], errors='ignore')
-                
-                # Convert boolean columns
-                bool_cols = ["is_wide_ball", "is_no_ball", "is_leg_bye", "is_bye", "is_penalty", "is_super_over", "is_wicket"]
-                for col in bool_cols:
-                    if col in self.ball_data.columns:
-                        self.ball_data[col] = self.ball_data[col].astype(int)
-                
-                # Normalize team names
-                for col in ["team_batting", "team_bowling"]:
-                    if col in self.ball_data.columns:
-                        self.ball_data[col] = self.ball_data[col].apply(normalize_team_balls)
-                
-                self.ball_data = self.ball_data.dropna()
-                self.ball_data = self.ball_data.sort_values(["season_id", "match_id", "innings", "over_number", "ball_number"])
-                
-                # Create detailed match stats from ball data
-                summary_df = summarize_match_data(self.ball_data)
-                self.detailed_match_data = pivot_match_data(summary_df)
-                
-            except Exception as e:
-                print(f"Warning: Could not load ball data: {e}")
-                self.ball_data = None
-                self.detailed_match_data = None
+            dataset = get_dataset()
+            self.match_data = dataset.match_data
+            self.ball_data = dataset.ball_data
+            self.detailed_match_data = dataset.detailed_match_data
+            self.build_index()
                 
         except Exception as e:
             print(f"Error loading historical data: {e}")
             raise
+
+    def build_index(self):
+        """(Re)build the endpoint aggregates from the current tables"""
+        self.index = StatsIndex.build(list(self.team_mapping.values()), self.match_data,
+                                      self.detailed_match_data, self.ball_data)
     
+    def add_match(self, match: Dict[str, Any]):
+        """Append one completed match (normalized team/venue names) so the stats endpoints include it"""
+        columns = ["team1", "team2", "venue", "toss_winner", "toss_decision", "winner", "match_type", "target_runs"]
+        row = {col: match[col] for col in columns if col in match}
+        self.match_data = pd.concat([self.match_data, pd.DataFrame([row])], ignore_index=True)
+        self.index.add(row)
+
     def get_head_to_head_stats(self, team1_id: str, team2_id: str) -> Optional[Dict[str, Any]]:
         """Calculate head-to-head statistics between two teams"""
         try:
@@ -100,24 +142,11 @@ class HistoricalStatsCalculator:
             if not team1_name or not team2_name:
                 return None
             
-            # Filter matches between these two teams
-            h2h_matches = self.match_data[
-                ((self.match_data['team1'] == team1_name) & (self.match_data['team2'] == team2_name)) |
-                ((self.match_data['team1'] == team2_name) & (self.match_data['team2'] == team1_name))
-            ]
-            
-            if h2h_matches.empty:
-                return {
-                    "team1Id": team1_id,
-                    "team2Id": team2_id,
-                    "totalMatches": 0,
-                    "team1Wins": 0,
-                    "team2Wins": 0
-                }
-            
-            total_matches = len(h2h_matches)
-            team1_wins = len(h2h_matches[h2h_matches['winner'] == team1_name])
-            team2_wins = len(h2h_matches[h2h_matches['winner'] == team2_name])
+            # Matches between these two teams, from the h2h matrix
+            i, j = self.index.team_index[team1_name], self.index.team_index[team2_name]
+            total_matches = int(self.index.h2h_matches[i, j])
+            team1_wins = int(self.index.h2h_wins[i, j])
+            team2_wins = int(self.index.h2h_wins[j, i])
             
             return {
                 "team1Id": team1_id,
@@ -138,56 +167,25 @@ class HistoricalStatsCalculator:
             if not team_name:
                 return None
             
-            # Get all matches for this team
-            team_matches = self.match_data[
-                (self.match_data['team1'] == team_name) | (self.match_data['team2'] == team_name)
-            ]
-            
-            if team_matches.empty:
+            # All results for this team, in match order
+            results = self.index.team_results.get(team_name)
+            if not results:
                 return None
             
             # Calculate recent form (last 5 matches)
-            recent_matches = team_matches.tail(5).copy()
-            recent_form = []
-            for _, match in recent_matches.iterrows():
-                won = match['winner'] == team_name
-                recent_form.append(won)
+            recent_form = results[-5:]
             
-            # Calculate powerplay and death overs stats from detailed data
+            # Powerplay and death overs averages from the detailed-data sums
             powerplay_avg = 0
             death_overs_economy = 0
             
             if self.detailed_match_data is not None:
-                try:
-                    # Merge with detailed match data
-                    team_detailed = team_matches.merge(
-                        self.detailed_match_data.drop(columns=['team1','team2'], errors='ignore'), 
-                        left_on='id', right_on='match_id', how='left'
-                    )
-                    
-                    # Calculate powerplay average (assuming powerplay is first 6 overs)
-                    # This is a simplified calculation - you might want to make it more sophisticated
-                    if not team_detailed.empty:
-                        # Get powerplay runs when team was batting
-                        pp_runs_cols = [col for col in team_detailed.columns if 'pp_runs' in col and 'innings1' in col]
-                        if pp_runs_cols:
-                            powerplay_avg = team_detailed[pp_runs_cols[0]].mean()
-                        
-                        # Get death overs economy when team was bowling
-                        do_economy_cols = [col for col in team_detailed.columns if 'economy_rate' in col and 'innings2' in col]
-                        if do_economy_cols:
-                            death_overs_economy = team_detailed[do_economy_cols[0]].mean()
-                            
-                except Exception:
-                    # Fallback to reasonable estimates based on team performance
-                    wins = len(team_matches[team_matches['winner'] == team_name])
-                    win_rate = wins / len(team_matches) if len(team_matches) > 0 else 0
-                    
-                    # Estimate powerplay avg based on win rate (better teams tend to have higher pp scores)
-                    powerplay_avg = 45 + (win_rate * 20)  # Range: 45-65
-                    
-                    # Estimate death overs economy (better teams have lower economy)
-                    death_overs_economy = 10 - (win_rate * 2)  # Range: 8-10
+                pp_total, pp_count = self.index.team_pp[team_name]
+                economy_total, economy_count = self.index.team_economy[team_name]
+                if pp_count:
+                    powerplay_avg = pp_total / pp_count
+                if economy_count:
+                    death_overs_economy = economy_total / economy_count
             
             # Create impact players (simplified - in real implementation you'd analyze ball-by-ball data)
             impact_players = self._get_impact_players(team_id)
@@ -269,24 +267,22 @@ class HistoricalStatsCalculator:
             if not venue_name:
                 return []
             
-            # Get all matches at this venue
-            venue_matches = self.match_data[self.match_data['venue'] == venue_name]
-            
-            if venue_matches.empty:
+            # Row of the team x venue table
+            if venue_name not in self.index.venue_matches:
                 return []
+            venue_matches = self.index.venue_matches[venue_name]
+            venue_wins = self.index.venue_wins[venue_name]
             
             venue_stats = []
             
-            # Calculate stats for each team at this venue
+            # Stats for each team at this venue
             for team_id, team_name in self.team_mapping.items():
-                team_at_venue = venue_matches[
-                    (venue_matches['team1'] == team_name) | (venue_matches['team2'] == team_name)
-                ]
+                k = self.index.team_index[team_name]
+                matches = int(venue_matches[k])
                 
-                if not team_at_venue.empty:
-                    matches = len(team_at_venue)
-                    wins = len(team_at_venue[team_at_venue['winner'] == team_name])
-                    win_rate = (wins / matches) * 100 if matches > 0 else 0
+                if matches > 0:
+                    wins = int(venue_wins[k])
+                    win_rate = (wins / matches) * 100
                     
                     venue_stats.append({
                         "venueId": venue_id,
@@ -309,9 +305,7 @@ class HistoricalStatsCalculator:
             if not venue_name:
                 return None
             
-            venue_matches = self.match_data[self.match_data['venue'] == venue_name]
-            
-            if venue_matches.empty:
+            if venue_name not in self.index.venue_matches:
                 # Return default values for known venues
                 venue_defaults = {
                     "wankhede": {"capacity": 33108, "avgFirstInnings": 178, "boundaryPercentage": 16.2, "sixRate": 2.8},
@@ -325,25 +319,19 @@ class HistoricalStatsCalculator:
                 })
             
             # Calculate actual stats from historical data
-            avg_first_innings = venue_matches['target_runs'].mean() if 'target_runs' in venue_matches.columns else 165
+            target_total, target_count = self.index.venue_target[venue_name]
+            avg_first_innings = target_total / target_count if target_count else np.nan
             
-            # For boundary percentage and six rate, we'd need ball-by-ball data
-            # For now, use reasonable estimates
+            # For boundary percentage and six rate, we'd need ball-by-ball data with venues
+            # Otherwise, use reasonable estimates
             boundary_percentage = 15.0
             six_rate = 2.5
             
-            if self.ball_data is not None:
-                try:
-                    venue_balls = self.ball_data[self.ball_data['venue'] == venue_name] if 'venue' in self.ball_data.columns else pd.DataFrame()
-                    if not venue_balls.empty:
-                        total_balls = len(venue_balls)
-                        boundaries = len(venue_balls[venue_balls['batsman_run'] >= 4]) if 'batsman_run' in venue_balls.columns else 0
-                        sixes = len(venue_balls[venue_balls['batsman_run'] == 6]) if 'batsman_run' in venue_balls.columns else 0
-                        
-                        boundary_percentage = (boundaries / total_balls) * 100 if total_balls > 0 else 15.0
-                        six_rate = (sixes / (total_balls / 6)) if total_balls > 0 else 2.5  # per over
-                except Exception:
-                    pass
+            if venue_name in self.index.venue_balls:
+                total_balls, boundaries, sixes = self.index.venue_balls[venue_name]
+                if total_balls > 0:
+                    boundary_percentage = (boundaries / total_balls) * 100
+                    six_rate = sixes / (total_balls / 6)  # per over
             
             return {
                 "avgFirstInnings": int(avg_first_innings) if not np.isnan(avg_first_innings) else 165,
@@ -355,5 +343,3 @@ class HistoricalStatsCalculator:
             print(f"Error getting venue details: {e}")
             return None
 
-# Global instance
-stats_calculator = HistoricalStatsCalculator()
\ No newline at end of file
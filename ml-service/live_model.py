@@ -0,0 +1,150 @@
+# ml-service/live_model.py
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+INNINGS_BALLS = 120
+WICKETS = 10
+MAX_RUNS = 400          # runs dimension of the tables; larger targets are treated as unreachable
+MAX_BALL_RUNS = 7       # runs off one legal ball (plus the extras bowled before it), capped
+WICKET_BUCKETS = np.array([0, 0, 0, 1, 1, 1, 2, 2, 2, 2, 2])   # wickets lost -> bucket
+SMOOTHING = 50.0        # pseudo-counts pulling sparse (over, wicket bucket) cells towards the over
+
+
+def ball_outcome_probabilities(ball_data: pd.DataFrame) -> np.ndarray:
+    """
+    Per-ball outcome distribution from the ball-by-ball table.
+
+    Wides and no-balls don't use up a ball, so their runs are added to the next
+    legal delivery. The result has shape (20 overs, 3 wicket buckets,
+    MAX_BALL_RUNS + 1 runs, 2 wicket flags) and sums to 1 over the last two axes.
+    """
+    balls = ball_data[(ball_data["innings"] <= 2) & (ball_data["is_super_over"] == 0)]
+    legal = 1 - ((balls["is_wide_ball"] + balls["is_no_ball"]) > 0).astype(np.int64)
+    innings_key = [balls["match_id"], balls["innings"]]
+
+    # Index of the legal ball each delivery belongs to (illegal ones attach to the next legal ball)
+    ball_idx = legal.groupby(innings_key).cumsum() - legal
+    deliveries = pd.DataFrame({
+        "match_id": balls["match_id"].to_numpy(), "innings": balls["innings"].to_numpy(),
+        "ball": ball_idx.to_numpy(), "legal": legal.to_numpy(),
+        "runs": balls["total_runs"].to_numpy(np.int64), "wicket": balls["is_wicket"].to_numpy(np.int64),
+    })
+    per_ball = deliveries.groupby(["match_id", "innings", "ball"], sort=False).sum()
+    per_ball = per_ball[per_ball["legal"] > 0].reset_index()
+
+    # Wickets already lost before each ball
+    lost = per_ball.groupby(["match_id", "innings"], sort=False)["wicket"].cumsum() - per_ball["wicket"]
+
+    over = np.minimum(per_ball["ball"].to_numpy() // 6, 19)
+    bucket = WICKET_BUCKETS[np.minimum(lost.to_numpy(), WICKETS)]
+    runs = np.minimum(per_ball["runs"].to_numpy(), MAX_BALL_RUNS)
+    wicket = np.minimum(per_ball["wicket"].to_numpy(), 1)
+
+    counts = np.zeros((20, 3, MAX_BALL_RUNS + 1, 2))
+    np.add.at(counts, (over, bucket, runs, wicket), 1)
+
+    over_counts = counts.sum(axis=1, keepdims=True)
+    over_probs = (over_counts + 1) / (over_counts + 1).sum(axis=(2, 3), keepdims=True)
+    cell_totals = counts.sum(axis=(2, 3), keepdims=True)
+    return (counts + SMOOTHING * over_probs) / (cell_totals + SMOOTHING)
+
+
+class LiveWinModel:
+    """
+    In-play win probability from precomputed lookup tables.
+
+    chase[b, k, n] is the chasing side's win probability with b balls left, k
+    wickets in hand and n runs still needed (a tie counts as half a win).
+    runs[b, k, x] is the distribution of further runs x for a side batting first
+    with b balls left and k wickets in hand. Both come from one backward pass
+    over the per-ball outcome distribution, so a query is a few array lookups.
+    """
+
+    def __init__(self, outcome_probs: np.ndarray):
+        self.outcome_probs = outcome_probs
+        self.chase, self.runs = self._build_tables(outcome_probs)
+        # Chase win probability from the start of the second innings, padded so any first-innings total indexes it
+        self.chase_start = np.concatenate([self.chase[INNINGS_BALLS, WICKETS], np.zeros(2 * MAX_RUNS + 2)])
+
+    @classmethod
+    def from_balls(cls, ball_data: pd.DataFrame) -> "LiveWinModel":
+        return cls(ball_outcome_probabilities(ball_data))
+
+    @staticmethod
+    def _build_tables(probs: np.ndarray):
+        n = MAX_RUNS + 1
+        chase = np.zeros((INNINGS_BALLS + 1, WICKETS + 1, n))
+        runs = np.zeros((INNINGS_BALLS + 1, WICKETS + 1, n))
+
+        # Innings over (balls or wickets exhausted): won if nothing needed, tied on exactly one
+        chase[:, :, 0] = 1.0
+        chase[0, :, 1] = 0.5
+        chase[:, 0, 1] = 0.5
+        runs[0, :, 0] = 1.0
+        runs[:, 0, 0] = 1.0
+
+        for b in range(1, INNINGS_BALLS + 1):
+            over = min((INNINGS_BALLS - b) // 6, 19)
+            for k in range(1, WICKETS + 1):
+                p = probs[over, WICKET_BUCKETS[WICKETS - k]]
+                win_next = np.concatenate([np.ones(MAX_BALL_RUNS), chase[b - 1, k]])
+                out_next = np.concatenate([np.ones(MAX_BALL_RUNS), chase[b - 1, k - 1]])
+                value = np.zeros(n)
+                dist = np.zeros(n)
+                for r in range(MAX_BALL_RUNS + 1):
+                    # needing n - r afterwards (anything <= 0 is a win)
+                    lo = MAX_BALL_RUNS - r
+                    value += p[r, 0] * win_next[lo:lo + n] + p[r, 1] * out_next[lo:lo + n]
+                    dist[r:] += p[r, 0] * runs[b - 1, k, :n - r] + p[r, 1] * runs[b - 1, k - 1, :n - r]
+                value[0] = 1.0
+                chase[b, k] = value
+                runs[b, k] = dist
+        return chase, runs
+
+    def batting_win_probability(self, innings: int, runs, wickets, balls_bowled,
+                                target: Optional[int] = None) -> np.ndarray:
+        """
+        Win probability of the side currently batting, vectorized over states.
+
+        Args:
+            innings (int): 1 or 2.
+            runs, wickets, balls_bowled: Array-likes of the innings state (legal balls bowled).
+            target (int): Runs needed to win in the second innings (first-innings total + 1).
+        """
+        runs = np.asarray(runs, dtype=np.int64)
+        wickets_in_hand = WICKETS - np.clip(np.asarray(wickets, dtype=np.int64), 0, WICKETS)
+        balls_left = INNINGS_BALLS - np.clip(np.asarray(balls_bowled, dtype=np.int64), 0, INNINGS_BALLS)
+
+        if innings == 2:
+            need = np.asarray(target, dtype=np.int64) - runs
+            prob = self.chase[balls_left, wickets_in_hand, np.clip(need, 0, MAX_RUNS)]
+            return np.where(need > MAX_RUNS, 0.0, prob)
+
+        # First innings: P(win) = sum over further runs x of P(x) * P(chase of runs + x + 1 fails)
+        further = np.arange(MAX_RUNS + 1)
+        chase_need = np.clip(runs, 0, MAX_RUNS)[:, None] + further[None, :] + 1
+        return np.einsum("sx,sx->s", self.runs[balls_left, wickets_in_hand], 1.0 - self.chase_start[chase_need])
+
+    def start_probability(self) -> float:
+        """Win probability of the side batting first, before a ball is bowled"""
+        return float(self.batting_win_probability(1, [0], [0], [0])[0])
+
+
+def blend_with_prior(state_prob, prior_prob: float, start_prob: float, match_balls_left) -> np.ndarray:
+    """
+    Fold the pre-match model probability into state-based probabilities.
+
+    The pre-match edge (prior vs the state model's start probability, in logits)
+    is added to the state logit and fades linearly with the balls left in the
+    match, so the result equals the prior before the first ball and the state
+    model at the end.
+    """
+    eps = 1e-6
+    logit = lambda p: np.log(np.clip(p, eps, 1 - eps) / (1 - np.clip(p, eps, 1 - eps)))
+    weight = np.clip(np.asarray(match_balls_left, dtype=float) / (2 * INNINGS_BALLS), 0.0, 1.0)
+    edge = logit(prior_prob) - logit(start_prob)
+    blended = 1.0 / (1.0 + np.exp(-(logit(state_prob) + weight * edge)))
+    # Decided states stay decided
+    return np.where((state_prob <= 0.0) | (state_prob >= 1.0), state_prob, blended)
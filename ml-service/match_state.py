@@ -0,0 +1,113 @@
+# ml-service/match_state.py
+import threading
+from typing import Any, Dict, Sequence, Tuple
+
+import numpy as np
+
+from features_engineering_encoding import (
+    FeatureEngine,
+    RollingStatsAccumulator,
+    BallRollingAccumulator,
+    TossStatsAccumulator,
+    HeadToHeadTossAccumulator,
+    ChasingDefendingAccumulator,
+    VenueAccumulator,
+    selected_features,
+    sort_chronologically,
+)
+from normalization import CURRENT_TEAMS, VENUE_IDS, Vocabulary, unique_names
+from metrics import stage
+
+FIXTURE_FIELDS = ("team1", "team2", "venue", "toss_winner", "toss_decision")
+
+
+def add_diff_features_row(features: Dict[str, float]) -> Dict[str, float]:
+    """Row version of add_diff_features: *_diff = team1_x - team2_x for every team1_/team2_ pair"""
+    for col in [c for c in features if c.startswith("team1_")]:
+        suffix = col[len("team1_"):]
+        other = f"team2_{suffix}"
+        if other in features:
+            features[f"{suffix}_diff"] = features[col] - features[other]
+    return features
+
+
+class MatchState:
+    """
+    Rolling feature state over the full match history.
+
+    Built once from the historical data, then kept current one completed match
+    at a time with append_match(). An update only touches the entries of the
+    two teams, their pairing and the venue, so it costs the same however long
+    the history is. Teams and venues are seeded into the engine's vocabularies
+    in the same order as the model's label encoders (sorted current teams).
+    """
+
+    def __init__(self, window=5, prior_matches=20, h2h_prior_matches=4):
+        self.engine = FeatureEngine([
+            RollingStatsAccumulator(),
+            BallRollingAccumulator(prior_matches),
+            TossStatsAccumulator(window),
+            HeadToHeadTossAccumulator(h2h_prior_matches),
+            ChasingDefendingAccumulator(),
+            VenueAccumulator(),
+        ], teams=Vocabulary(CURRENT_TEAMS), venues=Vocabulary(unique_names(VENUE_IDS.values())))
+        self.match_count = 0
+        self.generation = 0     # bumped by every append_match(), so callers can spot a state change
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_history(cls, historical_data, **params) -> "MatchState":
+        """Fold every historical match (in date order, like build_match_features) into a new state"""
+        state = cls(**params)
+        if historical_data is not None and not historical_data.empty:
+            state.engine.fold(sort_chronologically(historical_data))
+            state.match_count = len(historical_data)
+        return state
+
+    def append_match(self, match: Dict[str, Any]):
+        """
+        Fold one completed match into the state.
+
+        Args:
+            match (dict): Normalized match fields (team1, team2, venue, toss_winner,
+                          toss_decision, winner, match_type, target_runs and optionally
+                          the innings1_/innings2_ summary columns). Missing fields are NaN.
+        """
+        record = {f: match.get(f, np.nan) for f in self.engine.fields}
+        with self._lock:
+            self.engine.update(record)
+            self.match_count += 1
+            self.generation += 1
+
+    def features(self, team1: str, team2: str, venue: str, toss_winner: str, toss_decision: str) -> Dict[str, float]:
+        """selected_features for a fixture, as if it were the next match in the history"""
+        fixture = {"team1": team1, "team2": team2, "venue": venue,
+                   "toss_winner": toss_winner, "toss_decision": toss_decision}
+        with stage("state_snapshot"), self._lock:
+            features = self.engine.snapshot(fixture)
+        with stage("add_diff_features"):
+            features = add_diff_features_row(features)
+        with stage("select_features"):
+            features["toss_decision_bat"] = 1 if toss_decision == "bat" else 0
+            features["toss_decision_field"] = 1 if toss_decision == "field" else 0
+            return {f: features.get(f, 0) for f in selected_features}
+
+    def features_many(self, fixtures: Sequence[Tuple[str, str, str, str, str]]) -> np.ndarray:
+        """
+        selected_features for many fixtures at once (same values as features()).
+
+        Args:
+            fixtures: (team1, team2, venue, toss_winner, toss_decision) tuples.
+
+        Returns:
+            np.ndarray: (len(fixtures), len(selected_features)) float64 matrix.
+        """
+        columns = {field: list(values) for field, values in zip(FIXTURE_FIELDS, zip(*fixtures))}
+        with self._lock:
+            matrix = self.engine.snapshot_many(columns)
+        features = add_diff_features_row(dict(zip(self.engine.columns, matrix.T)))
+        decisions = np.asarray(columns["toss_decision"])
+        features["toss_decision_bat"] = (decisions == "bat").astype(np.float64)
+        features["toss_decision_field"] = (decisions == "field").astype(np.float64)
+        zeros = np.zeros(len(fixtures))
+        return np.column_stack([features.get(f, zeros) for f in selected_features])
@@ -0,0 +1,171 @@
+# ml-service/model_registry.py
+import json
+import os
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from data_cache import hash_files
+
+REGISTRY_DIR = "models"
+ACTIVE_FILE = "ACTIVE"
+MODEL_FILE = "model.cbm"
+REFERENCE_FILE = "model.pkl"        # optional pickled copy, used by the load self-check
+ENCODERS_FILE = "label_encoders.pkl"
+METADATA_FILE = "metadata.json"
+
+
+@dataclass
+class LoadedModel:
+    """One registry version in memory; requests read the active one once and use it throughout"""
+    version: str
+    model: Any
+    label_encoders: Optional[Dict] = None
+    loaded_at: float = field(default_factory=time.time)
+
+
+class ModelRegistry:
+    """
+    Versioned model artifacts in a local directory:
+
+        models/<version>/model.cbm            CatBoost native model
+        models/<version>/model.pkl            optional pickle (self-check reference)
+        models/<version>/label_encoders.pkl   optional encoders
+        models/<version>/metadata.json
+        models/ACTIVE                         name of the active version
+
+    Versions are immutable once published. Activation rewrites ACTIVE through
+    an atomic rename, so every worker watching the file sees either the old
+    or the new version, never a partial write.
+    """
+
+    def __init__(self, root: str = REGISTRY_DIR):
+        self.root = root
+
+    def version_dir(self, version: str) -> str:
+        return os.path.join(self.root, version)
+
+    def versions(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root)
+                      if os.path.isfile(os.path.join(self.root, name, MODEL_FILE)))
+
+    def active_version(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.root, ACTIVE_FILE)) as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        return version if version in self.versions() else None
+
+    def metadata(self, version: str) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.version_dir(version), METADATA_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def artifact(self, version: str, name: str) -> Optional[str]:
+        path = os.path.join(self.version_dir(version), name)
+        return path if os.path.exists(path) else None
+
+    def publish(self, model_path: str, encoders_path: Optional[str] = None,
+                reference_path: Optional[str] = None, version: Optional[str] = None,
+                metadata: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Copy model artifacts into a new version directory (not activated).
+
+        Without an explicit version the name is a timestamp plus the artifacts'
+        content hash; publishing identical artifacts again returns the existing version.
+        `metadata` (e.g. training parameters and timings) is stored in metadata.json.
+        """
+        sources = {MODEL_FILE: model_path, ENCODERS_FILE: encoders_path, REFERENCE_FILE: reference_path}
+        sources = {name: path for name, path in sources.items() if path and os.path.exists(path)}
+        if MODEL_FILE not in sources:
+            raise FileNotFoundError(model_path)
+        digest = hash_files([sources[name] for name in sorted(sources)])
+
+        for existing in self.versions():
+            if self.metadata(existing).get("sha256") == digest:
+                return existing
+        version = version or f"{time.strftime('%Y%m%d-%H%M%S')}-{digest[:8]}"
+        if os.path.exists(self.version_dir(version)):
+            raise ValueError(f"Model version {version} already exists")
+
+        # Stage next to the final directory, then rename, so a half-copied version is never listed
+        staging = os.path.join(self.root, f".{version}.tmp")
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        for name, path in sources.items():
+            shutil.copy2(path, os.path.join(staging, name))
+        with open(os.path.join(staging, METADATA_FILE), "w") as f:
+            json.dump({**(metadata or {}), "version": version, "sha256": digest,
+                       "created": time.strftime("%Y-%m-%d %H:%M:%S"), "sources": sources}, f, indent=2)
+        os.replace(staging, self.version_dir(version))
+        print(f"📦 Published model version {version}")
+        return version
+
+    def activate(self, version: str):
+        if version not in self.versions():
+            raise KeyError(f"Unknown model version {version}")
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = os.path.join(self.root, f".{ACTIVE_FILE}.tmp")
+        with open(tmp_path, "w") as f:
+            f.write(version + "\n")
+        os.replace(tmp_path, os.path.join(self.root, ACTIVE_FILE))
+
+    def ensure_active(self, model_path: str, encoders_path: Optional[str] = None,
+                      reference_path: Optional[str] = None) -> str:
+        """The active version, publishing and activating the bundled artifacts if the registry is empty"""
+        version = self.active_version()
+        if version is None:
+            versions = self.versions()
+            version = versions[-1] if versions else self.publish(model_path, encoders_path, reference_path)
+            self.activate(version)
+        return version
+
+    def active_mtime(self) -> Optional[float]:
+        try:
+            return os.stat(os.path.join(self.root, ACTIVE_FILE)).st_mtime_ns
+        except OSError:
+            return None
+
+
+class RegistryWatcher:
+    """
+    Polls the registry's ACTIVE file and calls on_change(version) when another
+    process (or a deploy script) activates a different version. Each worker
+    runs its own watcher, so one activation reaches every worker.
+    """
+
+    def __init__(self, registry: ModelRegistry, on_change: Callable[[str], Any], interval: float = 5.0):
+        self.registry = registry
+        self.on_change = on_change
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._seen = registry.active_mtime()
+
+    def start(self):
+        if self._thread is None and self.interval > 0:
+            self._thread = threading.Thread(target=self._run, name="model-registry-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            mtime = self.registry.active_mtime()
+            if mtime == self._seen:
+                continue
+            self._seen = mtime
+            version = self.registry.active_version()
+            if version is not None:
+                try:
+                    self.on_change(version)
+                except Exception as e:
+                    print(f"❌ Model reload to {version} failed, keeping the current model: {e}")
@@ -0,0 +1,175 @@
+# ml-service/model_runtime.py
+import json
+import os
+import tempfile
+import threading
+from typing import List, Optional, Sequence
+
+import joblib
+import numpy as np
+import pandas as pd
+from catboost import CatBoostClassifier
+
+SELF_CHECK_TOLERANCE = 1e-9     # max |p_fast - p_reference| accepted at startup
+FAST_PATH_MAX_ROWS = 128        # larger batches amortize CatBoost's per-call overhead and go through it
+
+
+class ObliviousTrees:
+    """
+    NumPy evaluation of a CatBoost oblivious-tree ensemble (float features only).
+
+    Every tree applies the same split at each depth, so its leaf is the bit
+    pattern of (x[feature] > border) over its splits. Trees shallower than the
+    deepest one are padded with never-true splits. Features are compared in
+    float32, like CatBoost's own binarization.
+    """
+
+    def __init__(self, features: np.ndarray, borders: np.ndarray, leaf_values: np.ndarray,
+                 scale: float, bias: float, n_features: int):
+        self.features = features            # (trees, depth) float feature index per split
+        self.borders = borders              # (trees, depth) float32 borders, +inf for padding
+        self.leaf_values = leaf_values      # (trees, 2 ** depth)
+        self.scale = scale
+        self.bias = bias
+        self.n_features = n_features
+        self.powers = 1 << np.arange(features.shape[1])
+        self.tree_offsets = np.arange(features.shape[0]) * leaf_values.shape[1]
+        self.flat_leaves = leaf_values.ravel()
+
+    @classmethod
+    def from_catboost(cls, model: CatBoostClassifier) -> "ObliviousTrees":
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "model.json")
+            model.save_model(path, format="json")
+            with open(path) as f:
+                spec = json.load(f)
+
+        if spec["features_info"].get("categorical_features"):
+            raise ValueError("categorical features are not supported by the NumPy scorer")
+        trees = spec["oblivious_trees"]
+        depth = max(len(tree["splits"]) for tree in trees)
+        features = np.zeros((len(trees), depth), dtype=np.intp)
+        borders = np.full((len(trees), depth), np.inf, dtype=np.float32)
+        leaf_values = np.zeros((len(trees), 1 << depth))
+        for t, tree in enumerate(trees):
+            for d, split in enumerate(tree["splits"]):
+                if split["split_type"] != "FloatFeature":
+                    raise ValueError(f"unsupported split type {split['split_type']}")
+                features[t, d] = split["float_feature_index"]
+                borders[t, d] = split["border"]
+            leaf_values[t, :len(tree["leaf_values"])] = tree["leaf_values"]
+
+        scale, biases = spec["scale_and_bias"]
+        n_features = len(spec["features_info"]["float_features"])
+        return cls(features, borders, leaf_values, float(scale), float(biases[0]), n_features)
+
+    def raw(self, X: np.ndarray) -> np.ndarray:
+        """Raw (logit) score for each row of an (n, n_features) matrix"""
+        X = np.asarray(X, dtype=np.float32)
+        bits = X[:, self.features] > self.borders                       # (n, trees, depth)
+        leaves = bits @ self.powers + self.tree_offsets                  # (n, trees)
+        return self.flat_leaves[leaves].sum(axis=1) * self.scale + self.bias
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        p1 = 1.0 / (1.0 + np.exp(-self.raw(X)))
+        return np.column_stack([1.0 - p1, p1])
+
+
+class CompiledModel:
+    """
+    The service's prediction model: a native CatBoost model plus its NumPy scorer.
+
+    predict_proba takes a DataFrame or an array whose columns follow
+    `feature_names` (selected_features). Once the startup self-check has
+    passed, single rows and small batches go through the NumPy scorer; large
+    batches, or every call if the check failed or could not run, go through
+    CatBoost itself.
+    """
+
+    def __init__(self, model: CatBoostClassifier, feature_names: Sequence[str]):
+        self.model = model
+        self.feature_names = list(feature_names)
+        if list(model.feature_names_) != self.feature_names:
+            raise ValueError("model feature order differs from selected_features")
+        self.trees = ObliviousTrees.from_catboost(model)
+        self.fast_path = False
+        self.max_check_error: Optional[float] = None
+        self._local = threading.local()
+
+    @property
+    def classes_(self):
+        return self.model.classes_
+
+    def _matrix(self, X) -> np.ndarray:
+        if isinstance(X, pd.DataFrame):
+            X = X[self.feature_names] if list(X.columns) != self.feature_names else X
+            return X.to_numpy(dtype=np.float64)
+        return np.asarray(X, dtype=np.float64).reshape(-1, len(self.feature_names))
+
+    def predict_proba(self, X) -> np.ndarray:
+        X = self._matrix(X)
+        if self.fast_path and len(X) <= FAST_PATH_MAX_ROWS:
+            return self.trees.predict_proba(X)
+        return self.model.predict_proba(X)
+
+    def predict_row(self, vector: Sequence[float]) -> float:
+        """P(class 1) for one feature vector, scored from a per-thread preallocated buffer"""
+        row = getattr(self._local, "row", None)
+        if row is None:
+            row = self._local.row = np.empty((1, len(self.feature_names)), dtype=np.float64)
+        row[0] = vector
+        return float(self.predict_proba(row)[0, 1])
+
+    def self_check(self, reference, X: np.ndarray, tolerance: float = SELF_CHECK_TOLERANCE) -> bool:
+        """
+        Compare the NumPy scorer and the native model against `reference` (the pickled model)
+        on the rows of X; the fast path is only enabled if both agree within `tolerance`.
+        """
+        X = self._matrix(X)
+        expected = reference.predict_proba(X)[:, 1]
+        native_error = float(np.max(np.abs(self.model.predict_proba(X)[:, 1] - expected)))
+        fast_error = float(np.max(np.abs(self.trees.predict_proba(X)[:, 1] - expected)))
+        self.max_check_error = fast_error
+        if native_error > tolerance:
+            raise RuntimeError(f"native model disagrees with the pickled model (max error {native_error:.3g})")
+        self.fast_path = fast_error <= tolerance
+        if self.fast_path:
+            print(f"✅ Model self-check passed on {len(X)} rows (max error {fast_error:.2g})")
+        else:
+            print(f"⚠️ NumPy scorer off by {fast_error:.3g} on the self-check rows, scoring through CatBoost")
+        return self.fast_path
+
+
+def check_rows(samples: Optional[np.ndarray], n_features: int, n_random: int = 256, seed: int = 0) -> np.ndarray:
+    """Self-check inputs: the given samples plus jittered copies, random rows and a few NaNs"""
+    rng = np.random.default_rng(seed)
+    rows: List[np.ndarray] = [rng.normal(0.0, 1.0, (n_random, n_features))]
+    if samples is not None and len(samples):
+        samples = np.asarray(samples, dtype=np.float64)
+        rows += [samples, samples + rng.normal(0.0, 0.05, samples.shape)]
+    X = np.vstack(rows)
+    nan_rows = rng.choice(len(X), size=min(16, len(X)), replace=False)
+    X[nan_rows, rng.integers(0, n_features, len(nan_rows))] = np.nan
+    return X
+
+
+def load_model(cbm_path: str, pickle_path: Optional[str], feature_names: Sequence[str],
+               samples: Optional[np.ndarray] = None) -> CompiledModel:
+    """
+    Load the model in CatBoost's native format, exporting it from the pickle on first run,
+    and run the self-check against the pickled model (or, without one, the native model).
+    """
+    reference = None
+    if not os.path.exists(cbm_path):
+        reference = joblib.load(pickle_path)
+        reference.save_model(cbm_path)
+        print(f"💾 Exported {pickle_path} to {cbm_path}")
+
+    native = CatBoostClassifier()
+    native.load_model(cbm_path)
+    compiled = CompiledModel(native, feature_names)
+
+    if reference is None and pickle_path and os.path.exists(pickle_path):
+        reference = joblib.load(pickle_path)
+    compiled.self_check(reference if reference is not None else native, check_rows(samples, len(compiled.feature_names)))
+    return compiled
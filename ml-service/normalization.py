@@ -0,0 +1,200 @@
+# ml-service/normalization.py
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Raw team labels (every franchise name that appears in the CSVs) -> current franchise.
+# Defunct franchises map to None so their matches get dropped.
+TEAM_ALIASES: Dict[str, Optional[str]] = {
+    # RCB
+    "Royal Challengers Bangalore": "Royal Challengers Bengaluru",
+    "Royal Challengers Bengaluru": "Royal Challengers Bengaluru",
+
+    # Punjab
+    "Kings XI Punjab": "Punjab Kings",
+    "Punjab Kings": "Punjab Kings",
+
+    # Delhi
+    "Delhi Daredevils": "Delhi Capitals",
+    "Delhi Capitals": "Delhi Capitals",
+    "�Delhi Capitals": "Delhi Capitals",   # fix encoding issue
+
+    # Mumbai
+    "Mumbai Indians": "Mumbai Indians",
+
+    # KKR
+    "Kolkata Knight Riders": "Kolkata Knight Riders",
+
+    # Rajasthan
+    "Rajasthan Royals": "Rajasthan Royals",
+
+    # Deccan Chargers → now defunct, map to Sunrisers
+    "Deccan Chargers": "Sunrisers Hyderabad",
+    "Sunrisers Hyderabad": "Sunrisers Hyderabad",
+
+    # Defunct franchises
+    "Kochi Tuskers Kerala": None,
+    "Pune Warriors": None,
+    "Rising Pune Supergiants": None,
+    "Rising Pune Supergiant": None,
+
+    # Gujarat
+    "Gujarat Lions": "Gujarat Titans",
+    "Gujarat Titans": "Gujarat Titans",
+
+    # Lucknow
+    "Lucknow Super Giants": "Lucknow Super Giants",
+
+    # Chennai
+    "Chennai Super Kings": "Chennai Super Kings",
+}
+
+# Raw match_type labels -> Final / Eliminator 1 / Eliminator 2; everything else (numbered games) is League
+MATCH_TYPES: Dict[str, str] = {
+    "Final": "Final",
+    "Qualifier 1": "Eliminator 1",
+    "Elimination Final": "Eliminator 1",
+    "Eliminator": "Eliminator 1",
+    "Semi Final": "Eliminator 1",
+    "Qualifier 2": "Eliminator 2",
+    "3rd Place Play-Off": "Eliminator 2",
+}
+DEFAULT_MATCH_TYPE = "League"
+PLAYOFF_MATCH_TYPES = ("Final", "Eliminator 1", "Eliminator 2")
+
+# UI IDs (as sent by the Node server) -> names as they appear in the match data
+TEAM_IDS: Dict[str, str] = {
+    "csk": "Chennai Super Kings",
+    "mi": "Mumbai Indians",
+    "rcb": "Royal Challengers Bengaluru",
+    "kkr": "Kolkata Knight Riders",
+    "dc": "Delhi Capitals",
+    "rr": "Rajasthan Royals",
+    "pbks": "Punjab Kings",
+    "srh": "Sunrisers Hyderabad",
+    "gt": "Gujarat Titans",
+    "lsg": "Lucknow Super Giants",
+}
+
+VENUE_IDS: Dict[str, str] = {
+    "wankhede": "Wankhede Stadium",
+    "eden": "Eden Gardens",
+    "chinnaswamy": "M Chinnaswamy Stadium",
+    "chepauk": "MA Chidambaram Stadium, Chepauk",
+    "kotla": "Feroz Shah Kotla",
+    "arun-jaitley": "Feroz Shah Kotla",   # the Node server's ID for the same ground
+    "sawai": "Sawai Mansingh Stadium",
+    "mohali": "Punjab Cricket Association Stadium, Mohali",
+    "uppal": "Rajiv Gandhi International Stadium, Uppal",
+    "narendra": "Narendra Modi Stadium",
+    "ekana": "Bharat Ratna Shri Atal Bihari Vajpayee Ekana Cricket Stadium",
+}
+
+CURRENT_TEAMS = sorted({team for team in TEAM_ALIASES.values() if team is not None})
+
+
+class UnknownLabelError(ValueError):
+    """A label missing from the normalization table, raised when unknown='raise'"""
+
+
+def normalize_team(team) -> Optional[str]:
+    """Current franchise name for one raw label; None for defunct or unknown teams"""
+    return TEAM_ALIASES.get(team)
+
+
+def normalize_match_type(match_type) -> str:
+    """Final / Eliminator 1 / Eliminator 2 / League for one raw match_type label"""
+    return MATCH_TYPES.get(match_type, DEFAULT_MATCH_TYPE)
+
+
+def _recode(values: pd.Series, table: Dict, unknown: str, default, kind: str) -> pd.Series:
+    """
+    Map a column through `table` once per distinct label (categorical recoding).
+
+    unknown: 'default' maps labels missing from the table to `default`, 'keep'
+    passes them through unchanged, 'raise' raises UnknownLabelError. Missing
+    values stay missing.
+    """
+    if unknown not in ("default", "keep", "raise"):
+        raise ValueError(f"unknown must be 'default', 'keep' or 'raise', got {unknown!r}")
+
+    categorical = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype("category")
+    labels = categorical.cat.categories
+    missing = [label for label in labels if label not in table]
+    if missing:
+        if unknown == "raise":
+            raise UnknownLabelError(f"Unknown {kind} labels: {missing}")
+        if unknown == "default" and default is None:
+            print(f"⚠️ Unknown {kind} labels treated as missing: {missing}")
+
+    mapped = [table.get(label, label if unknown == "keep" else default) for label in labels]
+    # One trailing slot for code -1 (missing input)
+    lookup = np.array(mapped + [None], dtype=object)
+    codes = categorical.cat.codes.to_numpy()
+    return pd.Series(lookup[codes], index=values.index, name=values.name, dtype=object)
+
+
+def normalize_teams(values: pd.Series, unknown: str = "default") -> pd.Series:
+    """Vectorized normalize_team; defunct teams (and, by default, unknown ones) become None"""
+    return _recode(values, TEAM_ALIASES, unknown, None, "team")
+
+
+def normalize_match_types(values: pd.Series, unknown: str = "default") -> pd.Series:
+    """Vectorized normalize_match_type; by default labels outside MATCH_TYPES are League"""
+    return _recode(values, MATCH_TYPES, unknown, DEFAULT_MATCH_TYPE, "match_type")
+
+
+def team_from_id(team_id: str) -> Optional[str]:
+    """Match-data team name for a UI team ID (case-insensitive), or None"""
+    return TEAM_IDS.get((team_id or "").lower())
+
+
+def venue_from_id(venue_id: str) -> Optional[str]:
+    """Match-data venue name for a UI venue ID (case-insensitive), or None"""
+    return VENUE_IDS.get((venue_id or "").lower())
+
+
+def unique_names(names: Iterable[str]) -> list:
+    """Names in first-seen order without duplicates (VENUE_IDS has aliases)"""
+    return list(dict.fromkeys(names))
+
+
+class Vocabulary:
+    """
+    Label <-> small integer ID, assigned in first-seen order.
+
+    Seed it with a known vocabulary (e.g. a fitted LabelEncoder's classes_) to
+    share IDs with the model artifacts; labels seen later get the next free ID.
+    Missing values encode as MISSING, never a real ID.
+    """
+
+    MISSING = -1
+
+    def __init__(self, labels: Iterable = ()):
+        self.labels: list = []
+        self.index: Dict = {}
+        for label in labels:
+            self.encode(label)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def encode(self, label) -> int:
+        if label is None or (isinstance(label, float) and np.isnan(label)):
+            return self.MISSING
+        code = self.index.get(label)
+        if code is None:
+            code = self.index[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+    def encode_many(self, values) -> np.ndarray:
+        """IDs for a column, looked up once per distinct label"""
+        values = values if isinstance(values, pd.Series) else pd.Series(values)
+        categorical = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype("category")
+        lookup = np.array([self.encode(label) for label in categorical.cat.categories] + [self.MISSING], dtype=np.int64)
+        return lookup[categorical.cat.codes.to_numpy()]
+
+    def decode(self, code: int):
+        return self.labels[code] if code >= 0 else None
@@ -0,0 +1,136 @@
+# ml-service/simulator.py
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+PLAYOFF_TEAMS = 4
+CHUNK_SIMULATIONS = 10_000   # simulations per seeded chunk; results don't depend on the worker count
+
+
+def _simulate_chunk(args) -> Dict[str, np.ndarray]:
+    """Run one seeded chunk of seasons and return per-team counts"""
+    seed_seq, n_sims, home, away, fixture_probs, pair_probs = args
+    rng = np.random.default_rng(seed_seq)
+    n_teams = pair_probs.shape[0]
+
+    # League stage: one uniform draw per fixture per season
+    home_won = (rng.random((n_sims, len(fixture_probs))) < fixture_probs).astype(np.float32)
+    home_onehot = np.eye(n_teams, dtype=np.float32)[home]
+    away_onehot = np.eye(n_teams, dtype=np.float32)[away]
+    wins = home_won @ home_onehot + (1 - home_won) @ away_onehot
+
+    # Table: wins, then a random tie-break (net run rate isn't simulated)
+    order = np.argsort(-(wins + rng.random((n_sims, n_teams)) * 0.5), axis=1)
+    seeds = order[:, :PLAYOFF_TEAMS]
+    s1, s2, s3, s4 = seeds.T
+
+    def play(a, b):
+        a_won = rng.random(n_sims) < pair_probs[a, b]
+        return np.where(a_won, a, b), np.where(a_won, b, a)
+
+    # IPL bracket (normalize_match_type labels): Eliminator 1 covers Qualifier 1 and the
+    # Eliminator, Eliminator 2 is Qualifier 2
+    q1_winner, q1_loser = play(s1, s2)
+    elim_winner, _ = play(s3, s4)
+    q2_winner, _ = play(q1_loser, elim_winner)
+    champion, _ = play(q1_winner, q2_winner)
+
+    def count(teams):
+        return np.bincount(teams.ravel(), minlength=n_teams)
+
+    return {
+        "wins": wins.sum(axis=0),
+        "playoffs": count(seeds),
+        "top_two": count(seeds[:, :2]),
+        "final": count(q1_winner) + count(q2_winner),
+        "title": count(champion),
+    }
+
+
+def simulation_pool(workers: Optional[int] = None) -> Optional[ProcessPoolExecutor]:
+    """
+    Process pool for simulate_tournament(pool=...), meant to be created once and reused;
+    None when there is only one worker (chunks then run inline).
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        return None
+    # spawn rather than fork: the service process runs threads
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+
+def pair_probability_matrix(teams: Sequence[str], pair_probs: Dict[Tuple[str, str], float]) -> np.ndarray:
+    """(T, T) matrix of P(row team beats column team) from {(team1, team2): P(team1 wins)}"""
+    index = {team: i for i, team in enumerate(teams)}
+    matrix = np.full((len(teams), len(teams)), 0.5)
+    for (a, b), p in pair_probs.items():
+        matrix[index[a], index[b]] = p
+    return matrix
+
+
+def simulate_tournament(
+    teams: Sequence[str],
+    fixtures: Sequence[Tuple[str, str]],
+    fixture_probs: Sequence[float],
+    pair_probs: np.ndarray,
+    simulations: int = 100_000,
+    seed: Optional[int] = None,
+    workers: Optional[int] = None,
+    pool: Optional[Executor] = None,
+) -> List[Dict]:
+    """
+    Monte Carlo simulation of a league season followed by the IPL playoffs.
+
+    Args:
+        teams: Team names; pair_probs rows/columns follow this order.
+        fixtures: (team1, team2) for every league match.
+        fixture_probs: P(team1 wins) for each fixture, from the prediction model.
+        pair_probs: (T, T) matrix, P(row team beats column team) in a playoff.
+        simulations: Number of seasons to simulate.
+        seed: Seed for reproducible results (same seed, same output for any worker count).
+        workers: Processes to spread the chunks over when no pool is given (default: CPU count;
+                 1 runs inline).
+        pool: Existing executor to run the chunks on instead of starting one for this call.
+
+    Returns:
+        list: One dict per team with expected wins and playoff/top-two/final/title probabilities,
+              sorted by title probability.
+    """
+    index = {team: i for i, team in enumerate(teams)}
+    home = np.array([index[a] for a, _ in fixtures], dtype=np.intp)
+    away = np.array([index[b] for _, b in fixtures], dtype=np.intp)
+    fixture_probs = np.asarray(fixture_probs, dtype=float)
+    pair_probs = np.asarray(pair_probs, dtype=float)
+    if len(teams) < PLAYOFF_TEAMS:
+        raise ValueError(f"Need at least {PLAYOFF_TEAMS} teams for the playoffs")
+
+    n_chunks = max(1, -(-simulations // CHUNK_SIMULATIONS))
+    sizes = [CHUNK_SIMULATIONS] * (n_chunks - 1) + [simulations - CHUNK_SIMULATIONS * (n_chunks - 1)]
+    seed_seqs = np.random.SeedSequence(seed).spawn(n_chunks)
+    tasks = [(s, n, home, away, fixture_probs, pair_probs) for s, n in zip(seed_seqs, sizes)]
+
+    workers = min(workers or os.cpu_count() or 1, n_chunks)
+    if pool is not None:
+        results = list(pool.map(_simulate_chunk, tasks))
+    elif workers <= 1:
+        results = [_simulate_chunk(task) for task in tasks]
+    else:
+        with simulation_pool(workers) as pool:
+            results = list(pool.map(_simulate_chunk, tasks))
+
+    totals = {key: sum(r[key] for r in results) for key in ("wins", "playoffs", "top_two", "final", "title")}
+    summary = [
+        {
+            "team": team,
+            "expectedWins": round(float(totals["wins"][i]) / simulations, 2),
+            "playoffProbability": round(float(totals["playoffs"][i]) / simulations, 4),
+            "topTwoProbability": round(float(totals["top_two"][i]) / simulations, 4),
+            "finalProbability": round(float(totals["final"][i]) / simulations, 4),
+            "titleProbability": round(float(totals["title"][i]) / simulations, 4),
+        }
+        for i, team in enumerate(teams)
+    ]
+    return sorted(summary, key=lambda row: -row["titleProbability"])
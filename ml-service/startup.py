@@ -0,0 +1,51 @@
+# ml-service/startup.py
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+
+class StartupStatus:
+    """Readiness flag plus per-phase load timings for the background loader"""
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.error: Optional[str] = None
+        self.current_phase: Optional[str] = None
+        self.failed_phase: Optional[str] = None
+        self.phases: Dict[str, float] = {}
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time one load phase; the duration lands in `phases` even if the phase fails"""
+        self.current_phase = name
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.failed_phase = name
+            raise
+        finally:
+            self.phases[name] = round(time.perf_counter() - start, 4)
+            self.current_phase = None
+
+    def mark_ready(self):
+        self.finished_at = time.time()
+        self.ready.set()
+        print(f"✅ Service ready in {self.finished_at - self.started_at:.2f}s: {self.phases}")
+
+    def mark_failed(self, error: Exception):
+        self.finished_at = time.time()
+        self.error = f"{self.failed_phase or 'startup'}: {error}"
+        print(f"❌ Service failed to load ({self.error})")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready.is_set(),
+            "error": self.error,
+            "loadingPhase": self.current_phase,
+            "phaseSeconds": dict(self.phases),
+            "elapsedSeconds": round((self.finished_at or time.time()) - self.started_at, 4),
+        }
@@ -0,0 +1,51 @@
+# ml-service/tests/conftest.py
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The service modules are flat files in ml-service/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from normalization import CURRENT_TEAMS, VENUE_IDS, unique_names  # noqa: E402
+
+INNINGS_COLUMNS = ["total_runs", "total_wickets", "balls_bowled", "pp_runs", "pp_wickets", "mo_runs", "mo_wickets",
+                   "do_runs", "do_wickets", "dot_balls", "boundaries", "run_rate", "dot_ball_rate"]
+
+
+def make_history(n_matches=240, seed=0):
+    """
+    Synthetic merged history (historical_data layout) whose match_ids are NOT in date order:
+    ids are shuffled within each season, like several real seasons.
+    """
+    rng = np.random.default_rng(seed)
+    teams, venues = list(CURRENT_TEAMS), unique_names(VENUE_IDS.values())
+    dates = pd.Timestamp("2015-04-01") + pd.to_timedelta(np.sort(rng.integers(0, 900, n_matches)), unit="D")
+    match_ids = np.arange(n_matches) + 1000
+    for season in np.unique(dates.year):
+        in_season = np.flatnonzero(dates.year == season)
+        match_ids[in_season] = rng.permutation(match_ids[in_season])
+
+    rows = []
+    for match_id, date in zip(match_ids, dates):
+        team1, team2 = rng.choice(teams, 2, replace=False)
+        row = {
+            "match_id": int(match_id), "date": date, "season": str(date.year),
+            "match_type": "Final" if rng.random() < 0.05 else "League",
+            "venue": rng.choice(venues), "team1": team1, "team2": team2,
+            "toss_winner": rng.choice([team1, team2]), "toss_decision": rng.choice(["bat", "field"]),
+            "winner": rng.choice([team1, team2]) if rng.random() < 0.97 else np.nan,
+            "target_runs": float(rng.integers(120, 230)),
+        }
+        for innings in ("innings1", "innings2"):
+            for col in INNINGS_COLUMNS:
+                row[f"{innings}_{col}"] = float(rng.integers(0, 200)) if "rate" not in col else float(rng.random() * 10)
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def history():
+    return make_history()
@@ -0,0 +1,64 @@
+# ml-service/tests/test_feature_order.py
+import numpy as np
+import pandas as pd
+import pytest
+
+import features_engineering_encoding as fe
+from match_state import MatchState
+
+
+def wrapper_chain(df):
+    """The step-by-step pipeline build_match_features replaces, run on df in its row order"""
+    df = fe.calculate_rolling_stats(df)
+    df = fe.compute_rolling_features_balls(df)
+    df = pd.concat([df, fe.calculate_toss_stats(df)], axis=1)
+    df = fe.add_head_to_head_toss_advantage(df)
+    df = fe.add_chasing_defending_strength(df)
+    df = fe.add_diff_features(df)
+    return fe.add_venue_features(df)
+
+
+def feature_columns(df):
+    return [c for c in fe.selected_features if c in df.columns]
+
+
+def test_match_ids_are_not_chronological(history):
+    # Guards the fixture: the tests below only mean something if id order and date order differ
+    by_id = history.sort_values("match_id")
+    assert (by_id["date"] < by_id["date"].cummax()).any()
+
+
+def test_sort_chronologically_orders_by_date_then_match_id(history):
+    ordered = fe.sort_chronologically(history.sample(frac=1, random_state=1))
+    assert ordered["date"].is_monotonic_increasing
+    same_day = ordered.groupby("date")["match_id"].apply(lambda ids: ids.is_monotonic_increasing)
+    assert same_day.all()
+
+
+def test_build_match_features_matches_wrapper_chain(history):
+    expected = wrapper_chain(fe.sort_chronologically(history))
+    columns = feature_columns(expected)
+    assert len(columns) > 40
+
+    # Same result however the caller ordered the rows (e.g. by match_id)
+    for df in (history, history.sort_values("match_id"), history.sample(frac=1, random_state=2)):
+        actual = fe.build_match_features(df)
+        assert actual["match_id"].tolist() == expected["match_id"].tolist()
+        np.testing.assert_allclose(actual[columns].to_numpy(dtype=float), expected[columns].to_numpy(dtype=float),
+                                   rtol=0, atol=1e-12, equal_nan=True)
+
+
+def test_match_id_order_would_leak(history):
+    # Folding in match_id order changes the rolling features, so the sort above matters
+    chronological = fe.build_match_features(history).set_index("match_id")
+    by_id = wrapper_chain(history.sort_values("match_id").reset_index(drop=True)).set_index("match_id")
+    columns = ["team1_streak", "team2_streak", "recent_form_diff", "head_to_head_winrate"]
+    assert not np.allclose(chronological.loc[by_id.index, columns].to_numpy(dtype=float),
+                           by_id[columns].to_numpy(dtype=float), equal_nan=True)
+
+
+def test_match_state_folds_in_date_order(history):
+    fixture = ("Chennai Super Kings", "Mumbai Indians", "Eden Gardens", "Mumbai Indians", "bat")
+    expected = MatchState.from_history(fe.sort_chronologically(history)).features(*fixture)
+    for df in (history.sort_values("match_id"), history.sample(frac=1, random_state=3)):
+        assert MatchState.from_history(df).features(*fixture) == pytest.approx(expected, nan_ok=True)
@@ -0,0 +1,47 @@
+# ml-service/tests/test_feature_timeline.py
+import numpy as np
+import pytest
+
+import features_engineering_encoding as fe
+from feature_timeline import FeatureTimeline
+from match_state import FIXTURE_FIELDS, MatchState
+
+FIXTURE = ("Chennai Super Kings", "Mumbai Indians", "Eden Gardens", "Mumbai Indians", "bat")
+
+
+@pytest.fixture
+def timeline(history):
+    return FeatureTimeline(history.sort_values("match_id"), checkpoint_every=16)
+
+
+def test_no_checkpoint_sees_a_later_dated_match(history, timeline):
+    dates = history.set_index("match_id")["date"]
+    folded = dates[timeline.match_ids].to_numpy()
+    for k in range(1, len(timeline.checkpoints)):
+        boundary = k * timeline.checkpoint_every
+        if boundary < len(folded):
+            assert folded[:boundary].max() <= folded[boundary:].min()
+
+
+def test_features_before_only_uses_earlier_matches(history, timeline):
+    ordered = fe.sort_chronologically(history)
+    for position in range(0, len(ordered), 37):
+        row = ordered.iloc[position]
+        earlier = history[(history["date"] < row["date"])
+                          | ((history["date"] == row["date"]) & (history["match_id"] < row["match_id"]))]
+        expected = MatchState.from_history(earlier).features(*(row[f] for f in FIXTURE_FIELDS))
+        assert timeline.features_before(row["match_id"]) == pytest.approx(expected, nan_ok=True)
+
+
+def test_as_of_date_sees_matches_played_strictly_before(history, timeline):
+    date = fe.sort_chronologically(history)["date"].iloc[len(history) // 2]
+    expected = MatchState.from_history(history[history["date"] < date]).features(*FIXTURE)
+    assert timeline.features_as_of(*FIXTURE, date=date) == pytest.approx(expected, nan_ok=True)
+
+
+def test_features_for_matches_matches_build_match_features(history, timeline):
+    expected = fe.build_match_features(history).set_index("match_id")
+    actual = timeline.features_for_matches(history["match_id"])
+    columns = [c for c in fe.selected_features if c in expected.columns]
+    np.testing.assert_allclose(actual[columns].to_numpy(), expected.loc[actual.index, columns].to_numpy(dtype=float),
+                               rtol=0, atol=1e-12, equal_nan=True)
@@ -0,0 +1,46 @@
+# ml-service/tests/test_missing_labels.py
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from match_state import MatchState
+from normalization import CURRENT_TEAMS, VENUE_IDS, Vocabulary, unique_names
+
+VENUES = unique_names(VENUE_IDS.values())
+
+
+def every_fixture():
+    return [(t1, t2, venue, t1, "bat") for t1, t2 in itertools.permutations(CURRENT_TEAMS, 2) for venue in VENUES]
+
+
+def with_last_match(history, **fields):
+    last = history.iloc[[-1]].assign(match_id=history["match_id"].max() + 1,
+                                      date=history["date"].max() + pd.Timedelta(days=1), **fields)
+    return pd.concat([history, last], ignore_index=True)
+
+
+def test_vocabulary_encodes_missing_labels_apart_from_real_ids():
+    vocab = Vocabulary(["a", "b"])
+    assert vocab.encode(None) == vocab.encode(np.nan) == Vocabulary.MISSING
+    assert vocab.encode_many(["b", np.nan, None, "c"]).tolist() == [1, Vocabulary.MISSING, Vocabulary.MISSING, 2]
+    assert vocab.decode(Vocabulary.MISSING) is None
+    assert len(vocab) == 3
+
+
+def test_missing_venue_and_toss_winner_leave_real_slots_alone(history):
+    # MatchState seeds exactly CURRENT_TEAMS and the known venues, so the last real
+    # team/venue ID sits at the end of the state arrays, where -1 used to land
+    missing = MatchState.from_history(with_last_match(history, venue=np.nan, toss_winner=np.nan))
+    unseen = MatchState.from_history(with_last_match(history, venue="Nowhere Ground", toss_winner="Nowhere XI"))
+    assert len(missing.engine.teams) == len(CURRENT_TEAMS) and len(missing.engine.venues) == len(VENUES)
+
+    fixtures = every_fixture()
+    np.testing.assert_array_equal(missing.features_many(fixtures), unseen.features_many(fixtures))
+
+
+def test_missing_venue_fixture_reads_like_an_unseen_venue(history):
+    state = MatchState.from_history(with_last_match(history, venue=np.nan))
+    team1, team2 = CURRENT_TEAMS[:2]
+    assert state.features(team1, team2, np.nan, team1, "field") == \
+        state.features(team1, team2, "Nowhere Ground", team1, "field")
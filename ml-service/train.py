@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Training pipeline for the match-winner model.
+
+    python train.py                            # clean -> summaries -> feature stages -> CatBoost fit
+    python train.py --window 7                 # only the toss stage and what follows it rerun
+    python train.py --publish --activate       # add the result to the model registry and serve it
+    python train.py --force                    # ignore the stage cache
+
+Every stage's output is cached under cache/train/, keyed by a hash of its
+upstream keys, its parameters and its code version, so changing one stage
+(or its parameters) recomputes that stage and everything downstream of it
+and nothing else. The cleaned tables use the existing Feather cache of
+data_cache. Each run prints and records the time spent per stage.
+
+The feature stages each compute their own columns from the match history
+and are merged afterwards, so they don't depend on one another:
+
+    clean -> summaries -> history -> rolling_stats ------+
+                                  -> ball_rolling -------+
+                                  -> toss_stats ---------+-> features -> fit
+                                  -> h2h_toss -----------+       \\
+                                  -> chasing_defending --+        encoders
+                                  -> venue --------------+
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+import warnings
+from typing import Any, Callable, Dict, List, Optional
+
+import joblib
+import pandas as pd
+import pyarrow.feather as feather
+from catboost import CatBoostClassifier
+from sklearn.preprocessing import LabelEncoder, OneHotEncoder
+
+from clean_balls_data import pivot_match_data, summarize_match_data
+from data_cache import CACHE_DIR, clean_tables_cached, clean_tables_key, load_clean_tables
+from dataset import HistoricalDataset
+from model_registry import ModelRegistry
+import features_engineering_encoding as fe
+
+TRAIN_CACHE_DIR = os.path.join(CACHE_DIR, "train")
+
+# Bump a stage's version when its code changes so its cached output (and everything downstream) is rebuilt
+STAGE_VERSIONS = {
+    "summaries": 1,
+    "history": 2,
+    "rolling_stats": fe.FEATURE_PIPELINE_VERSION,
+    "ball_rolling": fe.FEATURE_PIPELINE_VERSION,
+    "toss_stats": fe.FEATURE_PIPELINE_VERSION,
+    "h2h_toss": fe.FEATURE_PIPELINE_VERSION,
+    "chasing_defending": fe.FEATURE_PIPELINE_VERSION,
+    "venue": fe.FEATURE_PIPELINE_VERSION,
+    "features": 1,
+    "encoders": 1,
+    "fit": 1,
+}
+
+# Hyperparameters of the shipped catboost_model.pkl
+CATBOOST_PARAMS = {
+    "iterations": 400,
+    "learning_rate": 0.05,
+    "depth": 8,
+    "l2_leaf_reg": 3,
+    "border_count": 128,
+    "random_strength": 5,
+    "bagging_temperature": 0.5,
+    "random_state": 42,
+}
+
+
+class StageCache:
+    """
+    Content-addressed cache of stage outputs: DataFrames as Feather files,
+    anything else (models, encoders) through joblib.
+    """
+
+    def __init__(self, root: str = TRAIN_CACHE_DIR, force: bool = False):
+        self.root = root
+        self.force = force
+        self.timings: List[Dict[str, Any]] = []
+
+    @staticmethod
+    def key(name: str, params: Dict[str, Any], inputs: List[str]) -> str:
+        payload = json.dumps({"stage": name, "version": STAGE_VERSIONS.get(name), "params": params,
+                              "inputs": inputs}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, name: str, key: str, frame: bool) -> str:
+        return os.path.join(self.root, f"{name}_{key[:16]}.{'feather' if frame else 'pkl'}")
+
+    def run(self, name: str, fn: Callable[[], Any], params: Dict[str, Any], inputs: List[str],
+            frame: bool = True):
+        """
+        Output of one stage, from the cache when its key matches.
+
+        Returns:
+            (output, key): key identifies the output for downstream stages.
+        """
+        key = self.key(name, params, inputs)
+        path = self._path(name, key, frame)
+        start = time.perf_counter()
+        output, cached = None, False
+        if not self.force and os.path.exists(path):
+            try:
+                output = feather.read_feather(path) if frame else joblib.load(path)
+                cached = True
+            except Exception as e:
+                print(f"⚠️ Could not read cached {name} stage, recomputing: {e}")
+        if not cached:
+            output = fn()
+            self._write(name, path, output, frame)
+        self.record(name, key, time.perf_counter() - start, cached)
+        return output, key
+
+    def _write(self, name: str, path: str, output, frame: bool):
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            if frame:
+                feather.write_feather(output, tmp_path, compression="uncompressed")
+            else:
+                joblib.dump(output, tmp_path)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Could not cache the {name} stage: {e}")
+
+    def record(self, name: str, key: str, seconds: float, cached: bool):
+        self.timings.append({"stage": name, "key": key[:16], "seconds": round(seconds, 4), "cached": cached})
+        print(f"  {name:<20} {seconds:>9.3f}s  {'cached' if cached else 'computed'}")
+
+
+def _new_columns(before: pd.DataFrame, after: pd.DataFrame) -> pd.DataFrame:
+    """match_id plus the columns a library stage added to `before`"""
+    added = [c for c in after.columns if c not in before.columns]
+    out = after[added].reset_index(drop=True)
+    out.insert(0, "match_id", before["match_id"].to_numpy())
+    return out
+
+
+def feature_stages(window: int, prior_matches: int, h2h_prior_matches: int):
+    """(stage name, params, fn(history) -> match_id + feature columns) for each feature family"""
+    return [
+        ("rolling_stats", {}, lambda h: _new_columns(h, fe.calculate_rolling_stats(h))),
+        ("ball_rolling", {"prior_matches": prior_matches},
+         lambda h: _new_columns(h, fe.compute_rolling_features_balls(h, prior_matches))),
+        ("toss_stats", {"window": window},
+         lambda h: _new_columns(h, pd.concat([h, fe.calculate_toss_stats(h, window)], axis=1))),
+        ("h2h_toss", {"prior_matches": h2h_prior_matches},
+         lambda h: _new_columns(h, fe.add_head_to_head_toss_advantage(h, h2h_prior_matches))),
+        ("chasing_defending", {}, lambda h: _new_columns(h, fe.add_chasing_defending_strength(h))),
+        ("venue", {}, lambda h: _new_columns(h, fe.add_venue_features(h))),
+    ]
+
+
+def assemble_features(history: pd.DataFrame, stage_outputs: List[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Training table: match_id, season, label (team1 won) and selected_features for every decided match.
+    """
+    team_blocks = [out.drop(columns="match_id") for out in stage_outputs[:-1]]
+    df = pd.concat([history] + team_blocks, axis=1)
+    df = fe.add_diff_features(df)
+    df = pd.concat([df, stage_outputs[-1].drop(columns="match_id")], axis=1)
+    df["toss_decision_bat"] = (df["toss_decision"] == "bat").astype(int)
+    df["toss_decision_field"] = (df["toss_decision"] == "field").astype(int)
+
+    df = df[df["winner"].notna()]
+    table = df[["match_id"] + fe.selected_features].reset_index(drop=True)
+    table.insert(1, "season", df["season"].astype(str).to_numpy())
+    table.insert(2, "label", (df["winner"] == df["team1"]).astype(int).to_numpy())
+    return table
+
+
+def fit_encoders(history: pd.DataFrame) -> Dict[str, Any]:
+    """The label_encoders.pkl dictionary: team, venue and season LabelEncoders plus the one-hot encoder"""
+    teams = pd.concat([history[c].astype(str) for c in fe.TEAM_FIELDS if c in history])
+    seasons = history["season"].astype(str).str[:4].astype(int)
+    onehot = OneHotEncoder(handle_unknown="ignore")
+    onehot.fit(history[["match_type", "toss_decision"]].astype(str))
+    return {
+        "team": LabelEncoder().fit(teams),
+        "venue": LabelEncoder().fit(history["venue"].astype(str)),
+        "season": LabelEncoder().fit(seasons),
+        "onehot": onehot,
+    }
+
+
+def fit_model(table: pd.DataFrame, params: Dict[str, Any]) -> CatBoostClassifier:
+    model = CatBoostClassifier(**params, verbose=0, allow_writing_files=False)
+    model.fit(table[fe.selected_features], table["label"])
+    return model
+
+
+def run_pipeline(window: int = 5, prior_matches: int = 20, h2h_prior_matches: int = 4,
+                 params: Optional[Dict[str, Any]] = None, cache: Optional[StageCache] = None):
+    """
+    Run every stage, reusing cached outputs whose inputs and parameters are unchanged.
+
+    Returns:
+        (model, encoders, cache): the fitted CatBoostClassifier, the encoders and the
+        StageCache holding the per-stage timings.
+    """
+    params = dict(CATBOOST_PARAMS, **(params or {}))
+    cache = cache or StageCache()
+
+    start = time.perf_counter()
+    was_cached = clean_tables_cached()
+    match_data, ball_data = load_clean_tables()
+    if ball_data is None:
+        raise FileNotFoundError("the training pipeline needs the ball-by-ball CSV")
+    clean_key = clean_tables_key()
+    cache.record("clean", clean_key, time.perf_counter() - start, was_cached)
+
+    detailed, summaries_key = cache.run(
+        "summaries", lambda: pivot_match_data(summarize_match_data(ball_data)), {}, [clean_key])
+    history, history_key = cache.run(
+        "history",
+        lambda: fe.sort_chronologically(HistoricalDataset(match_data, ball_data, detailed).historical_data),
+        {}, [clean_key, summaries_key])
+
+    outputs, keys = [], []
+    for name, stage_params, fn in feature_stages(window, prior_matches, h2h_prior_matches):
+        output, key = cache.run(name, lambda fn=fn: fn(history), stage_params, [history_key])
+        outputs.append(output)
+        keys.append(key)
+
+    table, features_key = cache.run("features", lambda: assemble_features(history, outputs), {},
+                                    [history_key] + keys)
+    encoders, _ = cache.run("encoders", lambda: fit_encoders(history), {}, [history_key], frame=False)
+    model, _ = cache.run("fit", lambda: fit_model(table, params), params, [features_key], frame=False)
+    print(f"  {'total':<20} {time.perf_counter() - start:>9.3f}s")
+    return model, encoders, cache
+
+
+def save_artifacts(model: CatBoostClassifier, encoders: Dict[str, Any], out_dir: str) -> Dict[str, str]:
+    """Write model.cbm, model.pkl and label_encoders.pkl in the registry's file layout"""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {
+        "model": os.path.join(out_dir, "model.cbm"),
+        "reference": os.path.join(out_dir, "model.pkl"),
+        "encoders": os.path.join(out_dir, "label_encoders.pkl"),
+    }
+    model.save_model(paths["model"])
+    joblib.dump(model, paths["reference"])
+    joblib.dump(encoders, paths["encoders"])
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the IPL match-winner model")
+    parser.add_argument("--window", type=int, default=5, help="Toss form window")
+    parser.add_argument("--prior-matches", type=int, default=20, help="Ball-by-ball rolling window")
+    parser.add_argument("--h2h-prior-matches", type=int, default=4, help="Head-to-head toss smoothing prior")
+    parser.add_argument("--iterations", type=int, default=CATBOOST_PARAMS["iterations"])
+    parser.add_argument("--out-dir", default=os.path.join(TRAIN_CACHE_DIR, "artifacts"))
+    parser.add_argument("--force", action="store_true", help="Recompute every stage")
+    parser.add_argument("--publish", action="store_true", help="Publish the artifacts to the model registry")
+    parser.add_argument("--activate", action="store_true", help="Also make the published version active")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    print("🏋️ Training pipeline")
+    model, encoders, cache = run_pipeline(args.window, args.prior_matches, args.h2h_prior_matches,
+                                          {"iterations": args.iterations}, StageCache(force=args.force))
+
+    paths = save_artifacts(model, encoders, args.out_dir)
+    print(f"✅ Saved model artifacts to {args.out_dir}")
+
+    if args.publish or args.activate:
+        registry = ModelRegistry()
+        metadata = {
+            "training": {
+                "params": dict(CATBOOST_PARAMS, iterations=args.iterations),
+                "window": args.window,
+                "prior_matches": args.prior_matches,
+                "h2h_prior_matches": args.h2h_prior_matches,
+                "stages": cache.timings,
+            }
+        }
+        version = registry.publish(paths["model"], paths["encoders"], paths["reference"], metadata=metadata)
+        if args.activate:
+            registry.activate(version)
+            print(f"✅ Activated model version {version}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Grid search over the rolling-window parameters together with CatBoost hyperparameters.
+
+    python window_search.py                                    # default window grid, shipped CatBoost params
+    python window_search.py --form-windows 3 5 8 --prior-matches 10 20 --depth 6 8
+    python window_search.py --sample 20 --workers 4 --output search.json
+
+The features for every window setting come from one pass over the history:
+each windowed feature family (recent form, ball-by-ball averages, toss form
+boost, head-to-head toss prior) is a MultiWindowAccumulator that keeps the
+state of its widest setting and reads every narrower one from it. Features
+that don't depend on a window are computed once.
+
+Each candidate (one value per window plus one CatBoost setting) is fit on
+every season except the last --holdout-seasons and scored on those. The
+fits run in a process pool; the feature columns sit in one shared-memory
+block that every worker maps instead of receiving its own copy.
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from catboost import CatBoostClassifier
+
+import features_engineering_encoding as fe
+from backtest import score
+from dataset import get_dataset
+from match_state import add_diff_features_row
+from train import CATBOOST_PARAMS
+
+DEFAULT_GRID = {
+    "form_window": [3, 5, 8],
+    "toss_window": [3, 5, 8],
+    "prior_matches": [10, 20, 30],
+    "h2h_prior_matches": [2, 4, 8],
+}
+
+# Window parameter -> accumulator built with that window
+WINDOW_FAMILIES = {
+    "form_window": fe.RollingStatsAccumulator,
+    "toss_window": fe.TossStatsAccumulator,
+    "prior_matches": fe.BallRollingAccumulator,
+    "h2h_prior_matches": fe.HeadToHeadTossAccumulator,
+}
+
+
+def _number(text):
+    """CLI value as an int when it is one (keeps "@4" column names for integer priors)"""
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+# Worker-side views of the shared inputs, set by _attach()
+_shared = {}
+
+
+def build_columns(historical_data, grid):
+    """
+    One history pass computing every column for every window value in `grid`.
+
+    Returns:
+        (np.ndarray, list, list): (decided matches, columns) float64 matrix, its
+        column names (windowed ones as "<column>@<value>", plus label and fold),
+        and the seasons in fold order.
+    """
+    history = fe.sort_chronologically(historical_data)
+    engine = fe.FeatureEngine(
+        [fe.RollingStatsAccumulator(), fe.TossStatsAccumulator(),
+         fe.ChasingDefendingAccumulator(), fe.VenueAccumulator()]
+        + [fe.MultiWindowAccumulator(factory, grid[name]) for name, factory in WINDOW_FAMILIES.items()]
+    )
+    features = engine.run(history)
+
+    decided = history["winner"].notna().to_numpy()
+    features, history = features[decided].reset_index(drop=True), history[decided].reset_index(drop=True)
+    seasons = pd.unique(history["season"]).tolist()   # in the order they start
+    features["toss_decision_bat"] = (history["toss_decision"] == "bat").astype(np.float64)
+    features["toss_decision_field"] = (history["toss_decision"] == "field").astype(np.float64)
+    features["label"] = (history["winner"] == history["team1"]).astype(np.float64)
+    features["fold"] = history["season"].map({season: i for i, season in enumerate(seasons)}).astype(np.float64)
+    return np.ascontiguousarray(features.to_numpy(dtype=np.float64)), list(features.columns), seasons
+
+
+def candidates(grid, params_grid, sample=None, seed=0):
+    """Every (windows, CatBoost params) combination, or a random sample of them"""
+    window_names, param_names = list(grid), list(params_grid)
+    combos = [
+        {"windows": dict(zip(window_names, windows)), "params": dict(zip(param_names, params))}
+        for windows in itertools.product(*grid.values())
+        for params in itertools.product(*params_grid.values())
+    ]
+    if sample and sample < len(combos):
+        combos = random.Random(seed).sample(combos, sample)
+    return combos
+
+
+def _attach(name, shape, columns):
+    """Pool initializer: map the shared column block (no copy)"""
+    block = shared_memory.SharedMemory(name=name)
+    matrix = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    matrix.flags.writeable = False
+    _shared.update(block=block, matrix=matrix, index={c: i for i, c in enumerate(columns)})
+
+
+def candidate_features(windows):
+    """selected_features matrix for one window setting, assembled from the shared columns"""
+    matrix, index = _shared["matrix"], _shared["index"]
+    features = {c: matrix[:, i] for c, i in index.items() if "@" not in c}
+    for name, value in windows.items():
+        for c in WINDOW_FAMILIES[name](value).window_columns:
+            features[c] = matrix[:, index[f"{c}@{value}"]]
+    features = add_diff_features_row(features)
+    zeros = np.zeros(len(matrix))
+    return np.column_stack([features.get(f, zeros) for f in fe.selected_features])
+
+
+def evaluate(candidate, holdout_seasons):
+    """Fit on the earlier seasons, score on the last `holdout_seasons`"""
+    start = time.perf_counter()
+    matrix, index = _shared["matrix"], _shared["index"]
+    X = candidate_features(candidate["windows"])
+    y, fold = matrix[:, index["label"]].astype(int), matrix[:, index["fold"]].astype(int)
+    test = fold >= fold.max() + 1 - holdout_seasons
+
+    params = dict(CATBOOST_PARAMS, **candidate["params"])
+    model = CatBoostClassifier(**params, thread_count=1, verbose=0, allow_writing_files=False)
+    model.fit(pd.DataFrame(X[~test], columns=fe.selected_features), y[~test])
+    probas = model.predict_proba(pd.DataFrame(X[test], columns=fe.selected_features))[:, 1]
+
+    metrics = score(y[test], probas)
+    metrics.pop("calibration")
+    return {**candidate, **metrics, "fit_seconds": round(time.perf_counter() - start, 3)}
+
+
+def run_search(historical_data, grid, params_grid, holdout_seasons=2, workers=None, sample=None, seed=0):
+    start = time.perf_counter()
+    matrix, columns, seasons = build_columns(historical_data, grid)
+    print(f"🧮 {len(columns)} columns for {len(matrix)} matches in {time.perf_counter() - start:.2f}s (one pass)")
+    if holdout_seasons >= len(seasons):
+        raise ValueError(f"need more than {holdout_seasons} seasons, have {len(seasons)}")
+    todo = candidates(grid, params_grid, sample, seed)
+    print(f"🔎 {len(todo)} candidates, validating on {', '.join(map(str, seasons[-holdout_seasons:]))}")
+
+    block = shared_memory.SharedMemory(create=True, size=matrix.nbytes)
+    try:
+        np.ndarray(matrix.shape, dtype=np.float64, buffer=block.buf)[:] = matrix
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo)), initializer=_attach,
+                                 initargs=(block.name, matrix.shape, columns)) as pool:
+            results = list(pool.map(evaluate, todo, [holdout_seasons] * len(todo)))
+    finally:
+        block.close()
+        block.unlink()
+    return sorted(results, key=lambda r: r["log_loss"])
+
+
+def print_results(results, top):
+    print(f"\n📊 Best {min(top, len(results))} of {len(results)} by validation log-loss")
+    for rank, r in enumerate(results[:top], 1):
+        windows = " ".join(f"{k}={v}" for k, v in r["windows"].items())
+        params = " ".join(f"{k}={v}" for k, v in r["params"].items())
+        print(f"  {rank:>3}. log_loss {r['log_loss']:.4f}  brier {r['brier']:.4f}  accuracy {r['accuracy']:.1%}  "
+              f"{windows}  {params}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search rolling-window and CatBoost parameters")
+    parser.add_argument("--form-windows", type=int, nargs="+", default=DEFAULT_GRID["form_window"])
+    parser.add_argument("--toss-windows", type=int, nargs="+", default=DEFAULT_GRID["toss_window"])
+    parser.add_argument("--prior-matches", type=int, nargs="+", default=DEFAULT_GRID["prior_matches"])
+    parser.add_argument("--h2h-priors", type=_number, nargs="+", default=DEFAULT_GRID["h2h_prior_matches"])
+    parser.add_argument("--depth", type=int, nargs="+", default=[CATBOOST_PARAMS["depth"]])
+    parser.add_argument("--learning-rate", type=float, nargs="+", default=[CATBOOST_PARAMS["learning_rate"]])
+    parser.add_argument("--iterations", type=int, nargs="+", default=[CATBOOST_PARAMS["iterations"]])
+    parser.add_argument("--holdout-seasons", type=int, default=2, help="Latest seasons used for validation")
+    parser.add_argument("--sample", type=int, help="Evaluate a random sample of this many candidates")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--output", help="Also write every result to this JSON file")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore")
+    with contextlib.redirect_stdout(io.StringIO()):
+        dataset = get_dataset()
+    if dataset.historical_data is None or dataset.historical_data.empty:
+        print("❌ No historical data to search over")
+        return 1
+
+    grid = {
+        "form_window": args.form_windows,
+        "toss_window": args.toss_windows,
+        "prior_matches": args.prior_matches,
+        "h2h_prior_matches": args.h2h_priors,
+    }
+    params_grid = {"depth": args.depth, "learning_rate": args.learning_rate, "iterations": args.iterations}
+
+    start = time.perf_counter()
+    results = run_search(dataset.historical_data, grid, params_grid, args.holdout_seasons,
+                         args.workers, args.sample, args.seed)
+    print_results(results, args.top)
+    print(f"\n⏱️ {len(results)} candidates in {time.perf_counter() - start:.1f}s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"✅ Saved results to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -20,6 +20,13 @@ interface MLPredictionResponse {
     recentForm: number;
     headToHead: number;
   };
+  modelVersion?: string;
+}
+
+interface MLBatchPredictionResult {
+  index: number;
+  prediction: MLPredictionResponse | null;
+  error: string | null;
 }
 
 interface MLHeadToHeadResponse {
@@ -75,6 +82,21 @@ export class MLService {
     }
   }
 
+  async generateBatchPredictions(
+    requests: MLPredictionRequest[]
+  ): Promise<MLBatchPredictionResult[]> {
+    try {
+      const response = await axios.post<{ results: MLBatchPredictionResult[] }>(
+        `${this.mlApiUrl}/predict/batch`,
+        { predictions: requests }
+      );
+      return response.data.results;
+    } catch (error: any) {
+      console.error("Error calling ML batch prediction:", error.message || error);
+      throw new Error("Failed to fetch batch predictions from ML service");
+    }
+  }
+
   async generateLivePrediction(currentState: any): Promise<number[]> {
     try {
       const response = await axios.post<number[]>(